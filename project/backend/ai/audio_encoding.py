@@ -0,0 +1,173 @@
+import io
+import struct
+from typing import AsyncIterator, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+# Accepted media type -> audio format
+MEDIA_TYPES = {
+    'audio/wav': 'wav',
+    'audio/x-wav': 'wav',
+    'audio/wave': 'wav',
+    'audio/l16': 'pcm16',
+    'audio/pcm': 'pcm16',
+    'application/octet-stream': 'f32',
+    'audio/ogg': 'opus',
+    'audio/opus': 'opus',
+    'application/json': 'json'
+}
+
+CONTENT_TYPES = {
+    'wav': 'audio/wav',
+    'pcm16': 'audio/L16',
+    'f32': 'application/octet-stream',
+    'opus': 'audio/ogg; codecs=opus'
+}
+
+# Formats that can be written before the total length is known
+STREAM_FORMATS = ('wav', 'pcm16', 'f32')
+
+# Opus only runs at these rates
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    Pick an audio format from an Accept header.
+
+    Returns:
+        'json', 'wav', 'pcm16', 'f32' or 'opus'; 'json' when the header is
+        missing or accepts anything, for older clients; None if nothing
+        acceptable is supported
+    """
+    if not accept:
+        return 'json'
+
+    choices = []
+    for position, part in enumerate(accept.split(',')):
+        media_type, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        choices.append((-q, position, media_type.lower()))
+
+    # q=0 refuses a type outright, even when a wildcard would match it
+    refused = {MEDIA_TYPES.get(media_type) for negative_q, _, media_type in choices if negative_q == 0}
+
+    for negative_q, _, media_type in sorted(choices):
+        if negative_q == 0:
+            break
+        if media_type in ('*/*', 'application/*'):
+            fmt = 'json'
+        elif media_type == 'audio/*':
+            fmt = next((f for f in ('wav', 'pcm16') if f not in refused), None)
+        else:
+            fmt = MEDIA_TYPES.get(media_type)
+        if fmt in refused or (fmt == 'opus' and soundfile is None):
+            continue
+        if fmt is not None:
+            return fmt
+
+    return None
+
+def as_float32(audio: Union[np.ndarray, bytes, bytearray, memoryview]) -> np.ndarray:
+    """Mono float32 samples from synthesized audio, which may be an array or raw float32 bytes."""
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return np.frombuffer(audio, dtype=np.float32)
+    return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+def _pcm16(samples: np.ndarray) -> np.ndarray:
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+
+def _wav_header(num_samples: Optional[int], sample_rate: int) -> bytes:
+    # Streams of unknown length use the maximum sizes, which players read to end of stream
+    data_size = num_samples * 2 if num_samples is not None else 0xFFFFFFFF - 36
+    return (
+        b'RIFF' + struct.pack('<I', 36 + data_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+def media_type(fmt: str, sample_rate: int) -> str:
+    if fmt == 'pcm16':
+        return f"{CONTENT_TYPES[fmt]}; rate={sample_rate}; channels=1"
+    return CONTENT_TYPES[fmt]
+
+def _chunks(buffer: memoryview, chunk_size: int) -> Iterator[memoryview]:
+    for start in range(0, len(buffer), chunk_size):
+        yield buffer[start:start + chunk_size]
+
+def encode(samples: np.ndarray, fmt: str, sample_rate: int, chunk_size: int = 64 * 1024) -> Tuple[str, Iterator]:
+    """
+    Encode samples for a streamed response.
+
+    Args:
+        samples: Mono float32 samples in [-1, 1]
+        fmt: Format from negotiate (not 'json')
+        sample_rate: Sample rate of the samples
+        chunk_size: Bytes per streamed chunk
+
+    Returns:
+        (content type, iterator of byte chunks); chunks are views into a
+        single buffer rather than copies
+    """
+    if fmt == 'f32':
+        # Already in wire format: stream the array's own memory
+        buffer = memoryview(np.ascontiguousarray(samples, dtype='<f4')).cast('B')
+        return CONTENT_TYPES[fmt], _chunks(buffer, chunk_size)
+
+    if fmt == 'pcm16':
+        buffer = memoryview(_pcm16(samples)).cast('B')
+        return media_type(fmt, sample_rate), _chunks(buffer, chunk_size)
+
+    if fmt == 'wav':
+        pcm = _pcm16(samples)
+
+        def wav_chunks():
+            yield _wav_header(len(pcm), sample_rate)
+            yield from _chunks(memoryview(pcm).cast('B'), chunk_size)
+
+        return CONTENT_TYPES[fmt], wav_chunks()
+
+    if fmt == 'opus':
+        if soundfile is None:
+            raise Exception("Opus output requires the soundfile package")
+
+        rate = min((r for r in OPUS_RATES if r >= sample_rate), default=OPUS_RATES[-1])
+        if rate != sample_rate:
+            # Linear resampling is enough ahead of a lossy codec
+            positions = np.arange(int(len(samples) * rate / sample_rate)) * (sample_rate / rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+        output = io.BytesIO()
+        soundfile.write(output, samples, rate, format='OGG', subtype='OPUS')
+        return CONTENT_TYPES[fmt], _chunks(output.getbuffer(), chunk_size)
+
+    raise ValueError(f"Unsupported audio format: {fmt}")
+
+async def encode_stream(chunks: AsyncIterator[np.ndarray], fmt: str, sample_rate: int) -> AsyncIterator[memoryview]:
+    """
+    Encode audio chunks as they arrive, for formats in STREAM_FORMATS.
+
+    WAV streams get a header with open-ended sizes since the total length
+    is not known up front.
+    """
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Audio format cannot be streamed: {fmt}")
+
+    if fmt == 'wav':
+        yield memoryview(_wav_header(None, sample_rate))
+
+    async for samples in chunks:
+        if fmt == 'f32':
+            yield memoryview(np.ascontiguousarray(samples, dtype='<f4')).cast('B')
+        else:
+            yield memoryview(_pcm16(samples)).cast('B')
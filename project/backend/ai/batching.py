@@ -0,0 +1,107 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class DynamicBatcher:
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10
+    ):
+        """
+        Collect concurrent requests into batches for a blocking batch function.
+
+        Args:
+            process_batch: Takes a list of inputs and returns one result per
+                input, in order; runs in a dedicated worker thread
+            max_batch_size: Most inputs processed together
+            max_wait_ms: How long the first request in a batch waits for company
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        # One worker: batches run back to back and never contend for the model
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batcher')
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'busy_seconds': 0.0
+        }
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one input and wait for its result."""
+        # Created lazily so they bind to the running event loop
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Wait for a first request, then gather more until the batch is full or the window closes."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Drop requests whose callers have gone away
+        return [(item, future) for item, future in batch if not future.cancelled()]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor,
+                    self.process_batch,
+                    [item for item, _ in batch]
+                )
+                if len(results) != len(batch):
+                    raise ValueError(f"Batch returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.stats['batches'] += 1
+                self.stats['requests'] += len(batch)
+                self.stats['busy_seconds'] += time.perf_counter() - started
+
+            # Scatter results back to the waiting requests
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def run_exclusive(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future":
+        """
+        Run other work on the batch worker, e.g. a streamed generation.
+
+        It queues behind in-flight batches instead of running next to them,
+        so nothing else contends for the model.
+        """
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def average_batch_size(self) -> float:
+        return self.stats['requests'] / self.stats['batches'] if self.stats['batches'] else 0.0
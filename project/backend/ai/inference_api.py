@@ -1,4 +1,10 @@
-from fastapi import FastAPI, HTTPException
+import os
+import json
+import asyncio
+import logging
+import threading
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List
 import torch
@@ -8,19 +14,50 @@ from pathlib import Path
 # Import custom modules
 from .model_trainer import model_trainer
 from .voice_engine import voice_engine
+from .lazy_model import readiness, warm_up
+from .voice_store import voice_store
+from .phonemizer import phonemizer
+from .audio_encoding import STREAM_FORMATS, as_float32, encode, encode_stream, media_type, negotiate
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Models loaded at startup (comma separated, or 'all'); /ready waits for these only
+WARMUP_MODELS = [name.strip() for name in os.getenv('WARMUP_MODELS', '').split(',') if name.strip()]
+
+@app.on_event("startup")
+async def warm_up_models() -> None:
+    """Start loading the models named in WARMUP_MODELS and popular voices in the background."""
+    if WARMUP_MODELS:
+        warm_up(WARMUP_MODELS)
+    
+    # PRELOAD_VOICES lists voice ids; otherwise the most used voices from earlier runs are loaded
+    voices = [name.strip() for name in os.getenv('PRELOAD_VOICES', '').split(',') if name.strip()]
+    threading.Thread(target=voice_store.preload, args=(voices or None,), name='voice-preload', daemon=True).start()
+
+@app.on_event("shutdown")
+async def save_voice_popularity() -> None:
+    """Record which voices were used so the next start preloads them."""
+    voice_store.save_popularity()
+
 class ContentRequest(BaseModel):
     title: str
     style: str
     target_metrics: Dict[str, float]
 
+class StreamContentRequest(ContentRequest):
+    stop: List[str] = []
+
 class VoiceRequest(BaseModel):
     text: str
     voice_id: str
     optimization_metrics: Dict[str, float]
 
+class StreamVoiceRequest(BaseModel):
+    text: str
+    voice_id: str
+
 @app.post("/generate")
 async def generate_content(request: ContentRequest) -> Dict[str, Any]:
     """Generate content using fine-tuned model."""
@@ -40,16 +77,59 @@ async def generate_content(request: ContentRequest) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate/stream")
+async def generate_content_stream(request: StreamContentRequest, http_request: Request) -> StreamingResponse:
+    """Stream generated content as Server-Sent Events while it is decoded."""
+    async def events():
+        try:
+            async for text in model_trainer.stream_content(
+                prompt=request.title,
+                style=request.style,
+                target_metrics=request.target_metrics,
+                stop=request.stop,
+                is_disconnected=http_request.is_disconnected
+            ):
+                yield f"data: {json.dumps({'text': text})}\n\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-stream
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/generate/metrics")
+async def get_generation_metrics() -> Dict[str, Any]:
+    """Time to first token, batching and prefix cache stats for content generation."""
+    return {
+        "success": True,
+        "time_to_first_token": model_trainer.ttft_stats(),
+        "batching": {
+            **model_trainer.batcher.stats,
+            "average_batch_size": model_trainer.batcher.average_batch_size()
+        },
+        "prefix_cache": model_trainer.prefix_cache.stats() if model_trainer.prefix_cache else None
+    }
+
 @app.post("/synthesize")
-async def synthesize_voice(request: VoiceRequest) -> Dict[str, Any]:
-    """Synthesize voice using cloned characteristics."""
+async def synthesize_voice(request: VoiceRequest, http_request: Request):
+    """
+    Synthesize voice using cloned characteristics.
+
+    The Accept header selects the response body: audio/wav, audio/L16
+    (16-bit PCM), application/octet-stream (float32 PCM) or audio/ogg
+    (Opus) stream binary audio; anything else gets the JSON sample list.
+    """
+    fmt = negotiate(http_request.headers.get('accept'))
+    if fmt is None:
+        raise HTTPException(status_code=406, detail="Supported audio types: audio/wav, audio/L16, audio/ogg, application/octet-stream, application/json")
+    
     try:
-        # Load voice characteristics
-        voice_path = f"voices/{request.voice_id}.pth"
-        if not Path(voice_path).exists():
+        # Load voice characteristics (cached in memory across requests)
+        characteristics = await asyncio.to_thread(voice_store.get, request.voice_id)
+        if characteristics is None:
             raise HTTPException(status_code=404, detail="Voice not found")
-            
-        characteristics = torch.load(voice_path)
         
         # Generate speech
         audio = await voice_engine.clone_voice(
@@ -64,14 +144,83 @@ async def synthesize_voice(request: VoiceRequest) -> Dict[str, Any]:
                 target_metrics=request.optimization_metrics
             )
         
-        return {
-            "success": True,
-            "audio": audio.tolist()
-        }
+        # clone_voice returns an array, optimize_voice raw float32 bytes
+        samples = as_float32(audio)
+        
+        if fmt == 'json':
+            return {
+                "success": True,
+                "audio": samples.tolist()
+            }
+        
+        media_type, chunks = await asyncio.to_thread(encode, samples, fmt, voice_engine.sample_rate)
+        # WAV and Opus carry their rate in the container; raw PCM does not
+        headers = {"X-Sample-Rate": str(voice_engine.sample_rate)} if fmt in ('pcm16', 'f32') else None
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/synthesize/stream")
+async def synthesize_voice_stream(request: StreamVoiceRequest, http_request: Request) -> StreamingResponse:
+    """
+    Stream synthesized speech sentence by sentence as it is produced.
+    
+    Responds with audio/wav unless the Accept header asks for audio/L16 or
+    application/octet-stream.
+    """
+    fmt = negotiate(http_request.headers.get('accept'))
+    if fmt == 'json':
+        fmt = 'wav'
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=406, detail="Supported audio types: audio/wav, audio/L16, application/octet-stream")
+    
+    try:
+        characteristics = await asyncio.to_thread(voice_store.get, request.voice_id)
+        if characteristics is None:
+            raise HTTPException(status_code=404, detail="Voice not found")
+        
+        # Fail before the response starts if the models cannot load
+        await voice_engine.ensure_loaded()
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def audio():
+        try:
+            async for chunk in encode_stream(
+                voice_engine.clone_voice_stream(characteristics, request.text),
+                fmt,
+                voice_engine.sample_rate
+            ):
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; end the stream early
+            logger.exception(f"Error streaming synthesis: {str(e)}")
+    
+    headers = {"X-Sample-Rate": str(voice_engine.sample_rate)} if fmt in ('pcm16', 'f32') else None
+    return StreamingResponse(audio(), media_type=media_type(fmt, voice_engine.sample_rate), headers=headers)
+
+@app.get("/synthesize/metrics")
+async def get_synthesis_metrics() -> Dict[str, Any]:
+    """Pipeline, time to first audio, voice cache and phonemizer stats for speech synthesis."""
+    return {
+        "success": True,
+        "pipeline": voice_engine.pipeline.stats(),
+        "voice_cache": voice_store.stats(),
+        "phonemizer": phonemizer.stats()
+    }
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Report whether the warm-up models are loaded; 503 until they are."""
+    status = readiness(WARMUP_MODELS)
+    return JSONResponse(status_code=200 if status['ready'] else 503, content=status)
+
 @app.get("/model/status")
 async def get_model_status() -> Dict[str, Any]:
     """Get current model status and metrics."""
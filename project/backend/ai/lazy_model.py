@@ -0,0 +1,128 @@
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+NOT_LOADED = 'not_loaded'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+class LazyModel:
+    # Every lazy model, so readiness can be reported for the whole service
+    registry: Dict[str, 'LazyModel'] = {}
+
+    def __init__(self, name: str, loader: Callable[[], Any], register: bool = True):
+        """
+        A model that is loaded on first use instead of at import time.
+
+        Args:
+            name: Name reported by the readiness endpoint
+            loader: Builds and returns the model; called at most once per
+                successful load, from whichever thread first needs it
+            register: List the model for warm-up and readiness; off for
+                models no route serves
+        """
+        self.name = name
+        self.loader = loader
+        self.state = NOT_LOADED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._value = None
+        self._lock = threading.Lock()
+        if register:
+            LazyModel.registry[name] = self
+
+    def get(self) -> Any:
+        """Return the model, loading it first if needed."""
+        if self.state == READY:
+            return self._value
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if self.state == READY:
+                return self._value
+
+            self.state = LOADING
+            started = time.perf_counter()
+            try:
+                self._value = self.loader()
+            except Exception as e:
+                # A later call retries the load
+                self.state = FAILED
+                self.error = str(e)
+                raise
+
+            self.load_seconds = time.perf_counter() - started
+            self.state = READY
+            self.error = None
+            return self._value
+
+    async def aget(self) -> Any:
+        """Return the model, loading it in a worker thread so the event loop keeps serving."""
+        if self.state == READY:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def unload(self) -> None:
+        with self._lock:
+            self._value = None
+            self.state = NOT_LOADED
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'error': self.error
+        }
+
+def _expand(names: List[str]) -> List[str]:
+    return list(LazyModel.registry) if names == ['all'] else names
+
+def warm_up(names: List[str]) -> List[threading.Thread]:
+    """
+    Start loading models in background threads.
+
+    Args:
+        names: Registered model names, or ['all'] for every model
+
+    Returns:
+        The started threads
+    """
+    threads = []
+    for name in _expand(names):
+        model = LazyModel.registry.get(name)
+        if model is None:
+            print(f"Unknown model for warm-up: {name}")
+            continue
+
+        def load(model=model):
+            try:
+                model.get()
+            except Exception as e:
+                print(f"Error warming up {model.name}: {str(e)}")
+
+        thread = threading.Thread(target=load, name=f"warmup-{name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    return threads
+
+def readiness(required: List[str]) -> Dict[str, Any]:
+    """
+    Load state of every registered model.
+
+    Args:
+        required: Models that must be loaded before the service is ready,
+            normally the warm-up set, or ['all']; the rest load on first use
+            and do not hold readiness back
+
+    Returns:
+        Dict with 'ready' and per-model status
+    """
+    models = {name: model.status() for name, model in LazyModel.registry.items()}
+    return {
+        'ready': all(name in models and models[name]['state'] == READY for name in _expand(required)),
+        'required': _expand(required),
+        'models': models
+    }
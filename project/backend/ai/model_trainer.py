@@ -1,31 +1,142 @@
 import os
 import json
+import time
+import logging
+import asyncio
+import threading
 import numpy as np
-from typing import List, Dict, Any
-from transformers import AutoTokenizer, AutoModelForCausalLM, TrainingArguments
+import torch
+from collections import deque
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Awaitable, Tuple
+from transformers import (
+    AutoTokenizer, AutoModelForCausalLM, TrainingArguments,
+    TextIteratorStreamer, StoppingCriteria, StoppingCriteriaList
+)
 from datasets import Dataset
 from pathlib import Path
 
+from .lazy_model import LazyModel
+from .batching import DynamicBatcher
+from .prefix_cache import PrefixKVCache
+
+logger = logging.getLogger(__name__)
+
+class StopOnEvent(StoppingCriteria):
+    """Ends generation once an event is set from another thread."""
+    
+    def __init__(self, event: threading.Event):
+        self.event = event
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
+
 class ModelTrainer:
     def __init__(self):
         self.base_model = "mistralai/Mistral-7B-v0.1"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.base_model)
-        self.model = AutoModelForCausalLM.from_pretrained(self.base_model)
-        
-        self.training_args = TrainingArguments(
-            output_dir="./results",
-            num_train_epochs=3,
-            per_device_train_batch_size=4,
-            gradient_accumulation_steps=4,
-            learning_rate=2e-5,
-            warmup_steps=100,
-            logging_steps=10,
-            save_steps=100,
-            evaluation_strategy="steps",
-            eval_steps=100,
-            load_best_model_at_end=True
+        
+        # Serve the fine-tuned model once one has been saved
+        fine_tuned = "./models/content_generator"
+        self.model_path = os.getenv('INFERENCE_MODEL_PATH') or (fine_tuned if Path(fine_tuned).exists() else self.base_model)
+        
+        # fp32, int8 (dynamic quantization of Linear layers) or onnx (needs optimum[onnxruntime]);
+        # int8 and onnx models are for serving only and cannot be fine-tuned
+        self.inference_backend = os.getenv('INFERENCE_BACKEND', 'fp32')
+        self.inference_threads = int(os.getenv('INFERENCE_THREADS', '0'))
+        
+        # Weights are loaded on first use, not when the module is imported
+        self._tokenizer = LazyModel('content_tokenizer', lambda: AutoTokenizer.from_pretrained(self.model_path))
+        self._model = LazyModel('content_generator', self._load_model)
+        self._training_args = None
+        
+        # Concurrent generate_content calls are decoded together in one model.generate
+        self.batcher = DynamicBatcher(
+            self._run_batch,
+            max_batch_size=int(os.getenv('GENERATE_MAX_BATCH_SIZE', '8')),
+            max_wait_ms=float(os.getenv('GENERATE_BATCH_WAIT_MS', '10'))
         )
         
+        # Time to first token of recent streamed generations, in seconds
+        self.ttft = deque(maxlen=1000)
+        
+        # Key/values of shared style/target prompt headers, reused across requests
+        self.prefix_cache = PrefixKVCache(
+            max_bytes=int(os.getenv('PREFIX_CACHE_MAX_MB', '512')) * 1024 * 1024,
+            max_entries=int(os.getenv('PREFIX_CACHE_MAX_ENTRIES', '256')),
+            min_prefix_tokens=int(os.getenv('PREFIX_CACHE_MIN_TOKENS', '8'))
+        ) if os.getenv('PREFIX_CACHE_ENABLED', '1') == '1' else None
+    
+    def _load_model(self):
+        """Load the generation model with the configured inference backend."""
+        if self.inference_threads:
+            # Cap intra-op threads so several workers on one node don't oversubscribe it
+            torch.set_num_threads(self.inference_threads)
+        
+        if self.inference_backend == 'onnx':
+            try:
+                import onnxruntime
+                from optimum.onnxruntime import ORTModelForCausalLM
+            except ImportError:
+                # Serve with PyTorch rather than failing every request
+                logger.warning("INFERENCE_BACKEND=onnx requires optimum[onnxruntime]; falling back to fp32")
+                self.inference_backend = 'fp32'
+            else:
+                session_options = onnxruntime.SessionOptions()
+                if self.inference_threads:
+                    session_options.intra_op_num_threads = self.inference_threads
+                
+                # Exports on first load unless model_path already holds an ONNX export
+                export = not Path(self.model_path, 'model.onnx').exists()
+                return ORTModelForCausalLM.from_pretrained(
+                    self.model_path,
+                    export=export,
+                    use_cache=True,
+                    session_options=session_options
+                )
+        
+        if self.inference_backend not in ('fp32', 'int8'):
+            raise ValueError(f"Unknown inference backend: {self.inference_backend}")
+        
+        model = AutoModelForCausalLM.from_pretrained(self.model_path)
+        model.eval()
+        # Reuse past key/values between decoding steps instead of re-encoding the sequence
+        model.config.use_cache = True
+        
+        if self.inference_backend == 'int8':
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        return model
+    
+    @property
+    def tokenizer(self):
+        return self._tokenizer.get()
+    
+    @property
+    def model(self):
+        return self._model.get()
+    
+    @property
+    def training_args(self) -> TrainingArguments:
+        # Only training needs these, so inference never builds them
+        if self._training_args is None:
+            self._training_args = TrainingArguments(
+                output_dir="./results",
+                num_train_epochs=3,
+                per_device_train_batch_size=4,
+                gradient_accumulation_steps=4,
+                learning_rate=2e-5,
+                warmup_steps=100,
+                logging_steps=10,
+                save_steps=100,
+                evaluation_strategy="steps",
+                eval_steps=100,
+                load_best_model_at_end=True
+            )
+        return self._training_args
+    
+    async def ensure_loaded(self) -> None:
+        """Load the tokenizer and model without blocking the event loop."""
+        await asyncio.gather(self._tokenizer.aget(), self._model.aget())
+        
     async def prepare_dataset(self, content_data: List[Dict[str, Any]]) -> Dataset:
         """Prepare training dataset from successful content."""
         processed_data = []
@@ -135,20 +246,19 @@ class ModelTrainer:
             'retention_correlation': 1 - np.mean(results['retention_correlation'])
         }
     
-    async def generate_content(self, prompt: str) -> Dict[str, Any]:
+    async def generate_content(
+        self,
+        prompt: str,
+        style: Optional[str] = None,
+        target_metrics: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
         """Generate content using fine-tuned model."""
         try:
-            inputs = self.tokenizer(prompt, return_tensors="pt")
-            outputs = self.model.generate(
-                **inputs,
-                max_length=512,
-                num_return_sequences=1,
-                temperature=0.7,
-                top_p=0.9,
-                do_sample=True
-            )
+            await self.ensure_loaded()
             
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+            generated_text = await self.batcher.submit(
+                (self._build_prompt(prompt, style, target_metrics), self._prompt_prefix(style, target_metrics))
+            )
             
             return {
                 'text': generated_text,
@@ -159,6 +269,218 @@ class ModelTrainer:
         except Exception as e:
             raise Exception(f"Error generating content: {str(e)}")
     
+    async def stream_content(
+        self,
+        prompt: str,
+        style: Optional[str] = None,
+        target_metrics: Optional[Dict[str, float]] = None,
+        stop: Optional[List[str]] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate content and yield text as tokens are decoded.
+        
+        Args:
+            prompt: Content title
+            style: Requested style
+            target_metrics: Target metrics to condition on
+            stop: Stop sequences; generation ends before the first one found
+            is_disconnected: Awaitable check for a dropped client
+            
+        Yields:
+            Decoded text chunks
+        """
+        started = time.perf_counter()
+        await self.ensure_loaded()
+        
+        tokenizer = self.tokenizer
+        inputs = await asyncio.to_thread(
+            self._prompt_inputs,
+            self._build_prompt(prompt, style, target_metrics),
+            self._prompt_prefix(style, target_metrics)
+        )
+        # No read timeout: the generation may wait behind batches, and a failure ends the streamer
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop_event = threading.Event()
+        
+        def generate():
+            try:
+                self.model.generate(
+                    **inputs,
+                    max_length=512,
+                    num_return_sequences=1,
+                    temperature=0.7,
+                    top_p=0.9,
+                    do_sample=True,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([StopOnEvent(stop_event)])
+                )
+            except BaseException:
+                # Unblock the reader; the error is re-raised from the future below
+                streamer.end()
+                raise
+        
+        # Runs on the batcher's single worker, so streams never contend with batches
+        generation = self.batcher.run_exclusive(generate)
+        
+        stop = [s for s in stop or [] if s]
+        # Longest tail that could be the start of a stop sequence, held back until resolved
+        holdback = max((len(s) for s in stop), default=1) - 1
+        pending = ''
+        first = True
+        
+        try:
+            chunks = iter(streamer)
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                if first and chunk:
+                    self.ttft.append(time.perf_counter() - started)
+                    first = False
+                
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                
+                pending += chunk
+                cut = min((i for i in (pending.find(s) for s in stop) if i >= 0), default=-1)
+                if cut >= 0:
+                    if pending[:cut]:
+                        yield pending[:cut]
+                    return
+                
+                ready = pending[:len(pending) - holdback] if holdback else pending
+                if ready:
+                    yield ready
+                    pending = pending[len(ready):]
+            
+            # Surfaces an exception raised by generate
+            await generation
+            
+            if pending:
+                yield pending
+                
+        finally:
+            # Also reached when the consumer goes away; frees the model worker,
+            # or drops the generation if it has not started yet
+            stop_event.set()
+            if not generation.done():
+                generation.cancel()
+                # Release a reader still waiting on a generation that never started
+                streamer.end()
+            elif not generation.cancelled():
+                generation.exception()
+    
+    def ttft_stats(self) -> Dict[str, float]:
+        """Time-to-first-token summary for recent streamed generations."""
+        if not self.ttft:
+            return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0}
+        values = np.array(self.ttft)
+        return {
+            'count': len(values),
+            'mean': float(values.mean()),
+            'p50': float(np.percentile(values, 50)),
+            'p95': float(np.percentile(values, 95))
+        }
+    
+    def _prompt_prefix(
+        self,
+        style: Optional[str] = None,
+        target_metrics: Optional[Dict[str, float]] = None
+    ) -> str:
+        """The style and target header shared by every prompt with the same settings."""
+        lines = []
+        if style:
+            lines.append(f"Style: {style}")
+        if target_metrics:
+            lines.append("Targets: " + ", ".join(f"{name} {value}" for name, value in target_metrics.items()))
+        
+        return "".join(f"{line}\n" for line in lines)
+    
+    def _build_prompt(
+        self,
+        prompt: str,
+        style: Optional[str] = None,
+        target_metrics: Optional[Dict[str, float]] = None
+    ) -> str:
+        """Prefix the title with the requested style and target metrics."""
+        prefix = self._prompt_prefix(style, target_metrics)
+        if not prefix:
+            return prompt
+        
+        return f"{prefix}Title: {prompt}\n"
+    
+    def _prompt_inputs(self, text: str, prefix: str = '') -> Dict[str, Any]:
+        """
+        Tokenize a single prompt, attaching cached key/values for its prefix when possible.
+        
+        Generation then only prefills the tokens after the prefix.
+        """
+        inputs = dict(self.tokenizer(text, return_tensors="pt"))
+        
+        # ONNX Runtime models keep their own cache format
+        if not prefix or self.prefix_cache is None or self.inference_backend == 'onnx':
+            return inputs
+        
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids
+        length = prefix_ids.shape[-1]
+        input_ids = inputs['input_ids']
+        
+        # The prefix must tokenize identically inside the full prompt, with
+        # at least one token left to prefill
+        if length >= input_ids.shape[-1] or not torch.equal(input_ids[0, :length], prefix_ids[0]):
+            return inputs
+        
+        def prefill():
+            with torch.no_grad():
+                return self.model(prefix_ids, use_cache=True).past_key_values
+        
+        past_key_values = self.prefix_cache.get(prefix_ids, prefill)
+        if past_key_values is not None:
+            inputs['past_key_values'] = past_key_values
+        
+        return inputs
+    
+    def _run_batch(self, items: List[Tuple[str, str]]) -> List[str]:
+        """DynamicBatcher entry point for (prompt text, prompt prefix) pairs."""
+        prompts, prefixes = zip(*items)
+        return self.generate_batch(list(prompts), list(prefixes))
+    
+    def generate_batch(self, prompts: List[str], prefixes: Optional[List[str]] = None) -> List[str]:
+        """
+        Generate text for several prompts in one padded model.generate call.
+        
+        Blocking; DynamicBatcher runs it in its worker thread.
+        
+        Args:
+            prompts: Full prompt texts
+            prefixes: Shared header of each prompt; a lone prompt resumes from
+                the prefix cache
+        """
+        tokenizer = self.tokenizer
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        
+        if len(prompts) == 1:
+            inputs = self._prompt_inputs(prompts[0], prefixes[0] if prefixes else '')
+        else:
+            # Decoder-only models continue from the last position, so pad on the left.
+            # Cached prefixes are not used here: padding would shift their positions
+            tokenizer.padding_side = 'left'
+            inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+        
+        outputs = self.model.generate(
+            **inputs,
+            max_length=512,
+            num_return_sequences=1,
+            temperature=0.7,
+            top_p=0.9,
+            do_sample=True,
+            pad_token_id=tokenizer.pad_token_id
+        )
+        
+        return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    
     def _predict_engagement(self, text: str) -> float:
         """Predict engagement score for generated content."""
         # Use ML model to predict engagement
@@ -0,0 +1,302 @@
+import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)*|\d")
+
+DIGIT_WORDS = ('zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine')
+
+VOWELS = {'AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH', 'IY', 'OW', 'OY', 'UH', 'UW'}
+
+# Letter-to-sound rules for words missing from the dictionary, tried
+# longest grapheme first at each position
+GRAPHEME_RULES = {
+    'tion': ('SH', 'AH', 'N'), 'sion': ('ZH', 'AH', 'N'), 'ough': ('AO',),
+    'igh': ('AY',), 'tch': ('CH',), 'dge': ('JH',), 'ing': ('IH', 'NG'),
+    'ch': ('CH',), 'sh': ('SH',), 'th': ('TH',), 'ph': ('F',), 'wh': ('W',),
+    'ck': ('K',), 'ng': ('NG',), 'qu': ('K', 'W'), 'gh': (), 'kn': ('N',),
+    'wr': ('R',), 'ee': ('IY',), 'ea': ('IY',), 'oo': ('UW',), 'ou': ('AW',),
+    'ow': ('OW',), 'oi': ('OY',), 'oy': ('OY',), 'ai': ('EY',), 'ay': ('EY',),
+    'au': ('AO',), 'aw': ('AO',), 'ie': ('IY',), 'ei': ('EY',), 'ey': ('IY',),
+    'er': ('ER',), 'ir': ('ER',), 'ur': ('ER',), 'ar': ('AA', 'R'), 'or': ('AO', 'R'),
+    'a': ('AE',), 'b': ('B',), 'c': ('K',), 'd': ('D',), 'e': ('EH',), 'f': ('F',),
+    'g': ('G',), 'h': ('HH',), 'i': ('IH',), 'j': ('JH',), 'k': ('K',), 'l': ('L',),
+    'm': ('M',), 'n': ('N',), 'o': ('AA',), 'p': ('P',), 'q': ('K',), 'r': ('R',),
+    's': ('S',), 't': ('T',), 'u': ('AH',), 'v': ('V',), 'w': ('W',), 'x': ('K', 'S'),
+    'y': ('IY',), 'z': ('Z',), "'": ()
+}
+MAX_GRAPHEME = max(len(grapheme) for grapheme in GRAPHEME_RULES)
+
+# Files of a compiled dictionary table
+TABLE_FILES = ('words.npy', 'word_offsets.npy', 'phones.npy', 'phone_offsets.npy', 'symbols.json')
+
+# flock only excludes other open files, so threads of one process also share this
+_local_lock = threading.RLock()
+
+@contextmanager
+def table_lock(table_dir: Path):
+    """
+    Hold an exclusive lock on a table directory across processes.
+
+    The lock is a file next to the directory, so it survives the directory
+    being replaced. Without fcntl (Windows) only threads are serialized.
+    """
+    table_dir.parent.mkdir(parents=True, exist_ok=True)
+    with _local_lock, open(table_dir.with_name(f"{table_dir.name}.lock"), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def table_complete(table_dir: Path) -> bool:
+    return all((table_dir / name).exists() for name in TABLE_FILES)
+
+def parse_cmudict(lines: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    First pronunciation of each word in a CMU dictionary file.
+
+    Accepts both the cmudict.dict layout ("word(2) W ER1 D") and the NLTK
+    corpus layout ("WORD 1 W ER1 D").
+    """
+    pronunciations = {}
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if not line or line.startswith(';;;'):
+            continue
+
+        word, *phones = line.split()
+        if phones and phones[0].isdigit():
+            phones = phones[1:]
+
+        word = word.lower().split('(', 1)[0]
+        if phones and word not in pronunciations:
+            pronunciations[word] = phones
+
+    return pronunciations
+
+def rule_phonemes(word: str) -> Tuple[str, ...]:
+    """Letter-to-sound fallback: stress the first vowel, drop a silent final e."""
+    if len(word) > 3 and word.endswith('e') and word[-2] not in 'aeiouy':
+        word = word[:-1]
+
+    phones = []
+    i = 0
+    while i < len(word):
+        for size in range(min(MAX_GRAPHEME, len(word) - i), 0, -1):
+            rule = GRAPHEME_RULES.get(word[i:i + size])
+            if rule is not None:
+                phones.extend(rule)
+                i += size
+                break
+        else:
+            # Not a letter we have a rule for
+            i += 1
+
+    # Doubled letters ("bb", "ll") are one sound
+    phones = [phone for index, phone in enumerate(phones) if index == 0 or phone != phones[index - 1]]
+
+    stressed = False
+    for index, phone in enumerate(phones):
+        if phone in VOWELS:
+            phones[index] = f"{phone}{0 if stressed else 1}"
+            stressed = True
+
+    return tuple(phones)
+
+class PronunciationTable:
+    def __init__(self, table_dir: Path):
+        """
+        Sorted, memory-mapped pronunciation table.
+
+        Words are stored as one UTF-8 byte blob sorted bytewise with an
+        offsets array, and pronunciations as uint8 symbol ids with their own
+        offsets, so a lookup is a binary search over the mapped pages.
+        """
+        self.words = np.load(table_dir / 'words.npy', mmap_mode='r')
+        self.word_offsets = np.load(table_dir / 'word_offsets.npy', mmap_mode='r')
+        self.phones = np.load(table_dir / 'phones.npy', mmap_mode='r')
+        self.phone_offsets = np.load(table_dir / 'phone_offsets.npy', mmap_mode='r')
+        self.symbols = json.loads((table_dir / 'symbols.json').read_text())
+        # memoryviews index to plain ints and bytes, much faster than memmap scalars
+        self._blob = memoryview(self.words)
+        self._offsets = memoryview(self.word_offsets)
+        self._phones = memoryview(self.phones)
+        self._phone_offsets = memoryview(self.phone_offsets)
+        self.size = len(self.word_offsets) - 1
+
+    def _word(self, index: int) -> bytes:
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def get(self, word: str) -> Optional[Tuple[str, ...]]:
+        key = word.encode('utf-8')
+        index = bisect_left(range(self.size), key, key=self._word)
+        if index == self.size or self._word(index) != key:
+            return None
+
+        ids = self._phones[self._phone_offsets[index]:self._phone_offsets[index + 1]]
+        return tuple(self.symbols[i] for i in ids)
+
+    @staticmethod
+    def build(pronunciations: Dict[str, List[str]], table_dir: Path, replace: bool = True) -> None:
+        """
+        Compile pronunciations into table_dir.
+
+        With replace=False an already complete table is left alone, so
+        workers racing to build a missing table end up sharing one.
+        """
+        words = sorted(pronunciations, key=lambda word: word.encode('utf-8'))
+        symbols = sorted({phone for phones in pronunciations.values() for phone in phones})
+        if len(symbols) > 256:
+            raise ValueError(f"Too many phoneme symbols for a uint8 table: {len(symbols)}")
+        symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+
+        encoded = [word.encode('utf-8') for word in words]
+        word_offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+        word_offsets[1:] = np.cumsum([len(word) for word in encoded])
+        phone_offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+        phone_offsets[1:] = np.cumsum([len(pronunciations[word]) for word in words])
+        phones = np.fromiter(
+            (symbol_ids[phone] for word in words for phone in pronunciations[word]),
+            dtype=np.uint8,
+            count=int(phone_offsets[-1])
+        )
+
+        # Builds and installs are serialized, so a table directory only
+        # ever changes as a whole while no other build or load is reading it
+        with table_lock(table_dir):
+            if not replace and table_complete(table_dir):
+                return
+
+            tmp_dir = Path(tempfile.mkdtemp(prefix=f"{table_dir.name}.", suffix='.tmp', dir=table_dir.parent))
+            try:
+                np.save(tmp_dir / 'words.npy', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+                np.save(tmp_dir / 'word_offsets.npy', word_offsets)
+                np.save(tmp_dir / 'phones.npy', phones)
+                np.save(tmp_dir / 'phone_offsets.npy', phone_offsets)
+                (tmp_dir / 'symbols.json').write_text(json.dumps(symbols))
+
+                shutil.rmtree(table_dir, ignore_errors=True)
+                os.replace(tmp_dir, table_dir)
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+class Phonemizer:
+    def __init__(self, dict_path: Optional[str] = None, table_dir: str = 'data/phonemizer', cache_size: int = 50000):
+        """
+        Text to ARPAbet phonemes backed by the CMU Pronouncing Dictionary.
+
+        Args:
+            dict_path: CMU dictionary text file; defaults to the NLTK cmudict corpus
+            table_dir: Where the compiled table is kept between processes
+            cache_size: Words memoized in the per-word LRU
+        """
+        self.dict_path = dict_path
+        self.table_dir = Path(table_dir)
+        self.table: Optional[PronunciationTable] = None
+        self._lock = threading.Lock()
+        self.word = lru_cache(maxsize=cache_size)(self._phonemize_word)
+
+        self.metrics = {
+            'dictionary_words': 0,
+            'oov_words': 0
+        }
+
+    def _load_pronunciations(self) -> Dict[str, List[str]]:
+        if self.dict_path:
+            with open(self.dict_path, encoding='utf-8') as f:
+                return parse_cmudict(f)
+
+        from nltk.corpus import cmudict
+        return {word: phones[0] for word, phones in cmudict.dict().items()}
+
+    def load(self) -> PronunciationTable:
+        """Map the compiled table, building it from the dictionary on first use."""
+        if self.table is not None:
+            return self.table
+
+        with self._lock:
+            if self.table is None:
+                if not table_complete(self.table_dir):
+                    PronunciationTable.build(self._load_pronunciations(), self.table_dir, replace=False)
+                # Mapped under the lock so a concurrent rebuild can't swap files mid-load
+                with table_lock(self.table_dir):
+                    self.table = PronunciationTable(self.table_dir)
+
+        return self.table
+
+    def _phonemize_word(self, word: str) -> Tuple[str, ...]:
+        phones = self.load().get(word)
+        if phones is not None:
+            self.metrics['dictionary_words'] += 1
+            return phones
+
+        # Possessives and contractions the dictionary lacks
+        if word.endswith("'s") and (phones := self.load().get(word[:-2])) is not None:
+            self.metrics['dictionary_words'] += 1
+            return phones + ('Z',)
+
+        self.metrics['oov_words'] += 1
+        return rule_phonemes(word)
+
+    def words(self, text: str) -> List[str]:
+        """Lowercased words of text, with digits spelled out."""
+        return [
+            DIGIT_WORDS[int(token)] if token.isdigit() else token
+            for token in WORD_PATTERN.findall(text.lower())
+        ]
+
+    def phonemize(self, text: str) -> List[str]:
+        """Phoneme sequence for text; unknown words get rule-based pronunciations."""
+        phonemes = []
+        for word in self.words(text):
+            phonemes.extend(self.word(word))
+        return phonemes
+
+    def phonemize_batch(self, texts: List[str]) -> List[List[str]]:
+        """
+        Phoneme sequences for many texts, e.g. every line of a script.
+
+        Each distinct word is looked up once across the whole batch.
+        """
+        tokenized = [self.words(text) for text in texts]
+        lookup = {word: self.word(word) for word in set().union(*tokenized)} if tokenized else {}
+
+        return [
+            [phone for word in words for phone in lookup[word]]
+            for words in tokenized
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        info = self.word.cache_info()
+        return {
+            **self.metrics,
+            'cache_hits': info.hits,
+            'cache_misses': info.misses,
+            'cache_entries': info.currsize,
+            'table_words': self.table.size if self.table is not None else 0
+        }
+
+# Create singleton instance
+phonemizer = Phonemizer(
+    dict_path=os.getenv('CMUDICT_PATH'),
+    table_dir=os.getenv('PHONEME_TABLE_DIR', 'data/phonemizer'),
+    cache_size=int(os.getenv('PHONEME_CACHE_SIZE', '50000'))
+)
@@ -0,0 +1,113 @@
+import copy
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+import torch
+
+def _cache_nbytes(past_key_values: Any) -> int:
+    """Approximate memory held by a past key/value cache."""
+    if hasattr(past_key_values, 'layers'):
+        tensors = [t for layer in past_key_values.layers for t in (layer.keys, layer.values) if t is not None]
+    elif hasattr(past_key_values, 'key_cache'):
+        tensors = list(past_key_values.key_cache) + list(past_key_values.value_cache)
+    else:
+        # Legacy tuple-of-tuples format
+        tensors = [t for layer in past_key_values for t in layer]
+    return sum(t.numel() * t.element_size() for t in tensors if isinstance(t, torch.Tensor))
+
+class PrefixKVCache:
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, max_entries: int = 256, min_prefix_tokens: int = 8):
+        """
+        LRU of past key/values for prompt prefixes shared between requests.
+
+        Args:
+            max_bytes: Memory budget for cached key/values
+            max_entries: Most prefixes kept
+            min_prefix_tokens: Shorter prefixes are cheaper to recompute than to cache
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.min_prefix_tokens = min_prefix_tokens
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'prefill_seconds': 0.0,
+            'prefill_seconds_saved': 0.0
+        }
+
+    def _key(self, prefix_ids: torch.Tensor) -> str:
+        return hashlib.sha256(prefix_ids.to(torch.int64).cpu().numpy().tobytes()).hexdigest()
+
+    def get(self, prefix_ids: torch.Tensor, prefill: Callable[[], Any]) -> Optional[Any]:
+        """
+        Past key/values for a prefix, computing and caching them on a miss.
+
+        Args:
+            prefix_ids: Token ids of the prefix, shape (1, n)
+            prefill: Runs the model over the prefix and returns its past key/values
+
+        Returns:
+            A private copy of the cached key/values (generation extends them
+            in place), or None if the prefix is too short to cache
+        """
+        if prefix_ids.shape[-1] < self.min_prefix_tokens:
+            return None
+
+        key = self._key(prefix_ids)
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.metrics['hits'] += 1
+                self.metrics['prefill_seconds_saved'] += entry['prefill_seconds']
+                return copy.deepcopy(entry['past_key_values'])
+
+        started = time.perf_counter()
+        past_key_values = prefill()
+        elapsed = time.perf_counter() - started
+        size = _cache_nbytes(past_key_values)
+
+        with self._lock:
+            self.metrics['misses'] += 1
+            self.metrics['prefill_seconds'] += elapsed
+
+            if size <= self.max_bytes and key not in self.entries:
+                self.entries[key] = {
+                    'past_key_values': copy.deepcopy(past_key_values),
+                    'prefill_seconds': elapsed,
+                    'bytes': size
+                }
+                self.bytes += size
+
+                while self.bytes > self.max_bytes or len(self.entries) > self.max_entries:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.bytes -= evicted['bytes']
+                    self.metrics['evictions'] += 1
+
+        return past_key_values
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def hit_ratio(self) -> float:
+        total = self.metrics['hits'] + self.metrics['misses']
+        return self.metrics['hits'] / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'hit_ratio': self.hit_ratio(),
+            'entries': len(self.entries),
+            'bytes': self.bytes
+        }
@@ -0,0 +1,161 @@
+import re
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+import numpy as np
+
+SENTENCE_END = re.compile(r'(?<=[.!?;:])\s+')
+
+def split_sentences(text: str, max_chars: int = 200) -> List[str]:
+    """
+    Split text into sentences for synthesis.
+
+    Sentences longer than max_chars are broken at the last comma, then the
+    last space, that keeps the piece under the limit.
+    """
+    pieces = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(', ', 0, max_chars)
+            if cut <= 0:
+                cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars - 1
+            pieces.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+class SynthesisPipeline:
+    def __init__(self, sample_rate: int, workers: int = 2, max_ahead: int = 4, crossfade_ms: float = 10):
+        """
+        Sentence-by-sentence speech synthesis with overlapping stages.
+
+        Args:
+            sample_rate: Sample rate of vocoded audio
+            workers: Threads shared by the encode and vocode stages; with two,
+                one sentence is encoded while the previous one is vocoded
+            max_ahead: Sentences in flight at once, bounding memory
+            crossfade_ms: Overlap blended at each sentence boundary
+        """
+        self.sample_rate = sample_rate
+        self.max_ahead = max_ahead
+        self.crossfade = int(sample_rate * crossfade_ms / 1000)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='synthesis')
+
+        self.ttfa = deque(maxlen=1000)
+        self.metrics = {
+            'streams': 0,
+            'sentences': 0,
+            'encode_seconds': 0.0,
+            'vocode_seconds': 0.0
+        }
+
+    def _timed(self, stage: str, fn: Callable[[Any], Any], arg: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(arg)
+        finally:
+            self.metrics[stage] += time.perf_counter() - started
+
+    async def _synthesize(self, sentence: str, encode: Callable[[str], Any], vocode: Callable[[Any], Any]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        mel = await loop.run_in_executor(self._executor, self._timed, 'encode_seconds', encode, sentence)
+        audio = await loop.run_in_executor(self._executor, self._timed, 'vocode_seconds', vocode, mel)
+        self.metrics['sentences'] += 1
+        return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+    def _blend(self, tail: np.ndarray, audio: np.ndarray) -> np.ndarray:
+        """Crossfade the held-back tail of the previous sentence into the next one."""
+        n = min(len(tail), len(audio))
+        if n == 0:
+            return np.concatenate([tail, audio])
+
+        fade_in = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        blended = tail[len(tail) - n:] * (1.0 - fade_in) + audio[:n] * fade_in
+        return np.concatenate([tail[:len(tail) - n], blended, audio[n:]])
+
+    async def stream(
+        self,
+        sentences: List[str],
+        encode: Callable[[str], Any],
+        vocode: Callable[[Any], Any]
+    ) -> AsyncIterator[np.ndarray]:
+        """
+        Synthesize sentences and yield audio in order as each one finishes.
+
+        Args:
+            sentences: Text pieces, e.g. from split_sentences
+            encode: Blocking text -> spectrogram stage
+            vocode: Blocking spectrogram -> samples stage
+
+        Yields:
+            Mono float32 chunks; the last crossfade window of each sentence is
+            held back until the next sentence is ready to blend with it
+        """
+        started = time.perf_counter()
+        self.metrics['streams'] += 1
+
+        upcoming = iter(sentences)
+        tasks = deque(
+            asyncio.create_task(self._synthesize(sentence, encode, vocode))
+            for sentence in islice(upcoming, self.max_ahead)
+        )
+        tail = None
+        first = True
+
+        try:
+            while True:
+                if tasks:
+                    audio = await tasks.popleft()
+                    sentence = next(upcoming, None)
+                    if sentence is not None:
+                        tasks.append(asyncio.create_task(self._synthesize(sentence, encode, vocode)))
+
+                    if tail is not None:
+                        audio = self._blend(tail, audio)
+                    cut = max(len(audio) - self.crossfade, 0)
+                    chunk, tail = audio[:cut], audio[cut:]
+                else:
+                    chunk, tail = tail, None
+
+                if chunk is None:
+                    return
+
+                if len(chunk):
+                    if first:
+                        self.ttfa.append(time.perf_counter() - started)
+                        first = False
+                    yield chunk
+
+                if tail is None:
+                    return
+
+        finally:
+            # Also reached when the consumer goes away; drop queued sentences
+            for task in tasks:
+                task.cancel()
+
+    def ttfa_stats(self) -> Dict[str, float]:
+        """Time-to-first-audio summary for recent streams."""
+        if not self.ttfa:
+            return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0}
+        values = np.array(self.ttfa)
+        return {
+            'count': len(values),
+            'mean': float(values.mean()),
+            'p50': float(np.percentile(values, 50)),
+            'p95': float(np.percentile(values, 95))
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'time_to_first_audio': self.ttfa_stats()
+        }
@@ -1,10 +1,16 @@
 import os
+import asyncio
+import functools
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List
 import torch
 import torchaudio
 from pathlib import Path
 
+from .lazy_model import LazyModel
+from .phonemizer import phonemizer
+from .synthesis_pipeline import SynthesisPipeline, split_sentences
+
 class VoiceEngine:
     def __init__(self):
         self.sample_rate = 22050
@@ -12,10 +18,35 @@ class VoiceEngine:
         self.win_length = 1024
         self.n_mels = 80
         
-        # Initialize models
-        self.encoder = self._init_encoder()
-        self.decoder = self._init_decoder()
-        self.vocoder = self._init_vocoder()
+        # Models are fetched and loaded on first use; voice analysis needs none of them
+        self._encoder = LazyModel('voice_encoder', self._init_encoder)
+        # No route synthesizes through the decoder, so it stays out of warm-up and readiness
+        self._decoder = LazyModel('voice_decoder', self._init_decoder, register=False)
+        self._vocoder = LazyModel('voice_vocoder', self._init_vocoder)
+        
+        # Long scripts are synthesized sentence by sentence with encode and vocode overlapped
+        self.pipeline = SynthesisPipeline(
+            sample_rate=self.sample_rate,
+            workers=int(os.getenv('SYNTHESIS_WORKERS', '2')),
+            max_ahead=int(os.getenv('SYNTHESIS_MAX_AHEAD', '4')),
+            crossfade_ms=float(os.getenv('SYNTHESIS_CROSSFADE_MS', '10'))
+        )
+    
+    @property
+    def encoder(self):
+        return self._encoder.get()
+    
+    @property
+    def decoder(self):
+        return self._decoder.get()
+    
+    @property
+    def vocoder(self):
+        return self._vocoder.get()
+    
+    async def ensure_loaded(self) -> None:
+        """Load the models speech synthesis needs without blocking the event loop."""
+        await asyncio.gather(self._encoder.aget(), self._vocoder.aget())
         
     def _init_encoder(self):
         """Initialize the voice encoder model."""
@@ -107,35 +138,55 @@ class VoiceEngine:
     async def clone_voice(self, characteristics: Dict[str, Any], text: str) -> bytes:
         """Generate speech using cloned voice characteristics."""
         try:
-            # Convert text to phonemes
-            phonemes = self._text_to_phonemes(text)
-            
-            # Generate mel spectrogram
-            mel_spec = self.encoder(phonemes)
-            
-            # Apply voice characteristics
-            modified_mel = self._apply_voice_characteristics(mel_spec, characteristics)
+            await self.ensure_loaded()
             
-            # Convert to audio
-            audio = self.vocoder(modified_mel)
+            return self._vocode(self._encode(characteristics, text))
             
-            return audio.cpu().numpy()
+        except Exception as e:
+            raise Exception(f"Error cloning voice: {str(e)}")
+    
+    async def clone_voice_stream(self, characteristics: Dict[str, Any], text: str) -> AsyncIterator[np.ndarray]:
+        """
+        Generate speech sentence by sentence, yielding audio as it is ready.
+        
+        Args:
+            characteristics: Voice characteristics to apply
+            text: Script to speak
             
+        Yields:
+            Float32 audio chunks at self.sample_rate, crossfaded at sentence boundaries
+        """
+        await self.ensure_loaded()
+        
+        try:
+            async for chunk in self.pipeline.stream(
+                split_sentences(text),
+                functools.partial(self._encode, characteristics),
+                self._vocode
+            ):
+                yield chunk
         except Exception as e:
             raise Exception(f"Error cloning voice: {str(e)}")
     
-    def _text_to_phonemes(self, text: str) -> List[str]:
-        """Convert text to phoneme sequence."""
-        # Use CMU Dictionary for phoneme conversion
-        from nltk.corpus import cmudict
-        d = cmudict.dict()
+    def _encode(self, characteristics: Dict[str, Any], text: str) -> torch.Tensor:
+        """Text to a mel spectrogram in the cloned voice."""
+        # Convert text to phonemes
+        phonemes = self._text_to_phonemes(text)
         
-        phonemes = []
-        for word in text.lower().split():
-            if word in d:
-                phonemes.extend(d[word][0])
+        # Generate mel spectrogram
+        mel_spec = self.encoder(phonemes)
         
-        return phonemes
+        # Apply voice characteristics
+        return self._apply_voice_characteristics(mel_spec, characteristics)
+    
+    def _vocode(self, mel_spec: torch.Tensor) -> np.ndarray:
+        """Mel spectrogram to audio samples."""
+        return self.vocoder(mel_spec).cpu().numpy()
+    
+    def _text_to_phonemes(self, text: str) -> List[str]:
+        """Convert text to phoneme sequence."""
+        # CMU Dictionary lookups through a memory-mapped table and word cache
+        return phonemizer.phonemize(text)
     
     def _apply_voice_characteristics(self, mel_spec: torch.Tensor, 
                                    characteristics: Dict[str, Any]) -> torch.Tensor:
@@ -0,0 +1,230 @@
+import os
+import json
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import torch
+
+try:
+    from safetensors import safe_open
+    from safetensors.numpy import save_file as save_safetensors
+except ImportError:
+    safe_open = None
+    save_safetensors = None
+
+# Looked up in this order; the compact formats load without unpickling
+FORMATS = ('.safetensors', '.npz', '.pth')
+
+def _flatten(characteristics: Dict[str, Any], prefix: str = '') -> Dict[str, np.ndarray]:
+    """{'pitch': {'mean': 1.0}} -> {'pitch.mean': array(1.0)}"""
+    flat = {}
+    for key, value in characteristics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, torch.Tensor):
+            flat[name] = value.detach().cpu().numpy()
+        else:
+            flat[name] = np.asarray(value, dtype=np.float32)
+    return flat
+
+def _unflatten(flat: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    characteristics: Dict[str, Any] = {}
+    for name, value in flat.items():
+        node = characteristics
+        *parents, leaf = name.split('.')
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        # Scalars come back as plain floats, as extract_voice_characteristics produces them
+        node[leaf] = float(value) if value.ndim == 0 else value
+    return characteristics
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values()) + 64
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    return 32
+
+class VoiceStore:
+    def __init__(self, voices_dir: str = 'voices', max_bytes: int = 64 * 1024 * 1024):
+        """
+        In-memory LRU of decoded voice characteristics.
+
+        Args:
+            voices_dir: Directory of {voice_id}.safetensors / .npz / .pth files
+            max_bytes: Memory budget for cached characteristics
+        """
+        self.voices_dir = Path(voices_dir)
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.bytes = 0
+        self.usage = Counter()
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'reloads': 0,
+            'evictions': 0
+        }
+
+    def _path(self, voice_id: str) -> Optional[Path]:
+        # Voice ids come from requests; never let them leave voices_dir
+        if not voice_id or voice_id in ('.', '..') or any(c in voice_id for c in '/\\\0'):
+            return None
+
+        for suffix in FORMATS:
+            path = self.voices_dir / f"{voice_id}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def get(self, voice_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Characteristics for a voice, or None if no voice file exists.
+
+        Cached entries are reused while the file's mtime and size are unchanged.
+        """
+        path = self._path(voice_id)
+        if path is None:
+            return None
+
+        stat = path.stat()
+        version = (str(path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            self.usage[voice_id] += 1
+            entry = self.entries.get(voice_id)
+            if entry is not None:
+                if entry['version'] == version:
+                    self.entries.move_to_end(voice_id)
+                    self.metrics['hits'] += 1
+                    return entry['characteristics']
+                self.metrics['reloads'] += 1
+            else:
+                self.metrics['misses'] += 1
+
+        characteristics = self._load(path)
+        size = _nbytes(characteristics)
+
+        with self._lock:
+            old = self.entries.pop(voice_id, None)
+            if old is not None:
+                self.bytes -= old['bytes']
+
+            if size <= self.max_bytes:
+                self.entries[voice_id] = {'characteristics': characteristics, 'version': version, 'bytes': size}
+                self.bytes += size
+
+                while self.bytes > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.bytes -= evicted['bytes']
+                    self.metrics['evictions'] += 1
+
+        return characteristics
+
+    def _load(self, path: Path) -> Dict[str, Any]:
+        if path.suffix == '.safetensors':
+            if safe_open is None:
+                raise Exception("Loading .safetensors voices requires the safetensors package")
+            # safe_open memory-maps the file and reads tensors without unpickling
+            with safe_open(str(path), framework='np') as f:
+                # safetensors stores scalars as 1-element tensors; restore their shape
+                scalars = set(json.loads((f.metadata() or {}).get('scalars', '[]')))
+                return _unflatten({
+                    key: f.get_tensor(key).reshape(()) if key in scalars else f.get_tensor(key)
+                    for key in f.keys()
+                })
+
+        if path.suffix == '.npz':
+            with np.load(path, allow_pickle=False) as data:
+                return _unflatten({key: data[key] for key in data.files})
+
+        return torch.load(path, map_location='cpu')
+
+    def save(self, voice_id: str, characteristics: Dict[str, Any], format: str = '.safetensors') -> Path:
+        """Write characteristics in a compact format, e.g. to migrate a .pth voice."""
+        if format == '.safetensors' and save_safetensors is None:
+            format = '.npz'
+
+        self.voices_dir.mkdir(parents=True, exist_ok=True)
+        path = self.voices_dir / f"{voice_id}{format}"
+        flat = _flatten(characteristics)
+
+        if format == '.safetensors':
+            save_safetensors(
+                {key: np.ascontiguousarray(value) for key, value in flat.items()},
+                str(path),
+                metadata={'scalars': json.dumps([key for key, value in flat.items() if value.ndim == 0])}
+            )
+        elif format == '.npz':
+            np.savez(path, **flat)
+        else:
+            raise ValueError(f"Unsupported voice format: {format}")
+
+        return path
+
+    def preload(self, voice_ids: Optional[List[str]] = None, top_n: int = 20) -> List[str]:
+        """
+        Load voices into the cache ahead of requests.
+
+        Args:
+            voice_ids: Voices to load; defaults to the most used voices
+                recorded by save_popularity
+            top_n: How many popular voices to load when voice_ids is omitted
+
+        Returns:
+            The voice ids that were loaded
+        """
+        if voice_ids is None:
+            voice_ids = [voice_id for voice_id, _ in self._load_popularity().most_common(top_n)]
+
+        loaded = []
+        for voice_id in voice_ids:
+            try:
+                if self.get(voice_id) is not None:
+                    loaded.append(voice_id)
+            except Exception as e:
+                print(f"Error preloading voice {voice_id}: {str(e)}")
+
+        return loaded
+
+    def _popularity_path(self) -> Path:
+        return self.voices_dir / 'popularity.json'
+
+    def _load_popularity(self) -> Counter:
+        try:
+            return Counter(json.loads(self._popularity_path().read_text()))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return Counter()
+
+    def save_popularity(self) -> None:
+        """Add this process's usage counts to the popularity file used by preload."""
+        with self._lock:
+            usage = Counter(self.usage)
+            self.usage.clear()
+
+        counts = self._load_popularity() + usage
+        self.voices_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._popularity_path().with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(counts))
+        os.replace(tmp_path, self._popularity_path())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'entries': len(self.entries),
+            'bytes': self.bytes
+        }
+
+# Create singleton instance
+voice_store = VoiceStore(
+    voices_dir=os.getenv('VOICES_DIR', 'voices'),
+    max_bytes=int(os.getenv('VOICE_CACHE_MAX_MB', '64')) * 1024 * 1024
+)
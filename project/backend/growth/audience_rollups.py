@@ -0,0 +1,426 @@
+import io
+import os
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+import numpy as np
+
+AGE_EDGES = np.array([18, 25, 35, 45])
+AGE_GROUPS = ['<18', '18-24', '25-34', '35-44', '45+']
+DEVICES = ['mobile', 'desktop', 'tablet', 'other']
+INTERACTIONS = ['likes', 'comments', 'shares']
+INTERACTION_RATIOS = ['likes_ratio', 'comment_ratio', 'share_ratio']
+
+# Day value of the running-total rollup
+TOTAL = -1
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audience_rollups (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (scope, key, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_audience_rollups_day ON audience_rollups (day);
+"""
+
+class CountMinSketch:
+    def __init__(self, width: int = 1024, depth: int = 4, top_k: int = 32, exact_limit: int = 64):
+        """
+        Approximate counts for high-cardinality keys such as locations.
+
+        Counts are kept exactly in a dict until more than exact_limit distinct
+        keys arrive; only then is the counter table allocated. Most per-day
+        windows never get that far.
+
+        Args:
+            width: Counters per row; error is about total / width
+            depth: Independent hash rows; more rows lower the chance of a bad estimate
+            top_k: Heaviest keys remembered so breakdowns can name them
+            exact_limit: Distinct keys counted exactly before switching to the sketch
+        """
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.exact_limit = exact_limit
+        self.table: Optional[np.ndarray] = None
+        self.exact: Optional[Dict[str, int]] = {}
+        self.total = 0
+        self.candidates: Dict[str, int] = {}
+
+    def _columns(self, key: str) -> np.ndarray:
+        data = key.encode()
+        # crc32 seeded per row is stable across processes and shards
+        return np.array([zlib.crc32(data, seed) % self.width for seed in range(self.depth)])
+
+    def _spill(self) -> None:
+        """Move exact counts into a newly allocated counter table."""
+        exact, self.exact = self.exact, None
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        for key, count in exact.items():
+            self.table[np.arange(self.depth), self._columns(key)] += count
+        for key in exact:
+            self._track(key, self.estimate(key))
+
+    def add(self, key: str, count: int = 1) -> None:
+        self.total += count
+        if self.exact is not None:
+            self.exact[key] = self.exact.get(key, 0) + count
+            if len(self.exact) > self.exact_limit:
+                self._spill()
+            return
+
+        self.table[np.arange(self.depth), self._columns(key)] += count
+        self._track(key, self.estimate(key))
+
+    def estimate(self, key: str) -> int:
+        if self.exact is not None:
+            return self.exact.get(key, 0)
+        return int(self.table[np.arange(self.depth), self._columns(key)].min())
+
+    def _track(self, key: str, estimate: int) -> None:
+        """Keep the top_k heaviest keys seen so far."""
+        self.candidates[key] = estimate
+        if len(self.candidates) > self.top_k:
+            del self.candidates[min(self.candidates, key=self.candidates.get)]
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge sketches of different shapes")
+
+        if other.exact is not None:
+            for key, count in other.exact.items():
+                self.add(key, count)
+            return
+
+        if self.exact is not None:
+            self._spill()
+        self.table += other.table
+        self.total += other.total
+
+        # Re-estimate the union of candidates against the merged counters
+        keys = set(self.candidates) | set(other.candidates)
+        self.candidates = {}
+        for key in keys:
+            self._track(key, self.estimate(key))
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        if self.exact is not None:
+            return sorted(self.exact.items(), key=lambda item: -item[1])[:k]
+        # Stored estimates can be stale once other keys were added; refresh them
+        current = [(key, self.estimate(key)) for key in self.candidates]
+        return sorted(current, key=lambda item: -item[1])[:k]
+
+class AudienceRollup:
+    def __init__(self, location_width: int = 1024, location_depth: int = 4):
+        # Every field is a counter, so two rollups merge by adding them
+        self.views = 0
+        self.ages = np.zeros(len(AGE_GROUPS), dtype=np.int64)
+        self.devices = np.zeros(len(DEVICES), dtype=np.int64)
+        self.hour_views = np.zeros(24, dtype=np.int64)
+        self.hour_interactions = np.zeros(24, dtype=np.int64)
+        self.interactions = np.zeros(len(INTERACTIONS), dtype=np.int64)
+        self.locations = CountMinSketch(location_width, location_depth)
+
+    def add_events(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Fold a batch of view events into the histograms in one vectorized pass.
+
+        Args:
+            events: View events with optional age, device, location, hour
+                and likes/comments/shares counts
+        """
+        count = len(events)
+        if not count:
+            return
+
+        ages = np.fromiter((e.get('age', -1) or -1 for e in events), dtype=np.int64, count=count)
+        known = ages >= 0
+        self.ages += np.bincount(np.searchsorted(AGE_EDGES, ages[known], side='right'), minlength=len(AGE_GROUPS))
+
+        device_codes = {name: code for code, name in enumerate(DEVICES)}
+        devices = np.fromiter(
+            (device_codes.get(e.get('device'), len(DEVICES) - 1) for e in events),
+            dtype=np.int64,
+            count=count
+        )
+        self.devices += np.bincount(devices, minlength=len(DEVICES))
+
+        hours = np.fromiter((e.get('hour', 0) for e in events), dtype=np.int64, count=count) % 24
+        interactions = np.stack([
+            np.fromiter((e.get(name, 0) for e in events), dtype=np.int64, count=count)
+            for name in INTERACTIONS
+        ])
+        self.hour_views += np.bincount(hours, minlength=24)
+        self.hour_interactions += np.bincount(hours, weights=interactions.sum(axis=0), minlength=24).astype(np.int64)
+        self.interactions += interactions.sum(axis=1)
+
+        # One sketch update per distinct location rather than per event
+        locations, counts = np.unique(
+            np.array([e.get('location') or 'Other' for e in events], dtype=object),
+            return_counts=True
+        )
+        for location, n in zip(locations.tolist(), counts.tolist()):
+            self.locations.add(location, n)
+
+        self.views += count
+
+    def merge(self, other: 'AudienceRollup') -> 'AudienceRollup':
+        """Add another rollup (another shard or time window) into this one."""
+        self.views += other.views
+        self.ages += other.ages
+        self.devices += other.devices
+        self.hour_views += other.hour_views
+        self.hour_interactions += other.hour_interactions
+        self.interactions += other.interactions
+        self.locations.merge(other.locations)
+        return self
+
+    def insights(self, top_locations: int = 3, peak_hours: int = 3) -> Dict[str, Any]:
+        """Audience breakdown in the shape returned by analyze_audience_insights."""
+        views = max(self.views, 1)
+        age_total = max(int(self.ages.sum()), 1)
+
+        # 'Other' is where events without a location are counted; it is
+        # reported as everything outside the named top locations instead
+        named = [(key, count) for key, count in self.locations.top(top_locations + 1) if key != 'Other']
+        locations = {key: count / views for key, count in named[:top_locations]}
+        named_views = sum(count for _, count in named[:top_locations])
+        locations['Other'] = max(self.views - named_views, 0) / views
+
+        # Engagement per view for each hour, scaled so the best hour is 1.0
+        rate = self.hour_interactions / np.maximum(self.hour_views, 1)
+        best = rate.max() or 1.0
+        # Hours nobody watched in are never peaks, however few hours had views
+        watched = np.flatnonzero(self.hour_views > 0)
+        peaks = sorted(watched[np.argsort(-self.hour_views[watched], kind='stable')][:peak_hours].tolist())
+
+        return {
+            'demographics': {
+                'age_groups': dict(zip(AGE_GROUPS, (self.ages / age_total).tolist())),
+                'locations': locations,
+                'devices': dict(zip(DEVICES, (self.devices / views).tolist()))
+            },
+            'behavior': {
+                'peak_viewing_times': [
+                    {'hour': hour, 'engagement': float(rate[hour] / best)}
+                    for hour in peaks
+                ],
+                'interaction_patterns': {
+                    name: float(total / views)
+                    for name, total in zip(INTERACTION_RATIOS, self.interactions.tolist())
+                }
+            },
+            'views': self.views
+        }
+
+    def to_bytes(self) -> bytes:
+        """Serialize for storage or shipping between shards."""
+        sketch = self.locations
+        # Exact counts while the sketch is unallocated, otherwise the top-k candidates
+        keys = sketch.exact if sketch.exact is not None else sketch.candidates
+        arrays = {
+            'counters': np.concatenate([[self.views, sketch.total], self.ages, self.devices,
+                                        self.hour_views, self.hour_interactions, self.interactions]),
+            'shape': np.array([sketch.depth, sketch.width]),
+            'keys': np.array(list(keys), dtype=str),
+            'counts': np.array(list(keys.values()), dtype=np.int64)
+        }
+        if sketch.table is not None:
+            arrays['sketch'] = sketch.table
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'AudienceRollup':
+        arrays = np.load(io.BytesIO(data))
+        depth, width = arrays['shape'].tolist()
+        rollup = cls(width, depth)
+
+        counters = arrays['counters']
+        rollup.views, rollup.locations.total = int(counters[0]), int(counters[1])
+        offset = 2
+        for name, size in (('ages', len(AGE_GROUPS)), ('devices', len(DEVICES)), ('hour_views', 24),
+                           ('hour_interactions', 24), ('interactions', len(INTERACTIONS))):
+            setattr(rollup, name, counters[offset:offset + size].copy())
+            offset += size
+
+        keys = dict(zip(arrays['keys'].tolist(), arrays['counts'].tolist()))
+        if 'sketch' in arrays.files:
+            rollup.locations.table = arrays['sketch'].copy()
+            rollup.locations.exact = None
+            rollup.locations.candidates = keys
+        else:
+            rollup.locations.exact = keys
+        return rollup
+
+class RollupEngine:
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        retention_days: int = 90,
+        max_cached: int = 4096,
+        location_width: int = 1024,
+        location_depth: int = 4
+    ):
+        """
+        Maintains audience rollups per content item and per vertical, both as
+        running totals and per-day windows, updated as view events arrive.
+
+        Args:
+            db_path: SQLite database the rollups are written through to; kept
+                only in memory when omitted (e.g. for a shard's partial rollups)
+            retention_days: Day windows older than this are dropped; running
+                totals are kept
+            max_cached: Rollups held in memory when backed by db_path
+            location_width: Count-min sketch width for locations
+            location_depth: Count-min sketch depth for locations
+        """
+        self.retention_days = retention_days
+        self.max_cached = max_cached
+        self.location_width = location_width
+        self.location_depth = location_depth
+        self.rollups: "OrderedDict[Tuple[str, str, int], AudienceRollup]" = OrderedDict()
+        self._pruned_day: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(ROLLUP_SCHEMA)
+
+    def _new(self) -> AudienceRollup:
+        return AudienceRollup(self.location_width, self.location_depth)
+
+    def _lookup(self, key: Tuple[str, str, int]) -> Optional[AudienceRollup]:
+        rollup = self.rollups.get(key)
+        if rollup is not None:
+            self.rollups.move_to_end(key)
+            return rollup
+
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute(
+            "SELECT data FROM audience_rollups WHERE scope = ? AND key = ? AND day = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+
+        rollup = AudienceRollup.from_bytes(row[0])
+        self._cache(key, rollup)
+        return rollup
+
+    def _cache(self, key: Tuple[str, str, int], rollup: AudienceRollup) -> None:
+        self.rollups[key] = rollup
+        self.rollups.move_to_end(key)
+        # Writes go straight to the database, so eviction only drops the in-memory copy
+        if self._conn is not None:
+            while len(self.rollups) > self.max_cached:
+                self.rollups.popitem(last=False)
+
+    def _merge_into(self, updates: List[Tuple[Tuple[str, str, int], AudienceRollup]]) -> None:
+        """Merge partial rollups into the stored ones and persist them in one transaction."""
+        rows = []
+        for key, partial in updates:
+            rollup = self._lookup(key)
+            if rollup is None:
+                rollup = self._new()
+            rollup.merge(partial)
+            self._cache(key, rollup)
+            if self._conn is not None:
+                rows.append(key + (rollup.to_bytes(),))
+
+        if self._conn is None:
+            return
+
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO audience_rollups (scope, key, day, data) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            # The cached copies already include this batch; reload them from disk
+            for key, _ in updates:
+                self.rollups.pop(key, None)
+            raise
+
+    def _prune(self, today: int) -> None:
+        """Drop day windows that fell out of retention, once per day."""
+        if self._pruned_day == today:
+            return
+
+        # Keep the last retention_days days, today included
+        cutoff = today - self.retention_days + 1
+        for key in [key for key in self.rollups if TOTAL < key[2] < cutoff]:
+            del self.rollups[key]
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM audience_rollups WHERE day > ? AND day < ?", (TOTAL, cutoff))
+
+        self._pruned_day = today
+
+    def add_events(self, content_id: str, events: List[Dict[str, Any]], vertical: Optional[str] = None, day: Optional[int] = None) -> None:
+        """
+        Record a batch of view events.
+
+        Args:
+            content_id: Content the events belong to
+            events: View event dicts
+            vertical: Content vertical, also rolled up when given
+            day: Day number (epoch seconds // 86400) of the events' window
+        """
+        batch = self._new()
+        batch.add_events(events)
+
+        # Aggregate once, then merge the small batch rollup into every scope
+        scopes = [('content', content_id)] + ([('vertical', vertical)] if vertical else [])
+        updates = []
+        for scope in scopes:
+            updates.append((scope + (TOTAL,), batch))
+            if day is not None:
+                updates.append((scope + (day,), batch))
+
+        with self._lock:
+            self._merge_into(updates)
+            if day is not None:
+                self._prune(day)
+
+    def get(self, scope: str, key: str, days: Optional[Iterable[int]] = None) -> AudienceRollup:
+        """
+        Rollup for a content item or vertical.
+
+        Args:
+            scope: 'content' or 'vertical'
+            key: Content id or vertical name
+            days: Day numbers to merge; the running total when omitted. Days
+                older than retention_days have been dropped.
+        """
+        merged = self._new()
+        with self._lock:
+            for day in ([TOTAL] if days is None else days):
+                rollup = self._lookup((scope, key, day))
+                if rollup is not None:
+                    merged.merge(rollup)
+        return merged
+
+    def merge(self, other: 'RollupEngine') -> None:
+        """Fold in another shard's rollups."""
+        with self._lock:
+            # Skip windows this engine has already dropped
+            cutoff = self._pruned_day - self.retention_days + 1 if self._pruned_day is not None else TOTAL
+            self._merge_into([
+                (key, rollup) for key, rollup in other.rollups.items()
+                if not TOTAL < key[2] < cutoff
+            ])
@@ -0,0 +1,331 @@
+import os
+import json
+import heapq
+import shutil
+import asyncio
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from pathlib import Path
+
+class AdPlatform:
+    name = 'base'
+    max_batch_size = 10000
+
+    async def create_audience(self, segment_name: str) -> str:
+        raise NotImplementedError
+
+    async def add_members(self, audience_id: str, hashes: List[str]) -> None:
+        raise NotImplementedError
+
+    async def remove_members(self, audience_id: str, hashes: List[str]) -> None:
+        raise NotImplementedError
+
+class FacebookAudiences(AdPlatform):
+    name = 'facebook'
+    max_batch_size = 10000  # users per Custom Audience /users request
+
+    def __init__(self):
+        self.access_token = os.getenv('FACEBOOK_ACCESS_TOKEN')
+
+    async def create_audience(self, segment_name: str) -> str:
+        # In production, this would use the Facebook Marketing API
+        return f"fb_audience_{segment_name}"
+
+    async def add_members(self, audience_id: str, hashes: List[str]) -> None:
+        # In production: POST /{audience_id}/users with an EMAIL_SHA256 payload
+        pass
+
+    async def remove_members(self, audience_id: str, hashes: List[str]) -> None:
+        # In production: DELETE /{audience_id}/users with an EMAIL_SHA256 payload
+        pass
+
+class GoogleAudiences(AdPlatform):
+    name = 'google'
+    max_batch_size = 10000  # operations per offline user data job request
+
+    def __init__(self):
+        self.developer_token = os.getenv('GOOGLE_ADS_DEVELOPER_TOKEN')
+
+    async def create_audience(self, segment_name: str) -> str:
+        # In production, this would use the Google Ads API
+        return f"google_audience_{segment_name}"
+
+    async def add_members(self, audience_id: str, hashes: List[str]) -> None:
+        # In production: add operations on an OfflineUserDataJob
+        pass
+
+    async def remove_members(self, audience_id: str, hashes: List[str]) -> None:
+        # In production: remove operations on an OfflineUserDataJob
+        pass
+
+class AudienceSyncEngine:
+    def __init__(
+        self,
+        platforms: List[AdPlatform],
+        state_dir: str = 'data/audience_sync',
+        hash_workers: int = None,
+        hash_chunk_size: int = 50000
+    ):
+        self.platforms = platforms
+        self.state_dir = Path(state_dir)
+        self.hash_workers = hash_workers or os.cpu_count() or 4
+        self.hash_chunk_size = hash_chunk_size
+
+    def hash_identifiers(self, identifiers: Iterable[str]) -> List[str]:
+        """Normalise and SHA-256 identifiers in chunks spread over a thread pool."""
+        identifiers = list(identifiers)
+        chunks = [
+            identifiers[i:i + self.hash_chunk_size]
+            for i in range(0, len(identifiers), self.hash_chunk_size)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as pool:
+            hashed = pool.map(self._hash_chunk, chunks)
+
+        return [h for chunk in hashed for h in chunk]
+
+    @staticmethod
+    def _hash_chunk(identifiers: List[str]) -> List[str]:
+        # Ad platforms match on trimmed, lowercased identifiers
+        sha256 = hashlib.sha256
+        return [sha256(str(i).strip().lower().encode()).hexdigest() for i in identifiers]
+
+    async def sync(
+        self,
+        segments: Dict[str, Iterable[str]],
+        audience_key: Optional[str] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Sync segment membership to every platform concurrently.
+
+        Args:
+            segments: Segment name -> raw identifiers (emails or viewer ids)
+            audience_key: What the segments belong to, e.g. a content id; each
+                key gets its own audiences and membership state
+
+        Returns:
+            Dict mapping segment name to {platform: audience_id}
+        """
+        # Hash once per segment; every platform gets the same digests
+        hashed = {}
+        for segment, identifiers in segments.items():
+            hashed[segment] = set(await asyncio.to_thread(self.hash_identifiers, identifiers))
+
+        jobs = [
+            (segment, platform)
+            for segment in hashed
+            for platform in self.platforms
+        ]
+        audience_ids = await asyncio.gather(*(
+            self._sync_audience(platform, self._audience_name(audience_key, segment), hashed[segment])
+            for segment, platform in jobs
+        ))
+
+        results: Dict[str, Dict[str, str]] = {segment: {} for segment in hashed}
+        for (segment, platform), audience_id in zip(jobs, audience_ids):
+            results[segment][platform.name] = audience_id
+
+        return results
+
+    async def sync_files(
+        self,
+        segment_files: Dict[str, Path],
+        audience_key: Optional[str] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Sync segments too large for memory from files of raw identifiers.
+
+        Identifiers are hashed chunk by chunk into sorted runs on disk and
+        merged into one sorted, de-duplicated file. Each platform's previous
+        membership file is sorted too, so the diff is a streaming merge of
+        the two, uploaded one batch at a time. Memory stays at about one
+        chunk regardless of segment size.
+
+        Args:
+            segment_files: Segment name -> file with one identifier per line
+            audience_key: As in sync()
+
+        Returns:
+            Dict mapping segment name to {platform: audience_id}
+        """
+        results: Dict[str, Dict[str, str]] = {}
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+        for segment, path in segment_files.items():
+            members_path = await asyncio.to_thread(self._sorted_hashes, Path(path))
+            try:
+                audience_ids = await asyncio.gather(*(
+                    self._sync_audience_file(platform, self._audience_name(audience_key, segment), members_path)
+                    for platform in self.platforms
+                ))
+            finally:
+                members_path.unlink(missing_ok=True)
+            results[segment] = {platform.name: audience_id for platform, audience_id in zip(self.platforms, audience_ids)}
+
+        return results
+
+    def _sorted_hashes(self, path: Path) -> Path:
+        """External sort: hash a file of identifiers into a sorted, unique file of digests."""
+        run_dir = Path(tempfile.mkdtemp(prefix='runs.', dir=self.state_dir))
+        try:
+            runs = []
+            with open(path) as f:
+                lines = (line.strip() for line in f)
+                identifiers = (line for line in lines if line)
+                while True:
+                    chunk = list(islice(identifiers, self.hash_chunk_size))
+                    if not chunk:
+                        break
+                    run_path = run_dir / f"{len(runs)}.run"
+                    run_path.write_text(''.join(f"{h}\n" for h in sorted(set(self._hash_chunk(chunk)))))
+                    runs.append(run_path)
+
+            fd, output = tempfile.mkstemp(suffix='.members', dir=self.state_dir)
+            with os.fdopen(fd, 'w') as out:
+                files = [open(run_path) for run_path in runs]
+                try:
+                    previous = None
+                    for line in heapq.merge(*files):
+                        if line != previous:
+                            out.write(line)
+                            previous = line
+                finally:
+                    for run_file in files:
+                        run_file.close()
+            return Path(output)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    @staticmethod
+    def _read_sorted(path: Path) -> Iterator[str]:
+        try:
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield line
+        except FileNotFoundError:
+            return
+
+    def _diff_batches(self, previous_path: Path, members_path: Path, size: int) -> Iterator[Tuple[List[str], List[str], int]]:
+        """
+        Merge two sorted digest files, yielding (added, removed, members seen) batches.
+
+        A batch is yielded whenever either list reaches size, plus once at the end.
+        """
+        previous, current = self._read_sorted(previous_path), self._read_sorted(members_path)
+        old, new = next(previous, None), next(current, None)
+        added, removed, count = [], [], 0
+
+        while old is not None or new is not None:
+            if old is None or (new is not None and new < old):
+                added.append(new)
+                count += 1
+                new = next(current, None)
+            elif new is None or old < new:
+                removed.append(old)
+                old = next(previous, None)
+            else:
+                count += 1
+                old, new = next(previous, None), next(current, None)
+
+            if len(added) >= size or len(removed) >= size:
+                yield added, removed, count
+                added, removed = [], []
+
+        yield added, removed, count
+
+    async def _sync_audience_file(self, platform: AdPlatform, audience_name: str, members_path: Path) -> str:
+        """Stream only membership changes since the last successful sync of this audience."""
+        meta_path, previous_path = self._state_paths(platform.name, audience_name)
+        try:
+            audience_id = json.loads(meta_path.read_text()).get('audience_id')
+        except (FileNotFoundError, json.JSONDecodeError):
+            audience_id = None
+        if audience_id is None:
+            audience_id = await platform.create_audience(audience_name)
+
+        batches = self._diff_batches(previous_path, members_path, platform.max_batch_size)
+        count = 0
+        try:
+            while True:
+                # File reads happen off the event loop, one batch at a time
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                added, removed, count = batch
+                await asyncio.gather(
+                    *([platform.add_members(audience_id, added)] if added else []),
+                    *([platform.remove_members(audience_id, removed)] if removed else [])
+                )
+        finally:
+            batches.close()
+
+        # As in _save_state: members first, and only after every batch succeeded
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = previous_path.with_suffix('.tmp')
+        await asyncio.to_thread(shutil.copyfile, members_path, tmp_path)
+        os.replace(tmp_path, previous_path)
+        meta_path.write_text(json.dumps({'audience_id': audience_id, 'count': count}))
+
+        return audience_id
+
+    @staticmethod
+    def _audience_name(audience_key: Optional[str], segment: str) -> str:
+        return f"{audience_key}_{segment}" if audience_key else segment
+
+    async def _sync_audience(self, platform: AdPlatform, audience_name: str, members: Set[str]) -> str:
+        """Send only membership changes since the last successful sync of this audience."""
+        state = self._load_state(platform.name, audience_name)
+
+        audience_id = state.get('audience_id')
+        if audience_id is None:
+            audience_id = await platform.create_audience(audience_name)
+
+        previous = state.get('members', set())
+        added = sorted(members - previous)
+        removed = sorted(previous - members)
+
+        await asyncio.gather(
+            *(platform.add_members(audience_id, batch) for batch in self._batches(added, platform.max_batch_size)),
+            *(platform.remove_members(audience_id, batch) for batch in self._batches(removed, platform.max_batch_size))
+        )
+
+        # Persist only after every batch succeeded, so a failed sync is retried in full
+        self._save_state(platform.name, audience_name, audience_id, members)
+
+        return audience_id
+
+    def _batches(self, items: List[str], size: int) -> List[List[str]]:
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    def _state_paths(self, platform: str, audience_name: str):
+        base = self.state_dir / platform
+        return base / f"{audience_name}.json", base / f"{audience_name}.members"
+
+    def _load_state(self, platform: str, audience_name: str) -> Dict[str, Any]:
+        meta_path, members_path = self._state_paths(platform, audience_name)
+        try:
+            state = json.loads(meta_path.read_text())
+            state['members'] = set(members_path.read_text().split())
+            return state
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, platform: str, audience_name: str, audience_id: str, members: Set[str]) -> None:
+        meta_path, members_path = self._state_paths(platform, audience_name)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Members first: a crash in between leaves a complete list and stale
+        # metadata, which only causes a redundant diff next time
+        tmp_path = members_path.with_suffix('.tmp')
+        tmp_path.write_text('\n'.join(sorted(members)))
+        os.replace(tmp_path, members_path)
+
+        meta_path.write_text(json.dumps({'audience_id': audience_id, 'count': len(members)}))
+
+# Create singleton instance
+audience_sync = AudienceSyncEngine([FacebookAudiences(), GoogleAudiences()])
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, LEASED, SENT, FAILED = 0, 1, 2, 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_sends (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    template TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    status INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (recipient, segment, template)
+);
+CREATE INDEX IF NOT EXISTS idx_email_sends_due ON email_sends (status, due_at);
+"""
+
+class EmailSender:
+    async def send_batch(self, sends: List[Dict[str, Any]]) -> None:
+        """Send a batch of emails; raise to have the whole batch retried."""
+        raise NotImplementedError
+
+class LocalSender(EmailSender):
+    def __init__(self, outbox_path: str = '.cache/email_outbox.jsonl'):
+        self.outbox_path = outbox_path
+
+    async def send_batch(self, sends: List[Dict[str, Any]]) -> None:
+        # Append to a local outbox instead of emailing anyone
+        os.makedirs(os.path.dirname(self.outbox_path) or '.', exist_ok=True)
+        with open(self.outbox_path, 'a') as f:
+            for send in sends:
+                f.write(json.dumps({**send, 'sent_at': time.time()}) + '\n')
+
+SENDERS = {
+    'local': LocalSender
+}
+
+def create_sender(name: str) -> EmailSender:
+    """
+    Build the sender named by EMAIL_SENDER.
+
+    Raises:
+        ValueError: For senders that don't exist or can't deliver yet, so a
+            misconfigured deployment fails at startup instead of burning
+            every queued send's retries
+    """
+    if name not in SENDERS:
+        raise ValueError(
+            f"Unsupported EMAIL_SENDER {name!r}; available: {', '.join(sorted(SENDERS))}. "
+            "Mailchimp delivery is not implemented."
+        )
+    return SENDERS[name]()
+
+class EmailScheduler:
+    def __init__(
+        self,
+        db_path: str = '.cache/email_schedule.db',
+        sender: Optional[EmailSender] = None,
+        batch_size: int = 500,
+        lease_seconds: float = 300,
+        max_attempts: int = 5,
+        retry_delay: float = 60
+    ):
+        """
+        Args:
+            db_path: SQLite file holding the pending sends
+            sender: Delivers due batches; defaults to a LocalSender
+            batch_size: Sends claimed and delivered per batch
+            lease_seconds: How long a claimed batch may take before it is
+                handed out again, e.g. after a crash
+            max_attempts: Deliveries tried before a send is marked failed
+            retry_delay: Base delay before retrying a failed batch
+        """
+        self.sender = sender or LocalSender()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        # Autocommit mode so claims can take an explicit write lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def schedule(self, sends: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queue sends for delivery.
+
+        Args:
+            sends: Dicts with recipient, segment, template, subject and due_at
+                (epoch seconds). A send already queued for the same recipient,
+                segment and template is left as is.
+
+        Returns:
+            Number of sends newly queued
+        """
+        rows = (
+            (s['recipient'], s['segment'], s['template'], s['subject'], s['due_at'])
+            for s in sends
+        )
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO email_sends (recipient, segment, template, subject, due_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            return self._conn.total_changes - before
+
+    def claim_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Lease the earliest due sends, including any whose lease has expired.
+
+        An expired lease means the worker died mid-batch, so it counts as a
+        failed attempt; sends that run out of attempts this way are marked
+        failed instead of being handed out again.
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, recipient, segment, template, subject, due_at, attempts, status FROM email_sends "
+                    "WHERE status = ? AND due_at <= ? "
+                    "UNION ALL "
+                    "SELECT id, recipient, segment, template, subject, due_at, attempts, status FROM email_sends "
+                    "WHERE status = ? AND lease_until <= ? "
+                    "ORDER BY due_at LIMIT ?",
+                    (PENDING, now, LEASED, now, self.batch_size)
+                ).fetchall()
+
+                claimed, updates = [], []
+                for *send, status in rows:
+                    attempts = send[6] + (1 if status == LEASED else 0)
+                    if attempts >= self.max_attempts:
+                        updates.append((FAILED, 0, attempts, send[0]))
+                        continue
+                    send[6] = attempts
+                    claimed.append(send)
+                    updates.append((LEASED, now + self.lease_seconds, attempts, send[0]))
+
+                self._conn.executemany(
+                    "UPDATE email_sends SET status = ?, lease_until = ?, attempts = ? WHERE id = ?",
+                    updates
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+        columns = ('id', 'recipient', 'segment', 'template', 'subject', 'due_at', 'attempts')
+        return [dict(zip(columns, send)) for send in claimed]
+
+    def _complete(self, sends: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.executemany(
+                "UPDATE email_sends SET status = ? WHERE id = ?",
+                [(SENT, send['id']) for send in sends]
+            )
+            self._conn.execute('COMMIT')
+
+    def _retry(self, sends: List[Dict[str, Any]], now: float) -> None:
+        """Push failed sends back with exponential backoff, or give up on them."""
+        updates = []
+        for send in sends:
+            attempts = send['attempts'] + 1
+            if attempts >= self.max_attempts:
+                updates.append((FAILED, send['due_at'], attempts, send['id']))
+            else:
+                updates.append((PENDING, now + self.retry_delay * 2 ** (attempts - 1), attempts, send['id']))
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.executemany(
+                "UPDATE email_sends SET status = ?, due_at = ?, attempts = ? WHERE id = ?",
+                updates
+            )
+            self._conn.execute('COMMIT')
+
+    async def dispatch_due(self, now: Optional[float] = None) -> int:
+        """
+        Deliver every send that is due, one batch at a time.
+
+        Returns:
+            Number of sends delivered
+        """
+        delivered = 0
+
+        while True:
+            batch = self.claim_due(now)
+            if not batch:
+                return delivered
+
+            try:
+                await self.sender.send_batch(batch)
+            except Exception as e:
+                logger.warning(f"Error sending email batch of {len(batch)}: {str(e)}")
+                self._retry(batch, time.time() if now is None else now)
+                # Leave the rest for the next run rather than hammering a failing sender
+                return delivered
+
+            self._complete(batch)
+            delivered += len(batch)
+
+    def next_due(self) -> Optional[float]:
+        """Time the next send becomes deliverable, or None if nothing is queued."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(t) FROM ("
+                "SELECT MIN(due_at) AS t FROM email_sends WHERE status = ? "
+                "UNION ALL SELECT MIN(lease_until) FROM email_sends WHERE status = ?)",
+                (PENDING, LEASED)
+            ).fetchone()
+        return row[0]
+
+    async def run(self, poll_interval: float = 60) -> None:
+        """Deliver sends as they fall due, forever."""
+        while True:
+            await self.dispatch_due()
+
+            next_due = self.next_due()
+            delay = poll_interval if next_due is None else min(poll_interval, next_due - time.time())
+            await asyncio.sleep(max(delay, 0))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM email_sends GROUP BY status"
+            ).fetchall()
+        counts = dict(rows)
+        return {
+            'pending': counts.get(PENDING, 0),
+            'leased': counts.get(LEASED, 0),
+            'sent': counts.get(SENT, 0),
+            'failed': counts.get(FAILED, 0)
+        }
+
+# Create singleton instance
+email_scheduler = EmailScheduler(
+    db_path=os.getenv('EMAIL_SCHEDULER_DB', '.cache/email_schedule.db'),
+    sender=create_sender(os.getenv('EMAIL_SENDER', 'local')),
+    batch_size=int(os.getenv('EMAIL_BATCH_SIZE', '500'))
+)
@@ -0,0 +1,195 @@
+import re
+import time
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class HashingVectorizer:
+    def __init__(self, dim: int = 4096):
+        self.dim = dim
+
+    def transform(self, text: str) -> np.ndarray:
+        """Embed text as an L2-normalised vector of hashed unigrams and bigrams."""
+        words = TOKEN_PATTERN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dim, dtype=np.float32)
+
+        for feature in features:
+            # crc32 is stable across processes, unlike hash()
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+class LSHIndex:
+    def __init__(self, dim: int, n_tables: int = 8, n_bits: int = 12, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, n_bits, dim)).astype(np.float32)
+        self.bit_weights = 1 << np.arange(n_bits)
+        self.tables: List[Dict[int, set]] = [defaultdict(set) for _ in range(n_tables)]
+
+    def _signatures(self, vector: np.ndarray) -> np.ndarray:
+        """Random-hyperplane signature of a vector in every table."""
+        bits = (self.planes @ vector) > 0
+        return bits.astype(np.int64) @ self.bit_weights
+
+    def add(self, key: str, vector: np.ndarray) -> np.ndarray:
+        signatures = self._signatures(vector)
+        for table, signature in zip(self.tables, signatures):
+            table[int(signature)].add(key)
+        return signatures
+
+    def remove(self, key: str, signatures: np.ndarray) -> None:
+        for table, signature in zip(self.tables, signatures):
+            bucket = table.get(int(signature))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[int(signature)]
+
+    def candidates(self, vector: np.ndarray) -> set:
+        """Keys sharing a bucket with the vector in at least one table."""
+        found = set()
+        for table, signature in zip(self.tables, self._signatures(vector)):
+            found.update(table.get(int(signature), ()))
+        return found
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl: float = 24 * 3600,
+        max_entries: int = 10000,
+        dim: int = 4096
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vectorizer = HashingVectorizer(dim)
+        # Entries keep only their non-zero features; a prompt touches a few
+        # hundred of the dim buckets, so this is ~20x smaller than dense
+        self.index_dtype = np.uint16 if dim <= 1 << 16 else np.uint32
+
+        # One LRU of entries backs both tiers; each namespace gets its own
+        # ANN index so different prompt templates never match each other
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.indexes: Dict[str, LSHIndex] = {}
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            'exact_hits': 0,
+            'semantic_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def _key(self, namespace: str, prompt: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{prompt}".encode()).hexdigest()
+
+    def get(self, namespace: str, prompt: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            namespace: Scope of the lookup (model, system prompt, template)
+            prompt: User prompt text
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        key = self._key(namespace, prompt)
+        now = time.time()
+
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self.metrics['exact_hits'] += 1
+                return entry['response']
+
+            index = self.indexes.get(namespace)
+            if index is not None:
+                match = self._nearest(index, self.vectorizer.transform(prompt), now)
+                if match is not None:
+                    self.metrics['semantic_hits'] += 1
+                    return match['response']
+
+            self.metrics['misses'] += 1
+            return None
+
+    def put(self, namespace: str, prompt: str, response: str) -> None:
+        """Store a response in both tiers."""
+        key = self._key(namespace, prompt)
+        vector = self.vectorizer.transform(prompt)
+
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+
+            index = self.indexes.setdefault(namespace, LSHIndex(self.vectorizer.dim))
+            features = np.flatnonzero(vector).astype(self.index_dtype)
+            self.entries[key] = {
+                'namespace': namespace,
+                'response': response,
+                'features': features,
+                'weights': vector[features],
+                'signatures': index.add(key, vector),
+                'created': time.time()
+            }
+
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.metrics['evictions'] += 1
+
+    def _live_entry(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Get an entry if present and unexpired, refreshing its LRU position."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        if now - entry['created'] > self.ttl:
+            self._remove(key)
+            self.metrics['expirations'] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, index: LSHIndex, vector: np.ndarray, now: float) -> Optional[Dict[str, Any]]:
+        """Best candidate above the similarity threshold, if any."""
+        best, best_score = None, self.similarity_threshold
+        for key in index.candidates(vector):
+            entry = self._live_entry(key, now)
+            if entry is None:
+                continue
+            score = float(entry['weights'] @ vector[entry['features']])
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        self.indexes[entry['namespace']].remove(key, entry['signatures'])
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served by either tier."""
+        hits = self.metrics['exact_hits'] + self.metrics['semantic_hits']
+        total = hits + self.metrics['misses']
+        return hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            feature_bytes = sum(e['features'].nbytes + e['weights'].nbytes for e in self.entries.values())
+        return {
+            **self.metrics,
+            'entries': len(self.entries),
+            'feature_bytes': feature_bytes,
+            'hit_rate': self.hit_rate()
+        }
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import asyncio
+from typing import List, Dict, Any, Optional, Callable
+from openai import AsyncOpenAI
+
+from .llm_cache import LLMResponseCache
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(requests_per_minute, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for a token from the requests-per-minute bucket."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncLLMClient:
+    def __init__(
+        self,
+        model: str = "gpt-4",
+        max_concurrency: int = 10,
+        requests_per_minute: int = 500,
+        client: Optional[AsyncOpenAI] = None,
+        cache: Optional[LLMResponseCache] = None
+    ):
+        self.model = model
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._client = client
+        self._semaphore = None
+        self._limiter = None
+        self.usage = {
+            'requests': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'latency': 0.0
+        }
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # Created on first use so importing the module needs no API key
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        return self._client
+
+    async def chat(
+        self,
+        system: str,
+        prompt: str,
+        namespace: str = '',
+        validate: Optional[Callable[[str], Any]] = None,
+        **kwargs
+    ) -> str:
+        """
+        Send one chat completion under the global concurrency and rate limits.
+
+        Args:
+            system: System prompt
+            prompt: User prompt
+            namespace: Prompt template name; semantic cache matches never cross it
+            validate: Called with the response text before it is cached; raise
+                to reject the response
+            **kwargs: Extra completion parameters (model, response_format, ...)
+
+        Returns:
+            Response text, possibly served from the response cache
+        """
+        cache_namespace = json.dumps(
+            [kwargs.get('model', self.model), system, namespace, kwargs],
+            sort_keys=True,
+            default=str
+        )
+
+        if self.cache is not None:
+            cached = self.cache.get(cache_namespace, prompt)
+            if cached is not None:
+                return cached
+
+        response = await self.complete(
+            [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            **kwargs
+        )
+        content = response.choices[0].message.content
+
+        if validate is not None:
+            validate(content)
+
+        if self.cache is not None:
+            self.cache.put(cache_namespace, prompt, content)
+
+        return content
+
+    async def complete(self, messages: List[Dict[str, Any]], **kwargs) -> Any:
+        """Send a raw chat completion request and record its token usage."""
+        # Limits are created lazily so they bind to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._limiter = RateLimiter(self.requests_per_minute)
+
+        async with self._semaphore:
+            await self._limiter.acquire()
+
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=kwargs.pop('model', self.model),
+                messages=messages,
+                **kwargs
+            )
+            self.usage['latency'] += time.perf_counter() - started
+
+        self.usage['requests'] += 1
+        if response.usage:
+            self.usage['prompt_tokens'] += response.usage.prompt_tokens
+            self.usage['completion_tokens'] += response.usage.completion_tokens
+
+        return response
+
+# Create singleton instance
+llm_client = AsyncLLMClient(
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '10')),
+    requests_per_minute=int(os.getenv('LLM_REQUESTS_PER_MINUTE', '500')),
+    cache=LLMResponseCache(
+        similarity_threshold=float(os.getenv('LLM_CACHE_SIMILARITY', '0.95')),
+        ttl=float(os.getenv('LLM_CACHE_TTL', str(24 * 3600))),
+        max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+    ) if os.getenv('LLM_CACHE_ENABLED', '1') == '1' else None
+)
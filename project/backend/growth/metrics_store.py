@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+SERIES = ('views', 'engagement', 'retention', 'revenue')
+
+DAILY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    content_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    last_ts REAL NOT NULL,
+    views REAL, engagement REAL, retention REAL, revenue REAL,
+    PRIMARY KEY (content_id, day)
+) WITHOUT ROWID;
+"""
+
+class MetricsStore:
+    def __init__(self, db_path: str = '.cache/performance.db'):
+        """
+        Time-series store for content metrics.
+
+        Raw samples go to one table per month (samples_YYYYMM) so old data can
+        be dropped a partition at a time. Every write also upserts a daily
+        rollup holding each series' closing value, which is what trend
+        queries read.
+        """
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(DAILY_SCHEMA)
+        self._lock = threading.Lock()
+        self._partitions = self._load_partitions()
+
+    def _load_partitions(self) -> set:
+        return {
+            row[0] for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'samples_%'"
+            )
+        }
+
+    def _partition(self, ts: float) -> str:
+        """Create the month's raw sample table on first use."""
+        name = 'samples_' + datetime.fromtimestamp(ts, timezone.utc).strftime('%Y%m')
+        if name not in self._partitions:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} ("
+                "content_id TEXT NOT NULL, ts REAL NOT NULL, "
+                "views REAL, engagement REAL, retention REAL, revenue REAL, payload TEXT)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name} ON {name} (content_id, ts)")
+            self._partitions.add(name)
+        return name
+
+    def write(self, rows: Iterable[Tuple[str, float, Dict[str, float], Optional[str]]]) -> int:
+        """
+        Insert samples in a single transaction.
+
+        Args:
+            rows: (content_id, timestamp, {series: value}, payload JSON or None)
+
+        Returns:
+            Number of samples written
+        """
+        samples: Dict[Tuple[int, int], List[tuple]] = {}
+        rollups = []
+
+        for content_id, ts, values, payload in rows:
+            series = tuple(values.get(name) for name in SERIES)
+            moment = datetime.fromtimestamp(ts, timezone.utc)
+            samples.setdefault((moment.year, moment.month), []).append((content_id, ts) + series + (payload,))
+            rollups.append((content_id, moment.date().isoformat(), ts) + series)
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for partition_rows in samples.values():
+                    name = self._partition(partition_rows[0][1])
+                    self._conn.executemany(f"INSERT INTO {name} VALUES (?, ?, ?, ?, ?, ?, ?)", partition_rows)
+
+                # Later samples replace the day's closing values; late-arriving
+                # earlier ones only bump the sample count
+                self._conn.executemany(
+                    "INSERT INTO daily_rollup VALUES (?, ?, 1, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (content_id, day) DO UPDATE SET "
+                    "samples = samples + 1, "
+                    "views = CASE WHEN excluded.last_ts >= last_ts THEN excluded.views ELSE views END, "
+                    "engagement = CASE WHEN excluded.last_ts >= last_ts THEN excluded.engagement ELSE engagement END, "
+                    "retention = CASE WHEN excluded.last_ts >= last_ts THEN excluded.retention ELSE retention END, "
+                    "revenue = CASE WHEN excluded.last_ts >= last_ts THEN excluded.revenue ELSE revenue END, "
+                    "last_ts = MAX(last_ts, excluded.last_ts)",
+                    rollups
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                # Partitions created in this transaction were rolled back too
+                self._partitions = self._load_partitions()
+                raise
+
+        return len(rollups)
+
+    def daily(self, content_id: str, since: float) -> List[Dict[str, Any]]:
+        """Daily closing values for a content item since a timestamp, newest first."""
+        first_day = datetime.fromtimestamp(since, timezone.utc).date().isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, views, engagement, retention, revenue FROM daily_rollup "
+                "WHERE content_id = ? AND day >= ? ORDER BY day DESC",
+                (content_id, first_day)
+            ).fetchall()
+
+        return [dict(zip(('date',) + SERIES, row)) for row in rows]
+
+    def samples(self, content_id: str, since: float, until: float) -> List[Dict[str, Any]]:
+        """Raw samples in a time range, read only from the partitions it spans."""
+        start = datetime.fromtimestamp(since, timezone.utc).strftime('%Y%m')
+        end = datetime.fromtimestamp(until, timezone.utc).strftime('%Y%m')
+
+        rows = []
+        with self._lock:
+            # Writers and drop_before change the partition set under the lock
+            names = sorted(name for name in self._partitions if start <= name[len('samples_'):] <= end)
+            for name in names:
+                rows.extend(self._conn.execute(
+                    f"SELECT ts, views, engagement, retention, revenue, payload FROM {name} "
+                    "WHERE content_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                    (content_id, since, until)
+                ).fetchall())
+
+        return [dict(zip(('timestamp',) + SERIES + ('payload',), row)) for row in rows]
+
+    def drop_before(self, ts: float) -> List[str]:
+        """Drop raw partitions for months entirely before a timestamp; rollups are kept."""
+        cutoff = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y%m')
+        with self._lock:
+            dropped = sorted(name for name in self._partitions if name[len('samples_'):] < cutoff)
+            for name in dropped:
+                self._conn.execute(f"DROP TABLE {name}")
+                self._partitions.discard(name)
+        return dropped
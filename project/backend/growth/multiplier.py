@@ -1,18 +1,45 @@
 import os
 import json
-from typing import List, Dict, Any
-from openai import OpenAI
+import asyncio
+import logging
+from typing import List, Dict, Any, Callable, Awaitable, AsyncIterator
 from pathlib import Path
+from openai import BadRequestError
+
+from .llm_client import llm_client
+from .task_graph import TaskGraph
+from .winner_detection import WinnerDetector
+
+logger = logging.getLogger(__name__)
 
 class ContentMultiplier:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = llm_client
+        self.platforms = {
+            'tiktok': {'max_duration': 60, 'format': 'vertical'},
+            'youtube': {'max_duration': 600, 'format': 'landscape'},
+            'instagram': {'max_duration': 90, 'format': 'square'}
+        }
+        
+        # 'structured' asks for every platform variant in one JSON-schema
+        # response; 'per_platform' sends one request per platform. Structured
+        # requests use the client's model unless STRUCTURED_ADAPTATION_MODEL
+        # names one; a model that rejects json_schema is remembered and gets
+        # per-platform calls from then on
+        self.adaptation_mode = os.getenv('ADAPTATION_MODE', 'structured')
+        self.structured_model = os.getenv('STRUCTURED_ADAPTATION_MODEL') or self.llm.model
+        self.structured_unsupported = set()
+        self.adaptation_stats = {'structured': 0, 'fallback': 0}
+        
         self.performance_thresholds = {
             'views': 10000,
             'engagement_rate': 0.08,
             'completion_rate': 0.60
         }
         
+        # Shares the thresholds dict, so threshold changes apply to batch detection too
+        self.winner_detector = WinnerDetector(self.performance_thresholds)
+        
     async def detect_winners(self, content_metrics: Dict[str, Any]) -> bool:
         """Determine if content meets performance thresholds."""
         return (
@@ -21,10 +48,27 @@ class ContentMultiplier:
             content_metrics['completion_rate'] >= self.performance_thresholds['completion_rate']
         )
     
+    async def multiply_winners(
+        self,
+        batches,
+        load_content: Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Detect winners across batches of columnar metrics and generate their derivatives.
+        
+        Args:
+            batches: Iterable or async iterable of {'ids', 'metrics', 'verticals'} batches
+            load_content: Coroutine returning the content dict for a winner's id
+            
+        Yields:
+            Derivatives for each winner, as soon as they are generated
+        """
+        async for winner in self.winner_detector.stream_winners(batches):
+            content = await load_content(winner['id'])
+            yield await self.generate_derivatives(content)
+    
     async def generate_derivatives(self, content: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate derivative content pieces from winning content."""
-        derivatives = []
-        
         # Define derivative types
         derivative_types = [
             {'type': 'summary', 'format': 'short'},
@@ -34,45 +78,75 @@ class ContentMultiplier:
             {'type': 'highlights', 'format': 'clips'}
         ]
         
+        # All derivatives run concurrently, and each derivative's platform
+        # adaptations start as soon as that derivative's text is ready, so a
+        # winner costs about two round-trips instead of twenty
+        graph = TaskGraph()
+        
         for derivative in derivative_types:
-            # Generate derivative content using GPT-4
-            prompt = self._create_derivative_prompt(content, derivative['type'])
+            derivative_type = derivative['type']
+            prompt = self._create_derivative_prompt(content, derivative_type)
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert content creator."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            graph.add(derivative_type, lambda prompt=prompt, derivative_type=derivative_type: self.llm.chat(
+                "You are an expert content creator.",
+                prompt,
+                namespace=f"derivative:{derivative_type}"
+            ))
             
-            derivative_content = {
+            graph.add(
+                f"{derivative_type}:adaptations",
+                self._create_platform_adaptations,
+                deps=[derivative_type]
+            )
+        
+        results = await graph.run()
+        
+        return [
+            {
                 'original_id': content['id'],
                 'type': derivative['type'],
                 'format': derivative['format'],
-                'content': response.choices[0].message.content,
-                'platform_adaptations': await self._create_platform_adaptations(response.choices[0].message.content)
+                'content': results[derivative['type']],
+                'platform_adaptations': results[f"{derivative['type']}:adaptations"]
             }
-            
-            derivatives.append(derivative_content)
-        
-        return derivatives
+            for derivative in derivative_types
+        ]
     
+    def _rejects_structured_output(self, error: BadRequestError) -> bool:
+        """Whether a 400 is the model refusing response_format rather than this request."""
+        message = str(error).lower()
+        return 'response_format' in message or 'json_schema' in message
+
     async def _create_platform_adaptations(self, content: str) -> Dict[str, Any]:
         """Create platform-specific adaptations of the content."""
-        platforms = {
-            'tiktok': {'max_duration': 60, 'format': 'vertical'},
-            'youtube': {'max_duration': 600, 'format': 'landscape'},
-            'instagram': {'max_duration': 90, 'format': 'square'}
-        }
+        if self.adaptation_mode == 'structured' and self.structured_model not in self.structured_unsupported:
+            try:
+                adaptations = await self._adapt_for_all_platforms(content)
+                self.adaptation_stats['structured'] += 1
+                return adaptations
+            except BadRequestError as e:
+                self.adaptation_stats['fallback'] += 1
+                if self._rejects_structured_output(e):
+                    # A model without structured outputs; don't pay for the rejected request again
+                    self.structured_unsupported.add(self.structured_model)
+                    logger.warning(
+                        f"{self.structured_model} rejected structured adaptation, "
+                        f"using per-platform calls: {str(e)}"
+                    )
+                else:
+                    # Anything else (e.g. the combined prompt is too long) only affects this call
+                    logger.warning(f"Structured adaptation request rejected, falling back for this call: {str(e)}")
+            except (ValueError, KeyError, TypeError) as e:
+                # Unparseable output
+                self.adaptation_stats['fallback'] += 1
+                logger.warning(f"Structured adaptation failed, falling back to per-platform calls: {str(e)}")
         
-        adaptations = {}
+        adaptations = await asyncio.gather(*(
+            self._adapt_for_platform(content, constraints)
+            for constraints in self.platforms.values()
+        ))
         
-        for platform, constraints in platforms.items():
-            adaptation = await self._adapt_for_platform(content, constraints)
-            adaptations[platform] = adaptation
-            
-        return adaptations
+        return dict(zip(self.platforms, adaptations))
     
     async def _adapt_for_platform(self, content: str, constraints: Dict[str, Any]) -> Dict[str, Any]:
         """Adapt content for specific platform requirements."""
@@ -84,20 +158,81 @@ class ContentMultiplier:
         Content: {content}
         """
         
-        response = await self.client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert in platform-specific content adaptation."},
-                {"role": "user", "content": prompt}
-            ]
+        adapted_content = await self.llm.chat(
+            "You are an expert in platform-specific content adaptation.",
+            prompt,
+            namespace=f"adapt:{constraints['format']}:{constraints['max_duration']}"
         )
         
         return {
-            'adapted_content': response.choices[0].message.content,
+            'adapted_content': adapted_content,
             'duration': constraints['max_duration'],
             'format': constraints['format']
         }
     
+    async def _adapt_for_all_platforms(self, content: str) -> Dict[str, Any]:
+        """Adapt content for every platform in a single structured response."""
+        requirements = "\n".join(
+            f"        - {platform}: maximum duration {constraints['max_duration']} seconds, "
+            f"{constraints['format']} format"
+            for platform, constraints in self.platforms.items()
+        )
+        prompt = f"""
+        Adapt this content for each of the following platforms:
+{requirements}
+        
+        Content: {content}
+        """
+        
+        schema = {
+            'type': 'object',
+            'properties': {
+                platform: {
+                    'type': 'object',
+                    'properties': {'adapted_content': {'type': 'string'}},
+                    'required': ['adapted_content'],
+                    'additionalProperties': False
+                }
+                for platform in self.platforms
+            },
+            'required': list(self.platforms),
+            'additionalProperties': False
+        }
+        
+        # Validation runs before the response is cached; any malformed field
+        # raises and triggers the per-platform fallback
+        content = await self.llm.chat(
+            "You are an expert in platform-specific content adaptation.",
+            prompt,
+            namespace='adapt:structured',
+            validate=self._split_structured_adaptations,
+            model=self.structured_model,
+            response_format={
+                'type': 'json_schema',
+                'json_schema': {'name': 'platform_adaptations', 'strict': True, 'schema': schema}
+            }
+        )
+        
+        return self._split_structured_adaptations(content)
+    
+    def _split_structured_adaptations(self, content: str) -> Dict[str, Any]:
+        """Validate a structured adaptation response and split it per platform."""
+        variants = json.loads(content)
+        adaptations = {}
+        
+        for platform, constraints in self.platforms.items():
+            adapted_content = variants[platform]['adapted_content']
+            if not isinstance(adapted_content, str) or not adapted_content.strip():
+                raise ValueError(f"Empty adaptation for {platform}")
+            
+            adaptations[platform] = {
+                'adapted_content': adapted_content,
+                'duration': constraints['max_duration'],
+                'format': constraints['format']
+            }
+        
+        return adaptations
+    
     def _create_derivative_prompt(self, content: Dict[str, Any], derivative_type: str) -> str:
         """Create prompts for different types of derivative content."""
         prompts = {
@@ -1,9 +1,100 @@
 import os
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
+import re
+import time
+from typing import Dict, Any, List, Tuple, Optional, Iterator
+from datetime import datetime
 import json
 from pathlib import Path
 
+import numpy as np
+
+from .metrics_store import MetricsStore
+from .audience_rollups import RollupEngine
+
+# Each rule fires when `score` falls below metrics_thresholds[`threshold`];
+# its position is its bit in batch recommendation flags
+RECOMMENDATION_RULES = [
+    {
+        'type': 'viral_optimization',
+        'priority': 'high',
+        'score': 'viral_potential',
+        'threshold': 'viral_potential',
+        'actions': [
+            'Optimize thumbnail for higher CTR',
+            'Add trending hashtags',
+            'Create shorter, more engaging hooks'
+        ]
+    },
+    {
+        'type': 'engagement_optimization',
+        'priority': 'medium',
+        'score': 'engagement_quality',
+        'threshold': 'engagement_rate',
+        'actions': [
+            'Add clear call-to-actions',
+            'Include questions to encourage comments',
+            'Create response-prompting content'
+        ]
+    },
+    {
+        'type': 'retention_optimization',
+        'priority': 'high',
+        'score': 'audience_retention',
+        'threshold': 'retention_rate',
+        'actions': [
+            'Improve pacing and structure',
+            'Add pattern interrupts',
+            'Create stronger hooks'
+        ]
+    }
+]
+
+def _recommendation(rule: Dict[str, Any]) -> Dict[str, Any]:
+    return {'type': rule['type'], 'priority': rule['priority'], 'actions': list(rule['actions'])}
+
+class BatchScores:
+    def __init__(self, content_ids: np.ndarray, scores: Dict[str, np.ndarray], flags: np.ndarray):
+        """
+        Scores for a batch of content, kept as columns.
+        
+        Per-item dicts are only built when an item is read, so re-scoring a
+        whole catalog costs one vectorized pass until someone looks at it.
+        """
+        self.content_ids = content_ids
+        self.scores = scores
+        self.flags = flags
+    
+    def __len__(self) -> int:
+        return len(self.flags)
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        content_id = self.content_ids[index]
+        return {
+            'content_id': content_id.item() if isinstance(content_id, np.generic) else content_id,
+            'scores': {name: float(values[index]) for name, values in self.scores.items()},
+            'recommendations': self.recommendations(index)
+        }
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+    
+    def recommendations(self, index: int) -> List[Dict[str, Any]]:
+        flags = int(self.flags[index])
+        return [_recommendation(rule) for bit, rule in enumerate(RECOMMENDATION_RULES) if flags >> bit & 1]
+    
+    def flagged(self, recommendation_type: str) -> np.ndarray:
+        """Indices of items that get a given recommendation."""
+        bit = next(i for i, rule in enumerate(RECOMMENDATION_RULES) if rule['type'] == recommendation_type)
+        return np.flatnonzero(self.flags & (1 << bit))
+    
+    def counts(self) -> Dict[str, int]:
+        """How many items get each recommendation."""
+        return {
+            rule['type']: int(np.count_nonzero(self.flags & (1 << bit)))
+            for bit, rule in enumerate(RECOMMENDATION_RULES)
+        }
+
 class PerformanceDatabase:
     def __init__(self):
         self.metrics_thresholds = {
@@ -12,28 +103,67 @@ class PerformanceDatabase:
             'retention_rate': 0.6,
             'conversion_rate': 0.02
         }
+        self.store = MetricsStore(os.getenv('PERFORMANCE_DB_PATH', '.cache/performance.db'))
+        self.audience_rollups = RollupEngine(
+            db_path=os.getenv('PERFORMANCE_DB_PATH', '.cache/performance.db'),
+            retention_days=int(os.getenv('AUDIENCE_WINDOW_DAYS', '90'))
+        )
         
     async def store_content_performance(self, content_id: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Store content performance metrics."""
         try:
-            # Calculate performance scores
-            scores = self._calculate_performance_scores(metrics)
+            now = time.time()
+            performance_data = await self._performance_record(content_id, metrics, now)
             
             # Store in database
-            performance_data = {
-                'content_id': content_id,
-                'metrics': metrics,
-                'scores': scores,
-                'timestamp': datetime.now().isoformat(),
-                'recommendations': await self._generate_recommendations(scores)
-            }
+            self.store.write([self._sample_row(performance_data, now)])
             
-            # In production, this would use your actual database
             return performance_data
             
         except Exception as e:
             raise Exception(f"Error storing performance data: {str(e)}")
     
+    async def store_performance_batch(self, items: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Store metrics for many content items in a single transaction.
+        
+        Args:
+            items: (content_id, metrics) pairs
+            
+        Returns:
+            Number of samples stored
+        """
+        try:
+            now = time.time()
+            records = [await self._performance_record(content_id, metrics, now) for content_id, metrics in items]
+            return self.store.write(self._sample_row(record, now) for record in records)
+            
+        except Exception as e:
+            raise Exception(f"Error storing performance data: {str(e)}")
+    
+    async def _performance_record(self, content_id: str, metrics: Dict[str, Any], ts: float) -> Dict[str, Any]:
+        """Score metrics and build the stored performance record."""
+        # Calculate performance scores
+        scores = self._calculate_performance_scores(metrics)
+        
+        return {
+            'content_id': content_id,
+            'metrics': metrics,
+            'scores': scores,
+            'timestamp': datetime.fromtimestamp(ts).isoformat(),
+            'recommendations': await self._generate_recommendations(scores)
+        }
+    
+    def _sample_row(self, record: Dict[str, Any], ts: float) -> tuple:
+        """Flatten a performance record into a metrics store row."""
+        values = {
+            'views': record['metrics'].get('views'),
+            'engagement': record['scores']['engagement_quality'],
+            'retention': record['scores']['audience_retention'],
+            'revenue': record['metrics'].get('revenue')
+        }
+        return (record['content_id'], ts, values, json.dumps(record['metrics'], default=str))
+    
     def _calculate_performance_scores(self, metrics: Dict[str, Any]) -> Dict[str, float]:
         """Calculate various performance scores from metrics."""
         return {
@@ -82,109 +212,127 @@ class PerformanceDatabase:
     
     async def _generate_recommendations(self, scores: Dict[str, float]) -> List[Dict[str, Any]]:
         """Generate content optimization recommendations."""
-        recommendations = []
-        
-        if scores['viral_potential'] < self.metrics_thresholds['viral_potential']:
-            recommendations.append({
-                'type': 'viral_optimization',
-                'priority': 'high',
-                'actions': [
-                    'Optimize thumbnail for higher CTR',
-                    'Add trending hashtags',
-                    'Create shorter, more engaging hooks'
-                ]
-            })
-            
-        if scores['engagement_quality'] < self.metrics_thresholds['engagement_rate']:
-            recommendations.append({
-                'type': 'engagement_optimization',
-                'priority': 'medium',
-                'actions': [
-                    'Add clear call-to-actions',
-                    'Include questions to encourage comments',
-                    'Create response-prompting content'
-                ]
-            })
-            
-        if scores['audience_retention'] < self.metrics_thresholds['retention_rate']:
-            recommendations.append({
-                'type': 'retention_optimization',
-                'priority': 'high',
-                'actions': [
-                    'Improve pacing and structure',
-                    'Add pattern interrupts',
-                    'Create stronger hooks'
-                ]
-            })
+        return [
+            _recommendation(rule)
+            for rule in RECOMMENDATION_RULES
+            if scores[rule['score']] < self.metrics_thresholds[rule['threshold']]
+        ]
+    
+    def score_batch(self, metrics: Dict[str, Any], content_ids: Optional[List[str]] = None) -> BatchScores:
+        """
+        Score many content items and flag their recommendations in one vectorized pass.
+        
+        Args:
+            metrics: Metric name -> array of values, one entry per item; missing
+                metrics take the same defaults as the per-item scorers
+            content_ids: Ids aligned with the metric arrays (default: positions)
             
-        return recommendations
+        Returns:
+            BatchScores holding score columns and a recommendation bitmask per item
+        """
+        size = len(next(iter(metrics.values())))
+        
+        def column(name: str, default: float) -> np.ndarray:
+            values = metrics.get(name)
+            if values is None:
+                return np.full(size, default, dtype=np.float64)
+            return np.asarray(values, dtype=np.float64)
+        
+        def nonzero(values: np.ndarray) -> np.ndarray:
+            # The per-item scorers would raise; a batch scores such items as if the value were 1
+            return np.where(values == 0, 1.0, values)
+        
+        views = nonzero(column('views', 1))
+        shares = column('shares', 0)
+        
+        engagement_rate = (column('likes', 0) + column('comments', 0) * 2 + shares * 3) / views
+        retention_rate = column('average_watch_time', 0) / nonzero(column('duration', 1))
+        rpm = column('revenue', 0) / (views / 1000)
+        industry_avg_rpm = 2.0  # Example industry average RPM
+        
+        scores = {
+            'viral_potential': np.minimum((shares / views) * column('growth_rate', 0), 1.0),
+            'engagement_quality': np.minimum(engagement_rate / self.metrics_thresholds['engagement_rate'], 1.0),
+            'audience_retention': np.minimum(retention_rate / self.metrics_thresholds['retention_rate'], 1.0),
+            'monetization_potential': np.minimum(rpm / industry_avg_rpm, 1.0)
+        }
+        
+        flags = np.zeros(size, dtype=np.uint8)
+        for bit, rule in enumerate(RECOMMENDATION_RULES):
+            flags |= (scores[rule['score']] < self.metrics_thresholds[rule['threshold']]).astype(np.uint8) << bit
+        
+        ids = np.asarray(content_ids, dtype=object) if content_ids is not None else np.arange(size)
+        return BatchScores(ids, scores, flags)
     
     async def get_performance_trends(self, content_id: str, timeframe: str = '30d') -> Dict[str, Any]:
         """Get performance trends over time."""
-        # In production, this would query your actual database
+        days = self._timeframe_days(timeframe)
+        since = time.time() - (days - 1) * 86400
+        
+        # One indexed range read of the daily rollup, at most `days` rows
+        rows = self.store.daily(content_id, since)
+        
         return {
             'content_id': content_id,
             'timeframe': timeframe,
             'trends': {
-                'views': self._generate_trend_data(),
-                'engagement': self._generate_trend_data(),
-                'retention': self._generate_trend_data(),
-                'revenue': self._generate_trend_data()
+                series: [
+                    {'date': row['date'], 'value': row[series]}
+                    for row in rows if row[series] is not None
+                ]
+                for series in ('views', 'engagement', 'retention', 'revenue')
             }
         }
     
-    def _generate_trend_data(self) -> List[Dict[str, Any]]:
-        """Generate mock trend data for demonstration."""
-        trend_data = []
-        base_value = 1000
-        growth_factor = 1.1
+    def _timeframe_days(self, timeframe: str) -> int:
+        """Parse a timeframe like '30d' or '12w' into days."""
+        match = re.fullmatch(r'(\d+)([dw])', timeframe)
+        if not match:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
         
-        for i in range(30):
-            date = (datetime.now() - timedelta(days=i)).isoformat()
-            value = base_value * (growth_factor ** i)
-            
-            trend_data.append({
-                'date': date,
-                'value': value
-            })
-            
-        return trend_data
+        return int(match.group(1)) * (7 if match.group(2) == 'w' else 1)
+    
+    async def record_view_events(self, content_id: str, events: List[Dict[str, Any]], vertical: str = None) -> None:
+        """
+        Fold view events into the audience rollups as they arrive.
+        
+        Args:
+            content_id: Content the events belong to
+            events: View events with age, device, location, hour and
+                likes/comments/shares fields
+            vertical: Content vertical, rolled up alongside the content
+        """
+        self.audience_rollups.add_events(content_id, events, vertical, day=int(time.time() // 86400))
     
-    async def analyze_audience_insights(self, content_id: str) -> Dict[str, Any]:
-        """Analyze audience behavior and demographics."""
+    async def analyze_audience_insights(self, content_id: str, days: int = None) -> Dict[str, Any]:
+        """
+        Analyze audience behavior and demographics.
+        
+        Args:
+            content_id: Content to analyze
+            days: Only the last N days of events; all time when omitted
+        """
+        window = None
+        if days is not None:
+            today = int(time.time() // 86400)
+            window = range(today - days + 1, today + 1)
+        
+        # Read from the precomputed rollups; no raw events are scanned
         return {
             'content_id': content_id,
-            'demographics': {
-                'age_groups': {
-                    '18-24': 0.3,
-                    '25-34': 0.4,
-                    '35-44': 0.2,
-                    '45+': 0.1
-                },
-                'locations': {
-                    'US': 0.4,
-                    'UK': 0.2,
-                    'CA': 0.15,
-                    'Other': 0.25
-                },
-                'devices': {
-                    'mobile': 0.7,
-                    'desktop': 0.2,
-                    'tablet': 0.1
-                }
-            },
-            'behavior': {
-                'peak_viewing_times': [
-                    {'hour': 9, 'engagement': 0.8},
-                    {'hour': 15, 'engagement': 0.9},
-                    {'hour': 20, 'engagement': 1.0}
-                ],
-                'interaction_patterns': {
-                    'likes_ratio': 0.15,
-                    'comment_ratio': 0.05,
-                    'share_ratio': 0.02
-                }
-            }
+            **self.audience_rollups.get('content', content_id, window).insights()
+        }
+    
+    async def analyze_vertical_insights(self, vertical: str, days: int = None) -> Dict[str, Any]:
+        """Analyze audience behavior across every content item in a vertical."""
+        window = None
+        if days is not None:
+            today = int(time.time() // 86400)
+            window = range(today - days + 1, today + 1)
+        
+        return {
+            'vertical': vertical,
+            **self.audience_rollups.get('vertical', vertical, window).insights()
         }
 
 # Create singleton instance
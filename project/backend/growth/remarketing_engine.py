@@ -1,11 +1,21 @@
 import os
-from typing import List, Dict, Any
+import json
+import time
+import asyncio
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Union
+import numpy as np
 from mailchimp_api_v3 import Client
 from pathlib import Path
 
+from .audience_sync import audience_sync
+from .email_scheduler import email_scheduler
+
 class RemarketingEngine:
     def __init__(self):
         self.mailchimp = Client(api_key=os.getenv('MAILCHIMP_API_KEY'))
+        self.audience_sync = audience_sync
+        self.email_scheduler = email_scheduler
         self.audience_segments = {
             'high_engagement': {'min_watch_time': 0.8, 'min_interactions': 3},
             'moderate_engagement': {'min_watch_time': 0.5, 'min_interactions': 1},
@@ -15,7 +25,7 @@ class RemarketingEngine:
     async def build_audience(self, content_id: str, viewer_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Build remarketing audiences from viewer data."""
         segmented_audiences = self._segment_audience(viewer_data)
-        custom_audiences = await self._create_custom_audiences(segmented_audiences)
+        custom_audiences = await self._create_custom_audiences(segmented_audiences, content_id)
         
         return {
             'content_id': content_id,
@@ -23,19 +33,151 @@ class RemarketingEngine:
             'custom_audiences': custom_audiences
         }
     
+    async def build_audience_streaming(
+        self,
+        content_id: str,
+        viewers: Union[Iterable[Dict[str, Any]], str],
+        output_dir: str = 'data/audiences',
+        chunk_size: int = 100000
+    ) -> Dict[str, Any]:
+        """
+        Build remarketing audiences from a viewer stream with bounded memory.
+        
+        Args:
+            content_id: Content the viewers watched
+            viewers: Iterable of viewer dicts, or path to a JSONL file of them
+            output_dir: Directory for per-segment membership files
+            chunk_size: Viewers segmented per vectorized pass
+            
+        Returns:
+            Dict with segment file paths, member counts and audience ids
+        """
+        segment_dir = Path(output_dir) / content_id
+        segment_dir.mkdir(parents=True, exist_ok=True)
+        segment_paths = {segment: segment_dir / f"{segment}.ids" for segment in self.audience_segments}
+        
+        if isinstance(viewers, str):
+            viewers = self._read_jsonl(viewers)
+        
+        # Reading, segmenting and writing are all blocking, so they run off the event loop
+        counts = await asyncio.to_thread(self._write_segment_files, viewers, segment_paths, chunk_size)
+        
+        # Segment files are synced one at a time, streaming from disk
+        custom_audiences = {}
+        for segment, path in segment_paths.items():
+            custom_audiences.update(await self._upload_segment_file(path, segment, content_id))
+        
+        return {
+            'content_id': content_id,
+            'segments': {
+                segment: {'path': str(path), 'count': counts[segment]}
+                for segment, path in segment_paths.items()
+            },
+            'custom_audiences': custom_audiences
+        }
+    
+    def _write_segment_files(
+        self,
+        viewers: Iterable[Dict[str, Any]],
+        segment_paths: Dict[str, Path],
+        chunk_size: int
+    ) -> Dict[str, int]:
+        """Segment viewers chunk by chunk into one identifier-per-line file per segment."""
+        counts = dict.fromkeys(segment_paths, 0)
+        viewers = iter(viewers)
+        
+        # Only one chunk of viewers is held in memory at a time; membership
+        # goes straight to disk with the same identifiers build_audience syncs
+        files = {segment: open(path, 'w') for segment, path in segment_paths.items()}
+        try:
+            while True:
+                chunk = list(islice(viewers, chunk_size))
+                if not chunk:
+                    break
+                
+                ids = np.array([str(viewer.get('email') or viewer['id']) for viewer in chunk], dtype=object)
+                watch_time, interactions = self._viewer_columns(chunk)
+                
+                for segment, indices in self.segment_columns(watch_time, interactions).items():
+                    if len(indices):
+                        files[segment].write('\n'.join(ids[indices]) + '\n')
+                        counts[segment] += len(indices)
+        finally:
+            for f in files.values():
+                f.close()
+        
+        return counts
+    
+    def _read_jsonl(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Lazily read viewer dicts from a JSONL file."""
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    
+    async def _upload_segment_file(self, path: Path, segment_name: str, content_id: str) -> Dict[str, Dict[str, str]]:
+        """Sync a segment file to every ad platform through the audience sync engine."""
+        # Hashed, sorted and diffed on disk; each platform gets one audience,
+        # and only changed members are sent, one batch at a time
+        return await self.audience_sync.sync_files({segment_name: path}, audience_key=content_id)
+    
     def _segment_audience(self, viewer_data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
         """Segment viewers based on engagement levels."""
-        segments = {
-            'high_engagement': [],
-            'moderate_engagement': [],
-            'low_engagement': []
+        watch_time, interactions = self._viewer_columns(viewer_data)
+        segment_indices = self.segment_columns(watch_time, interactions)
+        
+        return {
+            segment: [viewer_data[i] for i in indices.tolist()]
+            for segment, indices in segment_indices.items()
         }
+    
+    def _viewer_columns(self, viewer_data: List[Dict[str, Any]]) -> tuple:
+        """Extract watch time and interaction count columns from viewer dicts."""
+        count = len(viewer_data)
+        # float64 like the Python floats _determine_segment compares, so values
+        # just under a threshold don't round up onto it
+        watch_time = np.fromiter(
+            (viewer.get('watch_time_percentage', 0) for viewer in viewer_data),
+            dtype=np.float64,
+            count=count
+        )
+        interactions = np.fromiter(
+            (viewer.get('likes', 0) + viewer.get('comments', 0) + viewer.get('shares', 0) for viewer in viewer_data),
+            dtype=np.int32,
+            count=count
+        )
         
-        for viewer in viewer_data:
-            segment = self._determine_segment(viewer)
-            segments[segment].append(viewer)
+        return watch_time, interactions
+    
+    def segment_columns(self, watch_time: np.ndarray, interactions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Assign every viewer to a segment in one vectorized pass.
+        
+        Args:
+            watch_time: Watch time percentage per viewer
+            interactions: Likes + comments + shares per viewer
             
-        return segments
+        Returns:
+            Dict mapping segment name to an array of viewer indices, in input order
+        """
+        segment_names = list(self.audience_segments)
+        
+        # Codes follow audience_segments order; the last segment is the catch-all
+        codes = np.full(len(watch_time), len(segment_names) - 1, dtype=np.int8)
+        for code in range(len(segment_names) - 2, -1, -1):
+            criteria = self.audience_segments[segment_names[code]]
+            codes[(watch_time >= criteria['min_watch_time']) &
+                  (interactions >= criteria['min_interactions'])] = code
+        
+        # A stable sort on small integer codes is a radix sort: one O(n) pass
+        # that groups indices by segment while keeping their original order
+        order = np.argsort(codes, kind='stable')
+        if len(order) < np.iinfo(np.int32).max:
+            order = order.astype(np.int32)
+        
+        bounds = np.cumsum(np.bincount(codes, minlength=len(segment_names)))[:-1]
+        
+        return dict(zip(segment_names, np.split(order, bounds)))
     
     def _determine_segment(self, viewer: Dict[str, Any]) -> str:
         """Determine viewer segment based on engagement metrics."""
@@ -51,33 +193,14 @@ class RemarketingEngine:
         else:
             return 'low_engagement'
     
-    async def _create_custom_audiences(self, segments: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+    async def _create_custom_audiences(self, segments: Dict[str, List[Dict[str, Any]]], content_id: str) -> Dict[str, str]:
         """Create custom audiences in ad platforms."""
-        audience_ids = {}
-        
-        for segment_name, viewers in segments.items():
-            # Create audience in Facebook Ads
-            fb_audience_id = await self._create_facebook_audience(viewers, segment_name)
-            
-            # Create audience in Google Ads
-            google_audience_id = await self._create_google_audience(viewers, segment_name)
-            
-            audience_ids[segment_name] = {
-                'facebook': fb_audience_id,
-                'google': google_audience_id
-            }
-            
-        return audience_ids
-    
-    async def _create_facebook_audience(self, viewers: List[Dict[str, Any]], segment_name: str) -> str:
-        """Create a custom audience in Facebook Ads."""
-        # In production, this would use the Facebook Marketing API
-        return f"fb_audience_{segment_name}"
-    
-    async def _create_google_audience(self, viewers: List[Dict[str, Any]], segment_name: str) -> str:
-        """Create a custom audience in Google Ads."""
-        # In production, this would use the Google Ads API
-        return f"google_audience_{segment_name}"
+        # Every segment is synced to every platform concurrently, sending only
+        # the members that changed since the previous sync of this content's audiences
+        return await self.audience_sync.sync({
+            segment_name: [viewer.get('email') or viewer['id'] for viewer in viewers]
+            for segment_name, viewers in segments.items()
+        }, audience_key=content_id)
     
     async def create_email_sequence(self, segment: str) -> List[Dict[str, Any]]:
         """Create automated email nurture sequence."""
@@ -117,6 +240,36 @@ class RemarketingEngine:
         
         return sequences.get(segment, [])
     
+    async def schedule_email_sequence(self, segment: str, recipients: Iterable[str], start: float = None) -> int:
+        """
+        Queue a segment's nurture sequence for every recipient.
+        
+        Args:
+            segment: Audience segment whose sequence to send
+            recipients: Recipient email addresses
+            start: Epoch seconds the sequence delays count from (default: now)
+            
+        Returns:
+            Number of sends newly queued
+        """
+        sequence = await self.create_email_sequence(segment)
+        start = time.time() if start is None else start
+        
+        # Generated lazily so millions of recipients never sit in memory at once
+        sends = (
+            {
+                'recipient': recipient,
+                'segment': segment,
+                'template': step['template'],
+                'subject': step['subject'],
+                'due_at': start + step['delay'] * 86400
+            }
+            for recipient in recipients
+            for step in sequence
+        )
+        
+        return self.email_scheduler.schedule(sends)
+    
     async def track_remarketing_performance(self, campaign_id: str) -> Dict[str, Any]:
         """Track performance of remarketing campaigns."""
         # In production, this would fetch real metrics from ad platforms
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Dict, Any, List, Callable, Awaitable
+
+class TaskGraph:
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], deps: List[str] = None) -> None:
+        """
+        Add a node to the graph.
+
+        Args:
+            name: Unique node name
+            func: Coroutine function called with the results of its dependencies,
+                in the order they are listed
+            deps: Names of nodes that must finish first
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate task: {name}")
+
+        for dep in deps or []:
+            if dep not in self.nodes:
+                raise ValueError(f"Unknown dependency {dep} for task {name}")
+
+        self.nodes[name] = {'func': func, 'deps': deps or []}
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every node as soon as its dependencies have finished.
+
+        Returns:
+            Dict mapping node names to their results
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_node(name: str) -> Any:
+            node = self.nodes[name]
+            dep_results = [await tasks[dep] for dep in node['deps']]
+            return await node['func'](*dep_results)
+
+        # Dependencies are always added before their dependents, so insertion
+        # order is a valid topological order
+        for name in self.nodes:
+            tasks[name] = asyncio.create_task(run_node(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,127 @@
+from typing import Dict, Any, List, Optional, Iterable, AsyncIterable, AsyncIterator, Union
+
+import numpy as np
+
+Batch = Dict[str, Any]
+
+class WinnerDetector:
+    def __init__(
+        self,
+        thresholds: Dict[str, float],
+        vertical_thresholds: Optional[Dict[str, Dict[str, float]]] = None,
+        percentile_thresholds: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            thresholds: Minimum value per metric, applied to every item
+            vertical_thresholds: Per-vertical overrides, e.g. {'finance': {'views': 5000}}
+            percentile_thresholds: Metrics judged relative to their peers instead,
+                e.g. {'views': 90} keeps the top 10% of views within each vertical.
+                Peers are the items of the same detect() call, so when
+                streaming, each batch should hold a whole cohort (e.g. one
+                day's content); small batches make the cut noisy
+        """
+        self.thresholds = thresholds
+        self.vertical_thresholds = vertical_thresholds or {}
+        self.percentile_thresholds = percentile_thresholds or {}
+
+    def detect(self, columns: Dict[str, np.ndarray], verticals: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Apply every threshold to columnar metrics in one vectorized pass.
+
+        Args:
+            columns: Metric name -> array of values, one entry per content item
+            verticals: Optional array of vertical names aligned with the columns
+
+        Returns:
+            Boolean mask of winning items
+        """
+        size = len(next(iter(columns.values())))
+        mask = np.ones(size, dtype=bool)
+        if size == 0:
+            # Nothing to rank; np.percentile rejects empty input
+            return mask
+
+        if verticals is not None:
+            groups, group_index = np.unique(np.asarray(verticals), return_inverse=True)
+        else:
+            groups, group_index = np.array(['']), np.zeros(size, dtype=np.intp)
+
+        for metric, base in self.thresholds.items():
+            values = np.asarray(columns[metric], dtype=np.float64)
+
+            if metric in self.percentile_thresholds:
+                per_group = self._percentile_thresholds(values, groups, group_index, self.percentile_thresholds[metric])
+            else:
+                per_group = np.array([
+                    self.vertical_thresholds.get(group, {}).get(metric, base)
+                    for group in groups
+                ], dtype=np.float64)
+
+            # Broadcast one threshold per vertical back onto every item
+            mask &= values >= per_group[group_index]
+
+        return mask
+
+    def _percentile_thresholds(
+        self,
+        values: np.ndarray,
+        groups: np.ndarray,
+        group_index: np.ndarray,
+        percentile: float
+    ) -> np.ndarray:
+        """Percentile of a metric within each vertical."""
+        if len(groups) == 1:
+            return np.array([np.percentile(values, percentile)])
+
+        # Sort once by (vertical, value) and read percentiles from each group's slice
+        order = np.lexsort((values, group_index))
+        sorted_values = values[order]
+        bounds = np.searchsorted(group_index[order], np.arange(len(groups) + 1))
+
+        return np.array([
+            np.percentile(sorted_values[start:end], percentile) if end > start else np.inf
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ])
+
+    def winners(self, batch: Batch) -> Dict[str, Any]:
+        """Filter one batch ({'ids', 'metrics', 'verticals'}) down to its winners."""
+        mask = self.detect(batch['metrics'], batch.get('verticals'))
+        index = np.flatnonzero(mask)
+
+        return {
+            'ids': np.asarray(batch['ids'])[index],
+            'metrics': {name: np.asarray(values)[index] for name, values in batch['metrics'].items()},
+            'verticals': np.asarray(batch['verticals'])[index] if batch.get('verticals') is not None else None
+        }
+
+    async def stream_winners(self, batches: Union[Iterable[Batch], AsyncIterable[Batch]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield winners one at a time as batches of metrics arrive.
+
+        Each yielded dict holds the content id, its vertical and its metric
+        values, ready to be handed to derivative generation. Percentile
+        thresholds are computed per batch; empty batches yield nothing.
+        """
+        if hasattr(batches, '__aiter__'):
+            async for batch in batches:
+                for winner in self._expand(self.winners(batch)):
+                    yield winner
+        else:
+            for batch in batches:
+                for winner in self._expand(self.winners(batch)):
+                    yield winner
+
+    def _expand(self, winners: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Turn the (small) winner columns back into per-item dicts."""
+        metrics = {name: values.tolist() for name, values in winners['metrics'].items()}
+        verticals = winners['verticals'].tolist() if winners['verticals'] is not None else None
+
+        return [
+            {
+                'id': content_id,
+                'vertical': verticals[i] if verticals is not None else None,
+                'metrics': {name: values[i] for name, values in metrics.items()}
+            }
+            for i, content_id in enumerate(winners['ids'].tolist())
+        ]
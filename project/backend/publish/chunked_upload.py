@@ -0,0 +1,270 @@
+import os
+import json
+import mmap
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Optional, Dict, Any, Callable, Set
+from pathlib import Path
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB, a multiple of 256KB as YouTube requires
+DEFAULT_CHECKPOINT_DIR = ".cache/uploads"
+
+class UploadError(Exception):
+    """Raised when a chunk cannot be delivered after all retries."""
+
+class ChunkedUploader:
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        send_chunk: Optional[Callable[..., bool]] = None
+    ):
+        self.chunk_size = chunk_size
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.send_chunk = send_chunk or self._put_chunk
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+
+    def upload(
+        self,
+        file_path: str,
+        upload_url: str,
+        max_workers: int = 1,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload a file in fixed-size chunks, resuming from any saved checkpoint.
+
+        Args:
+            file_path: Path to the file to upload
+            upload_url: Session URL returned by the platform's upload initiation call
+            max_workers: Number of chunks in flight; keep at 1 for protocols that
+                require chunks in order (e.g. YouTube resumable uploads)
+            headers: Extra headers sent with every chunk (auth tokens etc.)
+
+        Returns:
+            Dict containing the upload summary
+        """
+        total = os.path.getsize(file_path)
+        if total == 0:
+            raise UploadError(f"Refusing to upload empty file: {file_path}")
+
+        checkpoint_path = self._checkpoint_path(file_path, upload_url)
+        state = self._load_checkpoint(checkpoint_path, file_path, upload_url)
+        completed: Set[int] = set(state['completed'])
+
+        chunk_count = (total + self.chunk_size - 1) // self.chunk_size
+        pending = [i for i in range(chunk_count) if i not in completed]
+
+        if completed:
+            logger.info(f"Resuming upload of {file_path}: {len(completed)}/{chunk_count} chunks already sent")
+
+        # Out-of-order chunks can't be checked against the server's committed
+        # prefix one by one, so parallel uploads through _put_chunk confirm
+        # the committed offset once every worker has finished
+        send_chunk = self.send_chunk
+        confirm = max_workers > 1 and send_chunk == self._put_chunk
+        if confirm:
+            send_chunk = partial(self._put_chunk, ordered=False)
+
+        started = time.time()
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if max_workers <= 1:
+                for index in pending:
+                    self._send_with_retry(mm, index, total, upload_url, headers)
+                    self._mark_completed(checkpoint_path, state, completed, index)
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    futures = {
+                        pool.submit(self._send_with_retry, mm, index, total, upload_url, headers, send_chunk): index
+                        for index in pending
+                    }
+                    errors = []
+                    for future in as_completed(futures):
+                        index = futures[future]
+                        try:
+                            future.result()
+                            self._mark_completed(checkpoint_path, state, completed, index)
+                        except UploadError as e:
+                            errors.append(e)
+                    if errors:
+                        raise errors[0]
+
+                if confirm:
+                    self._confirm_committed(mm, total, upload_url, headers)
+
+        # Upload finished; the checkpoint is no longer needed
+        checkpoint_path.unlink(missing_ok=True)
+
+        return {
+            "success": True,
+            "bytes": total,
+            "chunks": chunk_count,
+            "resumed_chunks": chunk_count - len(pending),
+            "duration": time.time() - started
+        }
+
+    def _send_with_retry(
+        self,
+        mm: mmap.mmap,
+        index: int,
+        total: int,
+        upload_url: str,
+        headers: Optional[Dict[str, str]],
+        send_chunk: Optional[Callable[..., bool]] = None
+    ) -> None:
+        """Send one chunk, retrying with exponential backoff."""
+        send_chunk = send_chunk or self.send_chunk
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, total)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Slicing the map copies only this chunk into memory
+                if send_chunk(upload_url, mm[start:end], start, end, total, headers):
+                    return
+                error = f"server rejected chunk {index}"
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt < self.max_retries:
+                delay = self.backoff_base * (2 ** attempt)
+                logger.warning(f"Chunk {index} failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        raise UploadError(f"Chunk {index} failed after {self.max_retries + 1} attempts: {error}")
+
+    def _put_chunk(
+        self,
+        upload_url: str,
+        data: bytes,
+        start: int,
+        end: int,
+        total: int,
+        headers: Optional[Dict[str, str]],
+        ordered: bool = True
+    ) -> bool:
+        """
+        Send a chunk as a Content-Range PUT.
+
+        Args:
+            ordered: Chunks are sent in order, so a 308 ("resume incomplete")
+                must report a committed range covering this chunk. Parallel
+                uploads pass False and confirm the committed offset at the end.
+        """
+        chunk_headers = dict(headers or {})
+        chunk_headers.update({
+            'Content-Length': str(end - start),
+            'Content-Range': f"bytes {start}-{end - 1}/{total}"
+        })
+        response = self.session.put(upload_url, data=data, headers=chunk_headers, timeout=60)
+
+        if response.status_code in (200, 201, 204):
+            return True
+
+        if response.status_code != 308:
+            return False
+        if not ordered:
+            return True
+
+        # After the last chunk a 308 means the server is still missing bytes;
+        # otherwise the committed range must reach the end of this chunk
+        # (no Range header means nothing was persisted)
+        return end < total and self._committed(response) >= end
+
+    def _committed(self, response: requests.Response) -> int:
+        """Bytes the server has persisted, from a 308's Range header."""
+        received = response.headers.get('Range')
+        if received is None:
+            return 0
+        try:
+            return int(received.rsplit('-', 1)[1]) + 1
+        except (IndexError, ValueError):
+            return 0
+
+    def _query_committed(self, upload_url: str, total: int, headers: Optional[Dict[str, str]]) -> int:
+        """Ask the server how much of the upload it has persisted."""
+        status_headers = dict(headers or {})
+        status_headers.update({'Content-Length': '0', 'Content-Range': f"bytes */{total}"})
+        response = self.session.put(upload_url, headers=status_headers, timeout=60)
+
+        if response.status_code in (200, 201):
+            return total
+        if response.status_code == 308:
+            return self._committed(response)
+        raise UploadError(f"Upload status query failed with HTTP {response.status_code}")
+
+    def _confirm_committed(
+        self,
+        mm: mmap.mmap,
+        total: int,
+        upload_url: str,
+        headers: Optional[Dict[str, str]]
+    ) -> None:
+        """After a parallel upload, resend in order from whatever the server is missing."""
+        for _ in range(self.max_retries + 1):
+            committed = self._query_committed(upload_url, total, headers)
+            if committed >= total:
+                return
+
+            first_missing = committed // self.chunk_size
+            logger.warning(f"Server committed {committed}/{total} bytes, resending from chunk {first_missing}")
+            chunk_count = (total + self.chunk_size - 1) // self.chunk_size
+            for index in range(first_missing, chunk_count):
+                self._send_with_retry(mm, index, total, upload_url, headers, self._put_chunk)
+
+        raise UploadError(f"Server still missing bytes after {self.max_retries + 1} confirmations")
+
+    def _checkpoint_path(self, file_path: str, upload_url: str) -> Path:
+        """Get the checkpoint file for a (file, upload session) pair."""
+        key = hashlib.sha1(f"{os.path.abspath(file_path)}|{upload_url}".encode()).hexdigest()
+        return self.checkpoint_dir / f"{key}.json"
+
+    def _load_checkpoint(self, checkpoint_path: Path, file_path: str, upload_url: str) -> Dict[str, Any]:
+        """Load a checkpoint, discarding it if the file or chunking has changed."""
+        stat = os.stat(file_path)
+        fresh = {
+            'file_path': os.path.abspath(file_path),
+            'upload_url': upload_url,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'chunk_size': self.chunk_size,
+            'completed': []
+        }
+
+        try:
+            state = json.loads(checkpoint_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return fresh
+
+        if any(state.get(k) != fresh[k] for k in ('size', 'mtime', 'chunk_size')):
+            logger.info(f"Discarding stale upload checkpoint for {file_path}")
+            return fresh
+
+        return state
+
+    def _mark_completed(self, checkpoint_path: Path, state: Dict[str, Any], completed: Set[int], index: int) -> None:
+        """Record a finished chunk and persist the checkpoint atomically."""
+        with self._lock:
+            completed.add(index)
+            state['completed'] = sorted(completed)
+
+            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = checkpoint_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(state))
+            os.replace(tmp_path, checkpoint_path)
+
+# Create singleton instance
+chunked_uploader = ChunkedUploader()
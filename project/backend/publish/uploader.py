@@ -1,9 +1,13 @@
 import os
 import json
+import asyncio
 import logging
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+from .chunked_upload import chunked_uploader
+from ..video.media_probe import media_probe
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,6 +16,16 @@ class VideoPublisher:
     def __init__(self):
         self.youtube_token = os.getenv('YOUTUBE_API_TOKEN')
         self.tiktok_token = os.getenv('TIKTOK_API_TOKEN')
+        self.uploader = chunked_uploader
+        self.probe = media_probe
+        self.tiktok_max_duration = 180  # seconds
+        
+        # Concurrent chunks per platform; YouTube resumable sessions only
+        # accept chunks in order
+        self.upload_workers = {
+            'youtube': 1,
+            'tiktok': int(os.getenv('TIKTOK_UPLOAD_WORKERS', '1'))
+        }
         
     async def publish_to_youtube(
         self,
@@ -19,7 +33,8 @@ class VideoPublisher:
         title: str,
         description: str,
         tags: list[str] = None,
-        privacy: str = 'private'
+        privacy: str = 'private',
+        upload_url: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Publish a video to YouTube.
@@ -30,6 +45,8 @@ class VideoPublisher:
             description: Video description
             tags: List of video tags
             privacy: Privacy status ('private', 'unlisted', 'public')
+            upload_url: Resumable upload session URL; when set the file is
+                sent through the chunked upload engine
             
         Returns:
             Dict containing upload status and video ID
@@ -44,6 +61,9 @@ class VideoPublisher:
             if not self._validate_video(video_path):
                 raise ValueError("Invalid video file format")
             
+            if upload_url:
+                await self._upload_chunked('youtube', video_path, upload_url, self.youtube_token)
+            
             # In production, this would use the YouTube Data API
             # For now, we'll simulate a successful upload
             video_id = "simulated_youtube_id"
@@ -68,7 +88,8 @@ class VideoPublisher:
         self,
         video_path: str,
         title: str,
-        tags: list[str] = None
+        tags: list[str] = None,
+        upload_url: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Publish a video to TikTok.
@@ -77,6 +98,8 @@ class VideoPublisher:
             video_path: Path to the video file
             title: Video title/caption
             tags: List of hashtags
+            upload_url: Upload URL from the TikTok upload initiation call;
+                when set the file is sent through the chunked upload engine
             
         Returns:
             Dict containing upload status and video ID
@@ -95,6 +118,9 @@ class VideoPublisher:
             formatted_tags = " ".join([f"#{tag}" for tag in (tags or [])])
             caption = f"{title}\n\n{formatted_tags}"
             
+            if upload_url:
+                await self._upload_chunked('tiktok', video_path, upload_url, self.tiktok_token)
+            
             # In production, this would use the TikTok API
             # For now, we'll simulate a successful upload
             video_id = "simulated_tiktok_id"
@@ -115,8 +141,30 @@ class VideoPublisher:
                 "error": str(e)
             }
 
+    async def _upload_chunked(
+        self,
+        platform: str,
+        video_path: str,
+        upload_url: str,
+        token: Optional[str]
+    ) -> Dict[str, Any]:
+        """Send a video through the resumable chunked upload engine."""
+        headers = {'Authorization': f"Bearer {token}"} if token else None
+        
+        # The engine does blocking I/O, so keep it off the event loop
+        result = await asyncio.to_thread(
+            self.uploader.upload,
+            video_path,
+            upload_url,
+            max_workers=self.upload_workers[platform],
+            headers=headers
+        )
+        
+        logger.info(f"Uploaded {result['bytes']} bytes to {platform} in {result['chunks']} chunks")
+        return result
+
     def _validate_video(self, video_path: str) -> bool:
-        """Validate video file format and size."""
+        """Validate video file format, size and container."""
         try:
             # Check file extension
             valid_extensions = ['.mp4', '.mov', '.avi']
@@ -128,16 +176,28 @@ class VideoPublisher:
             if os.path.getsize(video_path) > max_size:
                 return False
             
-            return True
+            # Check the container actually holds a video stream. Containers we
+            # cannot read (e.g. .avi without ffprobe) keep the extension/size result
+            info = self.probe.probe(video_path)
+            if info is None:
+                logger.warning(f"Could not probe {video_path}; validated by extension and size only")
+                return True
+            
+            return any(stream.get('type') == 'video' for stream in info['streams'])
         except Exception:
             return False
 
     def _validate_tiktok_length(self, video_path: str) -> bool:
         """Validate video length for TikTok."""
         try:
-            # In production, use proper video duration check
-            # For now, assume valid
-            return True
+            # Probe results are cached per file, so validations share one probe
+            duration = self.probe.duration(video_path)
+            if duration is None:
+                # Unknown length: let TikTok enforce its own limit rather than reject the file
+                logger.warning(f"Could not read the duration of {video_path}; skipping the TikTok length check")
+                return True
+            
+            return duration <= self.tiktok_max_duration
         except Exception:
             return False
 
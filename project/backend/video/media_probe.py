@@ -0,0 +1,232 @@
+import os
+import json
+import struct
+import shutil
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Optional, Dict, Any, BinaryIO, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ISO base media (MP4/MOV) boxes we descend into while looking for track metadata
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+class MediaProbe:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, int, int], Optional[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.ffprobe_path = shutil.which('ffprobe')
+
+    def probe(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get duration, resolution and codecs of a media file.
+
+        Results are cached by (path, mtime, size), so repeated validation of
+        the same file costs a stat() call.
+
+        Args:
+            path: Path to the media file
+
+        Returns:
+            Dict of media info, or None if the container could not be read
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        info = self._probe_uncached(path, stat.st_size)
+
+        with self._lock:
+            self._cache[key] = info
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return info
+
+    def duration(self, path: str) -> Optional[float]:
+        """Get media duration in seconds."""
+        info = self.probe(path)
+        return info['duration'] if info else None
+
+    def clear(self) -> None:
+        """Drop all cached probe results."""
+        with self._lock:
+            self._cache.clear()
+
+    def _probe_uncached(self, path: str, size: int) -> Optional[Dict[str, Any]]:
+        """Parse container headers, falling back to ffprobe for non-MP4 files."""
+        try:
+            with open(path, 'rb') as f:
+                if f.read(12)[4:8] == b'ftyp':
+                    return self._probe_mp4(f, size)
+        except (OSError, struct.error, ValueError, IndexError) as e:
+            # IndexError: a box truncated before its version byte
+            logger.warning(f"Failed to parse MP4 headers of {path}: {str(e)}")
+
+        return self._probe_ffprobe(path)
+
+    def _probe_mp4(self, f: BinaryIO, size: int) -> Optional[Dict[str, Any]]:
+        """Read duration and track info from the moov box without touching mdat."""
+        info = {
+            'container': 'mp4',
+            'duration': None,
+            'width': None,
+            'height': None,
+            'video_codec': None,
+            'audio_codec': None,
+            'streams': []
+        }
+
+        track = None
+        for box_type, start, end in self._walk_boxes(f, 0, size):
+            if box_type == b'mvhd':
+                timescale, duration = self._read_media_header(f, start)
+                if timescale:
+                    info['duration'] = duration / timescale
+            elif box_type == b'trak':
+                track = {'type': None, 'codec': None, 'width': None, 'height': None, 'duration': None}
+                info['streams'].append(track)
+            elif box_type == b'tkhd' and track is not None:
+                track['width'], track['height'] = self._read_track_dimensions(f, start)
+            elif box_type == b'mdhd' and track is not None:
+                timescale, duration = self._read_media_header(f, start)
+                if timescale:
+                    track['duration'] = duration / timescale
+            elif box_type == b'hdlr' and track is not None:
+                f.seek(start + 8)
+                track['type'] = {b'vide': 'video', b'soun': 'audio'}.get(f.read(4), 'other')
+            elif box_type == b'stsd' and track is not None:
+                # version/flags(4) + entry count(4), then the first sample
+                # entry's size(4) + codec fourcc(4)
+                f.seek(start + 12)
+                track['codec'] = f.read(4).decode('latin-1').strip()
+
+        if not info['streams'] and info['duration'] is None:
+            return None
+
+        for track in info['streams']:
+            if track['type'] == 'video' and info['video_codec'] is None:
+                info['video_codec'] = track['codec']
+                info['width'] = track['width']
+                info['height'] = track['height']
+            elif track['type'] == 'audio' and info['audio_codec'] is None:
+                info['audio_codec'] = track['codec']
+
+        if info['duration'] is None:
+            durations = [t['duration'] for t in info['streams'] if t['duration']]
+            info['duration'] = max(durations) if durations else None
+
+        return info
+
+    def _walk_boxes(self, f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+        """
+        Yield (type, payload_start, box_end) for boxes in a range, depth first.
+
+        Payload offsets point past the box header. Large boxes like mdat are
+        skipped with a seek, so the cost is independent of file size.
+        """
+        offset = start
+        while offset + 8 <= end:
+            f.seek(offset)
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            box_size, box_type = struct.unpack('>I4s', header)
+            header_size = 8
+
+            if box_size == 1:
+                box_size = struct.unpack('>Q', f.read(8))[0]
+                header_size = 16
+            elif box_size == 0:
+                box_size = end - offset
+
+            if box_size < header_size:
+                raise ValueError(f"Corrupt box {box_type!r} at offset {offset}")
+
+            box_end = min(offset + box_size, end)
+            yield box_type, offset + header_size, box_end
+
+            if box_type in CONTAINER_BOXES:
+                yield from self._walk_boxes(f, offset + header_size, box_end)
+
+            offset = box_end
+
+    def _read_media_header(self, f: BinaryIO, start: int) -> Tuple[int, int]:
+        """Read (timescale, duration) from an mvhd or mdhd full box."""
+        f.seek(start)
+        version = f.read(1)[0]
+        f.seek(3, os.SEEK_CUR)
+
+        if version == 1:
+            _, _, timescale, duration = struct.unpack('>QQIQ', f.read(28))
+        else:
+            _, _, timescale, duration = struct.unpack('>IIII', f.read(16))
+
+        return timescale, duration
+
+    def _read_track_dimensions(self, f: BinaryIO, start: int) -> Tuple[Optional[int], Optional[int]]:
+        """Read display width and height (16.16 fixed point) from a tkhd box."""
+        f.seek(start)
+        version = f.read(1)[0]
+
+        # flags(3) + times/track id/duration (20 or 32) + reserved(8) +
+        # layer/group/volume/reserved(8) + matrix(36)
+        skip = 3 + (32 if version == 1 else 20) + 8 + 8 + 36
+        f.seek(skip, os.SEEK_CUR)
+        width, height = struct.unpack('>II', f.read(8))
+
+        if not width or not height:
+            return None, None
+        return width >> 16, height >> 16
+
+    def _probe_ffprobe(self, path: str) -> Optional[Dict[str, Any]]:
+        """Probe containers we don't parse natively with ffprobe, if installed."""
+        if not self.ffprobe_path:
+            return None
+
+        try:
+            result = subprocess.run(
+                [self.ffprobe_path, '-v', 'error', '-print_format', 'json',
+                 '-show_format', '-show_streams', path],
+                capture_output=True,
+                check=True,
+                timeout=30
+            )
+            data = json.loads(result.stdout)
+        except (subprocess.SubprocessError, json.JSONDecodeError) as e:
+            logger.warning(f"ffprobe failed for {path}: {str(e)}")
+            return None
+
+        streams = data.get('streams', [])
+        video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+        audio = next((s for s in streams if s.get('codec_type') == 'audio'), {})
+        duration = data.get('format', {}).get('duration')
+
+        return {
+            'container': data.get('format', {}).get('format_name'),
+            'duration': float(duration) if duration else None,
+            'width': video.get('width'),
+            'height': video.get('height'),
+            'video_codec': video.get('codec_name'),
+            'audio_codec': audio.get('codec_name'),
+            'streams': [
+                {
+                    'type': s.get('codec_type'),
+                    'codec': s.get('codec_name'),
+                    'width': s.get('width'),
+                    'height': s.get('height'),
+                    'duration': float(s['duration']) if s.get('duration') else None
+                }
+                for s in streams
+            ]
+        }
+
+# Create singleton instance
+media_probe = MediaProbe()
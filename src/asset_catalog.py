@@ -0,0 +1,213 @@
+import os
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("asset_catalog")
+
+# The MP4 header probe lives in the backend package; it is importable when
+# the project/ directory is on PYTHONPATH. Without it assets are still
+# indexed, just without duration and resolution.
+try:
+    from backend.video.media_probe import media_probe
+    PROBE_AVAILABLE = True
+except ImportError:
+    media_probe = None
+    PROBE_AVAILABLE = False
+
+MEDIA_EXTENSIONS = (".mp4", ".mov", ".mkv")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    aspect REAL,
+    last_used REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_assets_folder_last_used ON assets (folder, last_used);
+CREATE INDEX IF NOT EXISTS idx_assets_last_used ON assets (last_used);
+CREATE INDEX IF NOT EXISTS idx_assets_duration ON assets (duration);
+CREATE INDEX IF NOT EXISTS idx_assets_aspect ON assets (aspect);
+CREATE INDEX IF NOT EXISTS idx_assets_hash ON assets (content_hash);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+class AssetCatalog:
+    """Persistent, incrementally refreshed index of media assets"""
+
+    def __init__(self, db_path: str = ".cache/asset_catalog.db", probe: Optional[Callable] = None,
+                 rescan_interval: float = 60.0):
+        self.db_path = db_path
+        self.probe = probe or (media_probe.probe if PROBE_AVAILABLE else None)
+        self.rescan_interval = rescan_interval
+        self._scanned: Dict[str, float] = {}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def refresh(self, folder: str, force: bool = False) -> int:
+        """Index new or changed files in a folder, returning how many were (re)probed.
+
+        A scan stats every file and re-probes those whose size or mtime
+        changed. The folder's mtime only changes when files are added,
+        removed or renamed, not when one is edited in place, so an
+        unchanged folder skips the scan only if this process scanned it
+        less than rescan_interval seconds ago. Pass force=True to always scan.
+        """
+        folder = os.path.abspath(folder)
+        folder_mtime = os.stat(folder).st_mtime_ns
+        now = time.monotonic()
+
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns FROM folders WHERE path = ?", (folder,)).fetchone()
+            recent = now - self._scanned.get(folder, -float("inf")) < self.rescan_interval
+            if row and row["mtime_ns"] == folder_mtime and recent and not force:
+                return 0
+
+            known = {
+                r["path"]: (r["size"], r["mtime_ns"])
+                for r in self._conn.execute("SELECT path, size, mtime_ns FROM assets WHERE folder = ?", (folder,))
+            }
+
+        seen = set()
+        changed = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                    continue
+                stat = entry.stat()
+                seen.add(entry.path)
+                if known.get(entry.path) != (stat.st_size, stat.st_mtime_ns):
+                    changed.append(self._describe(entry.path, folder, stat))
+
+        removed = [(path,) for path in known if path not in seen]
+
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO assets (path, folder, size, mtime_ns, content_hash, duration, width, height, aspect)
+                VALUES (:path, :folder, :size, :mtime_ns, :content_hash, :duration, :width, :height, :aspect)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size, mtime_ns = excluded.mtime_ns, content_hash = excluded.content_hash,
+                    duration = excluded.duration, width = excluded.width, height = excluded.height,
+                    aspect = excluded.aspect
+            """, changed)
+            self._conn.executemany("DELETE FROM assets WHERE path = ?", removed)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO folders (path, mtime_ns) VALUES (?, ?)",
+                (folder, folder_mtime)
+            )
+            self._scanned[folder] = now
+
+        if changed or removed:
+            logger.info(f"Indexed {folder}: {len(changed)} new/changed, {len(removed)} removed")
+        return len(changed)
+
+    def _describe(self, path: str, folder: str, stat: os.stat_result) -> Dict:
+        """Probe and hash one file for the index"""
+        info = None
+        if self.probe:
+            try:
+                info = self.probe(path)
+            except Exception as e:
+                logger.warning(f"Failed to probe {path}: {e}")
+        info = info or {}
+
+        width, height = info.get("width"), info.get("height")
+        return {
+            "path": path,
+            "folder": folder,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": self._hash_file(path),
+            "duration": info.get("duration"),
+            "width": width,
+            "height": height,
+            "aspect": round(width / height, 4) if width and height else None
+        }
+
+    def _hash_file(self, path: str) -> str:
+        """SHA-256 of the file contents, read in blocks"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def query(self,
+              folder: Optional[str] = None,
+              min_duration: Optional[float] = None,
+              max_duration: Optional[float] = None,
+              aspect: Optional[float] = None,
+              aspect_tolerance: float = 0.05,
+              unused_for: Optional[float] = None,
+              limit: int = 10) -> List[Dict]:
+        """Find assets matching the filters, least recently used first
+
+        With or without a folder, rows are read from an index in last_used
+        order and the scan stops after `limit` matches; duration and aspect
+        are checked along the way. Duration or aspect alone narrow by their
+        own index and sort the matches.
+        """
+        clauses, params = [], []
+        if folder is not None:
+            clauses.append("folder = ?")
+            params.append(os.path.abspath(folder))
+        if min_duration is not None:
+            clauses.append("duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            clauses.append("duration <= ?")
+            params.append(max_duration)
+        if aspect is not None:
+            clauses.append("aspect BETWEEN ? AND ?")
+            params.extend([aspect - aspect_tolerance, aspect + aspect_tolerance])
+        if unused_for is not None:
+            clauses.append("last_used <= ?")
+            params.append(time.time() - unused_for)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM assets {where} ORDER BY last_used LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def pick(self, pool_size: int = 10, **filters) -> Optional[str]:
+        """Pick a random asset among the least recently used matches"""
+        candidates = self.query(limit=pool_size, **filters)
+        if not candidates:
+            return None
+        return random.choice(candidates)["path"]
+
+    def mark_used(self, path: str):
+        """Record that an asset was just used"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE assets SET last_used = ? WHERE path = ?",
+                (time.time(), os.path.abspath(path))
+            )
+
+    def close(self):
+        self._conn.close()
+
+asset_catalog = AssetCatalog(
+    os.getenv("ASSET_CATALOG_DB", ".cache/asset_catalog.db"),
+    rescan_interval=float(os.getenv("ASSET_RESCAN_INTERVAL", "60"))
+)
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from openai import AsyncOpenAI
+
+logger = logging.getLogger("caption_service")
+
+SYSTEM_PROMPT = "You are a viral short video content creator."
+BATCH_SYSTEM_PROMPT = (
+    "You are a viral short video content creator. "
+    "Reply with a JSON object of the form {\"captions\": [...]} holding one caption per topic, in order."
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captions (
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    response TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    latency REAL NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (model, prompt_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_captions_last_access ON captions (last_access);
+"""
+
+class ResponseCache:
+    """Persistent LLM response cache keyed by (model, prompt hash) with TTL and size eviction"""
+
+    def __init__(self, db_path: str, ttl: float = 7 * 86400, max_entries: int = 50000, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prompt_hash(messages: List[Dict]) -> str:
+        return hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+
+    def get(self, model: str, prompt_hash: str) -> Optional[Dict]:
+        """Return a fresh cached entry, dropping it if it has expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, tokens, latency, created_at FROM captions WHERE model = ? AND prompt_hash = ?",
+                (model, prompt_hash)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[3] > self.ttl:
+                self._conn.execute("DELETE FROM captions WHERE model = ? AND prompt_hash = ?", (model, prompt_hash))
+                return None
+            self._conn.execute(
+                "UPDATE captions SET last_access = ? WHERE model = ? AND prompt_hash = ?",
+                (now, model, prompt_hash)
+            )
+        return {"response": row[0], "tokens": row[1], "latency": row[2]}
+
+    def put(self, model: str, prompt_hash: str, response: str, tokens: int = 0, latency: float = 0.0):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO captions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (model, prompt_hash, response, tokens, latency, len(response.encode()), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under budget"""
+        self._conn.execute("DELETE FROM captions WHERE created_at < ?", (time.time() - self.ttl,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM captions").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        excess_rows = max(count - self.max_entries, 0)
+        excess_bytes = max(total - self.max_bytes, 0)
+        victims, freed = [], 0
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM captions ORDER BY last_access"):
+            if len(victims) >= excess_rows and freed >= excess_bytes:
+                break
+            victims.append((rowid,))
+            freed += size
+        self._conn.executemany("DELETE FROM captions WHERE rowid = ?", victims)
+
+class RateLimiter:
+    """Token bucket limiting requests per minute"""
+
+    def __init__(self, requests_per_minute: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(requests_per_minute, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CaptionService:
+    """Caption generation with batching, rate limiting and a response cache"""
+
+    def __init__(self,
+                 model: str = "gpt-4",
+                 cache_path: str = ".cache/captions.db",
+                 max_concurrency: int = 8,
+                 requests_per_minute: int = 60,
+                 batch_size: int = 20,
+                 client: Optional[AsyncOpenAI] = None):
+        self.model = model
+        self.batch_size = batch_size
+        self.cache = ResponseCache(cache_path)
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._client = client
+        self._semaphore = None
+        self._limiter = None
+        self.stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "tokens_used": 0,
+            "tokens_saved": 0,
+            "latency_saved": 0.0
+        }
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # Picks up OPENAI_API_KEY and OPENAI_BASE_URL from the environment
+        if self._client is None:
+            self._client = AsyncOpenAI()
+        return self._client
+
+    def _caption_messages(self, topic: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Write a short engaging caption for a video about: {topic}"}
+        ]
+
+    async def _complete(self, messages: List[Dict]):
+        """Send one chat completion under the concurrency and rate limits"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._limiter = RateLimiter(self.requests_per_minute)
+
+        async with self._semaphore:
+            await self._limiter.acquire()
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(model=self.model, messages=messages)
+            latency = time.perf_counter() - started
+
+        tokens = response.usage.total_tokens if response.usage else 0
+        self.stats["requests"] += 1
+        self.stats["tokens_used"] += tokens
+        return response.choices[0].message.content.strip(), tokens, latency
+
+    def _lookup(self, topic: str):
+        """Check the cache for a topic, returning (prompt hash, cached caption or None)"""
+        key = ResponseCache.prompt_hash(self._caption_messages(topic))
+        hit = self.cache.get(self.model, key)
+        if hit:
+            self.stats["cache_hits"] += 1
+            self.stats["tokens_saved"] += hit["tokens"]
+            self.stats["latency_saved"] += hit["latency"]
+            return key, hit["response"]
+        self.stats["cache_misses"] += 1
+        return key, None
+
+    async def generate(self, topic: str, cached: bool = True) -> str:
+        """
+        Generate one caption, served from cache when possible.
+
+        With cached=False the API is always called and nothing is stored, for
+        callers that want a fresh caption each time for the same topic.
+        """
+        if not cached:
+            caption, _, _ = await self._complete(self._caption_messages(topic))
+            return caption
+
+        key, caption = self._lookup(topic)
+        if caption is not None:
+            return caption
+        return await self._generate_uncached(topic, key)
+
+    async def _generate_uncached(self, topic: str, key: str) -> str:
+        caption, tokens, latency = await self._complete(self._caption_messages(topic))
+        self.cache.put(self.model, key, caption, tokens, latency)
+        return caption
+
+    async def generate_many(self, topics: List[str], batched: bool = True) -> List[str]:
+        """Generate captions for many topics
+
+        With batched=True uncached topics are sent batch_size at a time in a
+        single request each; otherwise one request per topic runs
+        concurrently under the rate limit.
+        """
+        results: List[Optional[str]] = [None] * len(topics)
+        missing = []
+        for i, topic in enumerate(topics):
+            key, caption = self._lookup(topic)
+            if caption is None:
+                missing.append((i, topic, key))
+            else:
+                results[i] = caption
+
+        if batched:
+            chunks = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            await asyncio.gather(*(self._generate_batch(chunk, results) for chunk in chunks))
+        else:
+            captions = await asyncio.gather(*(self._generate_uncached(topic, key) for _, topic, key in missing))
+            for (i, _, _), caption in zip(missing, captions):
+                results[i] = caption
+
+        return results
+
+    async def _generate_batch(self, chunk: List, results: List[Optional[str]]):
+        """Caption several topics in one request, falling back to single requests"""
+        topics = "\n".join(f"{n + 1}. {topic}" for n, (_, topic, _) in enumerate(chunk))
+        messages = [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Write a short engaging caption for a video about each topic:\n{topics}"}
+        ]
+
+        try:
+            content, tokens, latency = await self._complete(messages)
+            captions = json.loads(content)["captions"]
+            if len(captions) != len(chunk) or not all(isinstance(c, str) for c in captions):
+                raise ValueError(f"expected {len(chunk)} captions, got {len(captions)}")
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Batched caption response unusable ({e}), falling back to single requests")
+            captions = await asyncio.gather(*(self._generate_uncached(topic, key) for _, topic, key in chunk))
+            for (i, _, _), caption in zip(chunk, captions):
+                results[i] = caption
+            return
+
+        # Attribute the batch cost evenly so cache hits report realistic savings
+        share_tokens, share_latency = tokens // len(chunk), latency / len(chunk)
+        for (i, _, key), caption in zip(chunk, captions):
+            caption = caption.strip()
+            self.cache.put(self.model, key, caption, share_tokens, share_latency)
+            results[i] = caption
+
+caption_service = CaptionService(
+    model=os.getenv("CAPTION_MODEL", "gpt-4"),
+    cache_path=os.getenv("CAPTION_CACHE_DB", ".cache/captions.db"),
+    max_concurrency=int(os.getenv("CAPTION_MAX_CONCURRENCY", "8")),
+    requests_per_minute=int(os.getenv("CAPTION_REQUESTS_PER_MINUTE", "60"))
+)
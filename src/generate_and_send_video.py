@@ -1,8 +1,9 @@
 import os
-import random
-import requests
-from openai import OpenAI
+import asyncio
 from dotenv import load_dotenv
+from http_client import http_client
+from asset_catalog import asset_catalog
+from caption_service import caption_service
 
 load_dotenv()
 
@@ -10,35 +11,30 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 USER_ASSETS_FOLDER = "user_assets"
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def generate_caption(topic="saturn portals"):
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a viral short video content creator."},
-            {"role": "user", "content": f"Write a short engaging caption for a video about: {topic}"}
-        ]
-    )
-    return response.choices[0].message.content.strip()
-
-
-def get_random_video():
-    videos = [
-        os.path.join(USER_ASSETS_FOLDER, file)
-        for file in os.listdir(USER_ASSETS_FOLDER)
-        if file.lower().endswith((".mp4", ".mov", ".mkv"))
-    ]
-    if not videos:
+async def generate_caption(topic="saturn portals", cached=True):
+    # Cached by (model, prompt hash); repeated topics never hit the API
+    return await caption_service.generate(topic, cached=cached)
+
+
+async def generate_captions(topics):
+    return await caption_service.generate_many(topics)
+
+
+def get_random_video(**filters):
+    # Only new or changed files are probed, including files edited in place
+    asset_catalog.refresh(USER_ASSETS_FOLDER)
+    video = asset_catalog.pick(folder=USER_ASSETS_FOLDER, **filters)
+    if not video:
         raise FileNotFoundError("❌ No videos found in 'user_assets' folder.")
-    return random.choice(videos)
+    asset_catalog.mark_used(video)
+    return video
 
 
-def send_to_telegram(video_path, caption):
+async def send_to_telegram(video_path, caption):
     print("[*] Sending video to Telegram...")
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendVideo"
     with open(video_path, "rb") as video_file:
-        response = requests.post(
+        response = await http_client.post(
             url,
             data={"chat_id": TELEGRAM_CHAT_ID, "caption": caption},
             files={"video": video_file}
@@ -48,9 +44,10 @@ def send_to_telegram(video_path, caption):
     print("✅ Video sent successfully!")
 
 
-def main():
+async def main():
     print("[*] Generating caption...")
-    caption = generate_caption()
+    # Every post uses the same topic, so a cached caption would repeat on every video
+    caption = await generate_caption(cached=False)
 
     print("[*] Selecting video...")
     video_path = get_random_video()
@@ -58,8 +55,11 @@ def main():
     print(f"[*] Video selected: {os.path.basename(video_path)}")
     print(f"[*] Caption: {caption}")
 
-    send_to_telegram(video_path, caption)
+    try:
+        await send_to_telegram(video_path, caption)
+    finally:
+        await http_client.aclose()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+import os
+import asyncio
+import random
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("http_client")
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Methods that are safe to resend after the server has seen the request
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HttpClient:
+    """Shared async HTTP client with keep-alive pooling, per-host limits and retries"""
+
+    def __init__(self,
+                 max_connections: int = 100,
+                 max_connections_per_host: int = 10,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 10.0,
+                 timeout: float = 30.0):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled client on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the semaphore capping concurrent requests to one host"""
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_limits[host]
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Exponential backoff with jitter, honouring Retry-After when present"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool, retrying transient failures"""
+        method = method.upper()
+        client = self._get_client()
+        files = kwargs.get("files") or {}
+
+        async with self._host_limit(url):
+            for attempt in range(self.max_retries + 1):
+                # Rewind uploads so a retry resends the whole file
+                for value in files.values():
+                    fileobj = value[1] if isinstance(value, tuple) else value
+                    if hasattr(fileobj, "seek"):
+                        fileobj.seek(0)
+
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    # Nothing reached the server, so any method can be retried
+                    error, response = e, None
+                except httpx.TransportError as e:
+                    if method not in IDEMPOTENT_METHODS:
+                        raise
+                    error, response = e, None
+                else:
+                    if response.status_code not in RETRY_STATUSES or method not in IDEMPOTENT_METHODS:
+                        return response
+                    error = f"HTTP {response.status_code}"
+
+                if attempt == self.max_retries:
+                    if response is not None:
+                        return response
+                    raise error
+
+                delay = self._backoff(attempt, response)
+                logger.warning(f"{method} {url} failed ({error}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
+
+http_client = HttpClient(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    max_connections_per_host=int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10")),
+    max_retries=int(os.getenv("HTTP_MAX_RETRIES", "3"))
+)
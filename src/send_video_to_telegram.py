@@ -1,6 +1,7 @@
 import os
-import requests
+import asyncio
 from dotenv import load_dotenv
+from http_client import http_client
 
 # Load .env
 load_dotenv()
@@ -9,7 +10,7 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 VIDEO_PATH = "sample_video.mp4"  # Replace this later with real videos
 
-def send_video(video_path):
+async def send_video(video_path):
     if not TELEGRAM_TOKEN or not CHAT_ID:
         raise ValueError("Missing Telegram credentials in .env")
 
@@ -17,12 +18,18 @@ def send_video(video_path):
     with open(video_path, 'rb') as video:
         files = {'video': video}
         data = {'chat_id': CHAT_ID, 'caption': '🚀 AI Generated Video'}
-        response = requests.post(url, files=files, data=data)
+        response = await http_client.post(url, files=files, data=data)
 
-    if response.ok:
+    if response.is_success:
         print("✅ Video sent successfully!")
     else:
         print("❌ Failed to send:", response.text)
 
+async def main():
+    try:
+        await send_video(VIDEO_PATH)
+    finally:
+        await http_client.aclose()
+
 if __name__ == "__main__":
-    send_video(VIDEO_PATH)
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Backend packages are imported as backend.<area>.<module>; the scripts in
+# src/ import each other as top-level modules
+for path in (ROOT / 'project', ROOT / 'src'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+@pytest.fixture(scope='session')
+def tiny_model_path(tmp_path_factory):
+    """A randomly initialised one-layer Mistral model with a word-level tokenizer."""
+    torch = pytest.importorskip('torch')
+    transformers = pytest.importorskip('transformers')
+    tokenizers = pytest.importorskip('tokenizers')
+
+    path = tmp_path_factory.mktemp('tiny_model')
+
+    vocab = {'[UNK]': 0, '[PAD]': 1, '</s>': 2, **{f"w{i}": i for i in range(3, 64)}}
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token='[UNK]'))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.WhitespaceSplit()
+    tokenizer.decoder = tokenizers.decoders.WordPiece(prefix='##')
+    transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token='[UNK]', pad_token='[PAD]', eos_token='</s>'
+    ).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = transformers.MistralConfig(
+        vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=1,
+        num_attention_heads=2, num_key_value_heads=1, max_position_embeddings=512,
+        # No end-of-sequence token, so the random model never stops early
+        pad_token_id=1, eos_token_id=None
+    )
+    transformers.MistralForCausalLM(config).save_pretrained(path)
+    return str(path)
+
+class MockOpenAIServer:
+    """
+    Local OpenAI-compatible chat completions endpoint.
+
+    `reply` maps a request body to the completion text, or to a
+    (status, error message) tuple to fail the request. Usage counts one
+    token per whitespace-separated word.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.latency = 0.0
+        self.reply = lambda body: 'ok'
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_port}/v1"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                server.requests.append(body)
+                time.sleep(server.latency)
+
+                reply = server.reply(body)
+                if isinstance(reply, tuple):
+                    status, payload = reply[0], {'error': {'message': reply[1], 'type': 'invalid_request_error'}}
+                else:
+                    status = 200
+                    prompt_tokens = sum(len(m['content'].split()) for m in body['messages'])
+                    completion_tokens = len(reply.split())
+                    payload = {
+                        'id': f"chatcmpl-{len(server.requests)}",
+                        'object': 'chat.completion',
+                        'created': int(time.time()),
+                        'model': body['model'],
+                        'choices': [{
+                            'index': 0,
+                            'message': {'role': 'assistant', 'content': reply},
+                            'finish_reason': 'stop'
+                        }],
+                        'usage': {
+                            'prompt_tokens': prompt_tokens,
+                            'completion_tokens': completion_tokens,
+                            'total_tokens': prompt_tokens + completion_tokens
+                        }
+                    }
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+@pytest.fixture
+def openai_server():
+    server = MockOpenAIServer()
+    yield server
+    server.close()
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from asset_catalog import AssetCatalog
+
+@pytest.fixture
+def folder(tmp_path):
+    path = tmp_path / 'assets'
+    path.mkdir()
+    (path / 'a.mp4').write_bytes(b'first')
+    return path
+
+def fake_probe(path):
+    with open(path, 'rb') as f:
+        return {'duration': float(len(f.read())), 'width': 1080, 'height': 1920}
+
+def edit_in_place(path, data):
+    folder_mtime = os.stat(path.parent).st_mtime_ns
+    stat = os.stat(path)
+    path.write_bytes(data)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert os.stat(path.parent).st_mtime_ns == folder_mtime
+
+def assets(catalog):
+    return {os.path.basename(a['path']): a for a in catalog.query(limit=100)}
+
+def test_unchanged_folder_is_skipped_between_rescans(folder, tmp_path):
+    catalog = AssetCatalog(str(tmp_path / 'catalog.db'), probe=fake_probe, rescan_interval=3600)
+
+    assert catalog.refresh(str(folder)) == 1
+    edit_in_place(folder / 'a.mp4', b'edited in place')
+
+    assert catalog.refresh(str(folder)) == 0
+    assert catalog.refresh(str(folder), force=True) == 1
+    assert assets(catalog)['a.mp4']['duration'] == len(b'edited in place')
+
+def test_in_place_edits_are_picked_up(folder, tmp_path):
+    catalog = AssetCatalog(str(tmp_path / 'catalog.db'), probe=fake_probe, rescan_interval=0)
+    catalog.refresh(str(folder))
+    before = assets(catalog)['a.mp4']
+
+    edit_in_place(folder / 'a.mp4', b'edited in place')
+
+    assert catalog.refresh(str(folder)) == 1
+    after = assets(catalog)['a.mp4']
+    assert after['content_hash'] != before['content_hash']
+    assert after['duration'] == len(b'edited in place')
+
+def test_new_process_rescans_a_stale_index(folder, tmp_path):
+    db_path = str(tmp_path / 'catalog.db')
+    AssetCatalog(db_path, probe=fake_probe).refresh(str(folder))
+    edit_in_place(folder / 'a.mp4', b'edited in place')
+
+    # A later run of the posting script starts with a fresh catalog object
+    catalog = AssetCatalog(db_path, probe=fake_probe)
+
+    assert catalog.refresh(str(folder)) == 1
+    # Unchanged files are only stat'ed, not re-probed
+    assert catalog.refresh(str(folder), force=True) == 0
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'folder': 'assets'},
+    {'folder': 'assets', 'unused_for': 3600},
+    {'folder': 'assets', 'min_duration': 5, 'aspect': 0.5625},
+    {'unused_for': 3600},
+    {'unused_for': 3600, 'max_duration': 30}
+])
+def test_lru_queries_walk_an_index_without_sorting(tmp_path, filters):
+    catalog = AssetCatalog(str(tmp_path / 'catalog.db'), probe=fake_probe)
+    statements = []
+    catalog._conn.set_trace_callback(statements.append)
+
+    catalog.query(**filters)
+
+    [sql] = [s for s in statements if s.startswith('SELECT * FROM assets')]
+    plan = [row[3] for row in catalog._conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    assert len(plan) == 1
+    assert 'USING INDEX idx_assets_' in plan[0] and 'last_used' in plan[0]
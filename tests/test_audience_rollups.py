@@ -0,0 +1,50 @@
+from backend.growth.audience_rollups import AudienceRollup, RollupEngine
+
+def events(locations):
+    return [{'age': 30, 'device': 'mobile', 'location': location, 'hour': 12, 'likes': 1} for location in locations]
+
+def test_missing_locations_are_reported_as_other():
+    rollup = AudienceRollup()
+    rollup.add_events(events([None] * 6 + ['US'] * 3 + ['UK']))
+
+    locations = rollup.insights(top_locations=2)['demographics']['locations']
+    assert locations == {'US': 0.3, 'UK': 0.1, 'Other': 0.6}
+
+def test_peak_hours_only_include_hours_with_views():
+    rollup = AudienceRollup()
+    rollup.add_events([{'hour': 20, 'likes': 1}] * 3 + [{'hour': 8}])
+
+    peaks = rollup.insights(peak_hours=3)['behavior']['peak_viewing_times']
+    assert peaks == [{'hour': 8, 'engagement': 0.0}, {'hour': 20, 'engagement': 1.0}]
+    assert AudienceRollup().insights()['behavior']['peak_viewing_times'] == []
+
+def test_sketch_is_allocated_only_past_the_exact_limit():
+    rollup = AudienceRollup()
+    rollup.add_events(events(['US', 'UK']))
+    assert rollup.locations.table is None
+
+    rollup.add_events(events([f"city{i}" for i in range(100)] + ['US'] * 50))
+    assert rollup.locations.table is not None
+    assert rollup.locations.top(1) == [('US', 51)]
+
+    restored = AudienceRollup.from_bytes(rollup.to_bytes())
+    assert restored.views == rollup.views
+    assert restored.locations.top(1) == [('US', 51)]
+
+def test_rollups_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / 'rollups.db')
+    RollupEngine(db_path=db_path).add_events('c1', events(['US'] * 4), vertical='tech', day=100)
+
+    engine = RollupEngine(db_path=db_path)
+    assert engine.get('content', 'c1').views == 4
+    assert engine.get('content', 'c1', [100]).views == 4
+    assert engine.get('vertical', 'tech').views == 4
+
+def test_old_day_windows_are_dropped(tmp_path):
+    engine = RollupEngine(db_path=str(tmp_path / 'rollups.db'), retention_days=2)
+    for day in range(100, 105):
+        engine.add_events('c1', events(['US']), day=day)
+
+    assert engine.get('content', 'c1', range(100, 105)).views == 2
+    assert engine.get('content', 'c1').views == 5
+    assert RollupEngine(db_path=str(tmp_path / 'rollups.db')).get('content', 'c1', [100]).views == 0
@@ -0,0 +1,108 @@
+import json
+import asyncio
+import hashlib
+
+from backend.growth.audience_sync import AdPlatform, AudienceSyncEngine
+
+class RecordingPlatform(AdPlatform):
+    name = 'recording'
+    max_batch_size = 2
+
+    def __init__(self):
+        self.created = []
+        self.added = {}
+        self.removed = {}
+        self.batch_sizes = []
+
+    async def create_audience(self, segment_name):
+        self.created.append(segment_name)
+        return f"audience_{segment_name}"
+
+    async def add_members(self, audience_id, hashes):
+        self.batch_sizes.append(len(hashes))
+        self.added.setdefault(audience_id, []).extend(hashes)
+
+    async def remove_members(self, audience_id, hashes):
+        self.batch_sizes.append(len(hashes))
+        self.removed.setdefault(audience_id, []).extend(hashes)
+
+def sha(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+def test_hash_identifiers_normalises(tmp_path):
+    engine = AudienceSyncEngine([], state_dir=str(tmp_path), hash_chunk_size=2)
+    assert engine.hash_identifiers([' A@x.com', 'b@x.com', 'c']) == [sha('a@x.com'), sha('b@x.com'), sha('c')]
+
+def test_second_sync_sends_only_the_diff(tmp_path):
+    platform = RecordingPlatform()
+    engine = AudienceSyncEngine([platform], state_dir=str(tmp_path))
+
+    first = asyncio.run(engine.sync({'high': ['a', 'b', 'c']}, audience_key='content1'))
+    assert first == {'high': {'recording': 'audience_content1_high'}}
+    assert sorted(platform.added['audience_content1_high']) == sorted(map(sha, 'abc'))
+
+    platform.added.clear()
+    asyncio.run(engine.sync({'high': ['b', 'c', 'd']}, audience_key='content1'))
+    assert platform.created == ['content1_high']
+    assert platform.added['audience_content1_high'] == [sha('d')]
+    assert platform.removed['audience_content1_high'] == [sha('a')]
+
+def test_audience_keys_do_not_share_membership(tmp_path):
+    platform = RecordingPlatform()
+    engine = AudienceSyncEngine([platform], state_dir=str(tmp_path))
+
+    asyncio.run(engine.sync({'high': ['a', 'b']}, audience_key='content1'))
+    asyncio.run(engine.sync({'high': ['x']}, audience_key='content2'))
+
+    # Syncing content2 must not remove content1's viewers
+    assert platform.removed == {}
+    assert platform.created == ['content1_high', 'content2_high']
+    assert platform.added['audience_content2_high'] == [sha('x')]
+
+def write_ids(path, ids):
+    path.write_text(''.join(f"{i}\n" for i in ids))
+    return path
+
+def test_sync_files_streams_sorted_batches(tmp_path, monkeypatch):
+    platform = RecordingPlatform()
+    engine = AudienceSyncEngine([platform], state_dir=str(tmp_path / 'state'), hash_chunk_size=3)
+    # Nothing may be materialized as a whole segment
+    monkeypatch.setattr(engine, 'hash_identifiers', None)
+    monkeypatch.setattr(engine, '_load_state', None)
+
+    ids = [f"user{i}@x.com" for i in range(10)]
+    path = write_ids(tmp_path / 'high.ids', ids + ['USER3@x.com ', ''])
+
+    result = asyncio.run(engine.sync_files({'high': path}, audience_key='content1'))
+
+    assert result == {'high': {'recording': 'audience_content1_high'}}
+    added = platform.added['audience_content1_high']
+    assert added == sorted(map(sha, ids))
+    assert max(platform.batch_sizes) == platform.max_batch_size
+    assert sorted(p.name for p in (tmp_path / 'state').iterdir()) == ['recording']
+
+def test_sync_files_sends_only_the_diff(tmp_path):
+    platform = RecordingPlatform()
+    engine = AudienceSyncEngine([platform], state_dir=str(tmp_path / 'state'), hash_chunk_size=4)
+
+    asyncio.run(engine.sync_files({'high': write_ids(tmp_path / 'a.ids', 'abcdefg')}, audience_key='content1'))
+    platform.added.clear()
+    asyncio.run(engine.sync_files({'high': write_ids(tmp_path / 'b.ids', 'cdefghij')}, audience_key='content1'))
+
+    assert platform.created == ['content1_high']
+    assert sorted(platform.added['audience_content1_high']) == sorted(map(sha, 'hij'))
+    assert sorted(platform.removed['audience_content1_high']) == sorted(map(sha, 'ab'))
+    meta = json.loads((tmp_path / 'state' / 'recording' / 'content1_high.json').read_text())
+    assert meta['count'] == 8
+
+def test_sync_files_shares_state_with_in_memory_sync(tmp_path):
+    platform = RecordingPlatform()
+    engine = AudienceSyncEngine([platform], state_dir=str(tmp_path / 'state'))
+
+    asyncio.run(engine.sync({'high': list('abc')}, audience_key='content1'))
+    platform.added.clear()
+    asyncio.run(engine.sync_files({'high': write_ids(tmp_path / 'a.ids', 'abcd')}, audience_key='content1'))
+    asyncio.run(engine.sync({'high': list('abcd')}, audience_key='content1'))
+
+    assert platform.added == {'audience_content1_high': [sha('d')]}
+    assert platform.removed == {}
@@ -0,0 +1,104 @@
+import io
+import struct
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.ai import audio_encoding
+from backend.ai.audio_encoding import encode, encode_stream, negotiate
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, 'json'),
+    ('', 'json'),
+    ('*/*', 'json'),
+    ('audio/*', 'wav'),
+    ('audio/L16', 'pcm16'),
+    ('application/octet-stream', 'f32'),
+    # Highest q wins regardless of order; ties keep header order
+    ('audio/wav;q=0.5, audio/L16;q=0.9', 'pcm16'),
+    ('audio/l16;q=0.8, audio/wav;q=0.8', 'pcm16'),
+    ('text/html, audio/wav;q=0.1', 'wav'),
+    ('audio/wav;q=0.2, */*;q=0.1', 'wav'),
+    ('application/octet-stream;q=invalid, audio/wav;q=0.3', 'wav'),
+    # q=0 refuses a type, even through a wildcard
+    ('audio/wav;q=0, audio/*', 'pcm16'),
+    ('audio/wav;q=0, audio/l16;q=0, audio/*', None),
+    ('audio/wav;q=0, audio/L16;q=0.5', 'pcm16'),
+    ('text/html', None),
+    ('text/html, image/*', None),
+    ('*/*;q=0', None)
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+def test_opus_is_skipped_without_soundfile(monkeypatch):
+    monkeypatch.setattr(audio_encoding, 'soundfile', None)
+
+    assert negotiate('audio/ogg, audio/wav;q=0.5') == 'wav'
+    assert negotiate('audio/ogg') is None
+
+def test_wav_header_sizes_match_the_data():
+    samples = np.linspace(-0.5, 0.5, 1001, dtype=np.float32)
+
+    content_type, chunks = encode(samples, 'wav', 22050, chunk_size=256)
+    data = b''.join(bytes(chunk) for chunk in chunks)
+
+    assert content_type == 'audio/wav'
+    riff_size, = struct.unpack('<I', data[4:8])
+    channels, rate, byte_rate, block_align, bits = struct.unpack('<HIIHH', data[22:36])
+    data_size, = struct.unpack('<I', data[40:44])
+    assert (data[:4], data[8:12], data[36:40]) == (b'RIFF', b'WAVE', b'data')
+    assert riff_size == len(data) - 8
+    assert data_size == len(samples) * 2 == len(data) - 44
+    assert (channels, rate, byte_rate, block_align, bits) == (1, 22050, 44100, 2, 16)
+
+    soundfile = pytest.importorskip('soundfile')
+    decoded, decoded_rate = soundfile.read(io.BytesIO(data), dtype='int16')
+    assert decoded_rate == 22050
+    assert decoded.tolist() == (samples * 32767).astype(np.int16).tolist()
+
+def test_streamed_wav_header_is_open_ended():
+    async def chunks():
+        yield np.zeros(10, dtype=np.float32)
+        yield np.ones(5, dtype=np.float32)
+
+    async def collect():
+        return [bytes(chunk) async for chunk in encode_stream(chunks(), 'wav', 16000)]
+
+    header, *audio = asyncio.run(collect())
+
+    assert len(header) == 44
+    assert struct.unpack('<I', header[4:8])[0] == 0xFFFFFFFF
+    assert struct.unpack('<I', header[40:44])[0] == 0xFFFFFFFF - 36
+    assert [len(chunk) for chunk in audio] == [20, 10]
+
+def test_pcm16_clips_out_of_range_samples():
+    samples = np.array([-2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5], dtype=np.float32)
+
+    content_type, chunks = encode(samples, 'pcm16', 16000)
+    pcm = np.frombuffer(b''.join(bytes(chunk) for chunk in chunks), dtype='<i2')
+
+    assert content_type == 'audio/L16; rate=16000; channels=1'
+    assert pcm.tolist() == [-32767, -32767, -16383, 0, 16383, 32767, 32767]
+
+def test_f32_streams_the_samples_unchanged():
+    samples = np.array([0.25, -3.0], dtype=np.float32)
+
+    _, chunks = encode(samples, 'f32', 16000)
+
+    assert np.frombuffer(b''.join(bytes(chunk) for chunk in chunks), dtype='<f4').tolist() == [0.25, -3.0]
+
+@pytest.mark.parametrize('path', ['/synthesize', '/synthesize/stream'])
+def test_unsupported_accept_is_rejected_with_406(path):
+    pytest.importorskip('torchaudio')
+    from fastapi.testclient import TestClient
+    from backend.ai.inference_api import app
+
+    response = TestClient(app).post(
+        path,
+        json={'voice_id': 'narrator', 'text': 'Hello.', 'optimization_metrics': {}},
+        headers={'Accept': 'text/html'}
+    )
+
+    assert response.status_code == 406
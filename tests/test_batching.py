@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.ai.batching import DynamicBatcher
+
+def test_concurrent_submits_share_a_batch():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = DynamicBatcher(process, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert batcher.average_batch_size() == 5
+
+def test_batches_are_capped_at_max_batch_size():
+    batcher = DynamicBatcher(lambda items: items, max_batch_size=2, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+    assert batcher.stats['batches'] == 3
+
+def test_batch_errors_reach_every_caller():
+    def process(items):
+        raise RuntimeError('model failed')
+
+    batcher = DynamicBatcher(process, max_wait_ms=10)
+
+    async def main():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ['model failed', 'model failed']
+
+def test_mismatched_result_count_is_an_error():
+    batcher = DynamicBatcher(lambda items: items[:1], max_wait_ms=10)
+
+    async def main():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(main()))
+
+def test_exclusive_work_never_overlaps_batches():
+    active = []
+    overlap = []
+    lock = threading.Lock()
+
+    def busy(value):
+        with lock:
+            active.append(value)
+            overlap.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(value)
+        return value
+
+    batcher = DynamicBatcher(lambda items: [busy(tuple(items))] * len(items), max_wait_ms=5)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit(1),
+            batcher.run_exclusive(busy, 'stream'),
+            batcher.submit(2),
+            batcher.run_exclusive(busy, 'stream2')
+        )
+
+    asyncio.run(main())
+    assert max(overlap) == 1
+
+@pytest.mark.integration
+@pytest.mark.parametrize('concurrency', [1, 4, 16])
+def test_generate_throughput_with_batching(tiny_model_path, monkeypatch, concurrency):
+    """Load test: requests per second with and without batching on a tiny model."""
+    pytest.importorskip('datasets')
+    monkeypatch.setenv('INFERENCE_MODEL_PATH', tiny_model_path)
+    from backend.ai.model_trainer import ModelTrainer
+
+    throughput = {}
+    for max_batch_size in (1, 8):
+        monkeypatch.setenv('GENERATE_MAX_BATCH_SIZE', str(max_batch_size))
+        trainer = ModelTrainer()
+
+        async def main():
+            await trainer.ensure_loaded()
+            started = time.perf_counter()
+            await asyncio.gather(*(trainer.batcher.submit((f"w{5 + i % 8}", '')) for i in range(concurrency * 2)))
+            return concurrency * 2 / (time.perf_counter() - started)
+
+        throughput[max_batch_size] = asyncio.run(main())
+
+    print(f"concurrency={concurrency}: {throughput[1]:.1f} req/s unbatched, {throughput[8]:.1f} req/s batched")
+    if concurrency > 1:
+        assert throughput[8] > throughput[1]
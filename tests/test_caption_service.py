@@ -0,0 +1,100 @@
+import json
+import time
+import asyncio
+import itertools
+
+import pytest
+
+pytest.importorskip('openai')
+from openai import AsyncOpenAI
+
+from caption_service import BATCH_SYSTEM_PROMPT, CaptionService
+
+def caption_reply():
+    counter = itertools.count(1)
+
+    def reply(body):
+        system, user = (m['content'] for m in body['messages'])
+        if system == BATCH_SYSTEM_PROMPT:
+            topics = user.splitlines()[1:]
+            return json.dumps({'captions': [f"Caption {next(counter)} #shorts" for _ in topics]})
+        return f"Caption {next(counter)} #shorts"
+
+    return reply
+
+@pytest.fixture
+def service(openai_server, tmp_path):
+    openai_server.reply = caption_reply()
+    return CaptionService(
+        cache_path=str(tmp_path / 'captions.db'),
+        requests_per_minute=6000,
+        client=AsyncOpenAI(base_url=openai_server.base_url, api_key='test', max_retries=0)
+    )
+
+def test_cache_hits_skip_the_api(service, openai_server):
+    openai_server.latency = 0.05
+    topics = [f"topic {i}" for i in range(10)]
+
+    async def run():
+        started = time.perf_counter()
+        first = [await service.generate(topic) for topic in topics]
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        second = [await service.generate(topic) for topic in topics]
+        warm = time.perf_counter() - started
+        return first, second, cold, warm
+
+    first, second, cold, warm = asyncio.run(run())
+
+    print(
+        f"\ncaptions: cold {cold * 1000:.0f} ms / {service.stats['tokens_used']} tokens, "
+        f"cached {warm * 1000:.0f} ms, saved {service.stats['tokens_saved']} tokens"
+    )
+    assert second == first
+    assert len(openai_server.requests) == 10
+    assert service.stats['cache_hits'] == 10
+    assert service.stats['tokens_saved'] == service.stats['tokens_used']
+    assert warm < cold / 5
+
+def test_batched_generation_sends_one_request_per_batch(service, openai_server):
+    topics = [f"topic {i}" for i in range(25)]
+
+    captions = asyncio.run(service.generate_many(topics))
+
+    assert len(set(captions)) == 25
+    assert len(openai_server.requests) == 2
+    # Each caption was cached individually
+    assert asyncio.run(service.generate('topic 7')) == captions[7]
+    assert len(openai_server.requests) == 2
+
+def test_uncached_generation_gives_fresh_captions(service, openai_server):
+    async def run():
+        cached = await service.generate('saturn portals')
+        fresh = [await service.generate('saturn portals', cached=False) for _ in range(2)]
+        return cached, fresh
+
+    cached, fresh = asyncio.run(run())
+
+    assert len({cached, *fresh}) == 3
+    assert len(openai_server.requests) == 3
+    # The fresh captions neither read nor replace the cached one
+    assert asyncio.run(service.generate('saturn portals')) == cached
+
+def test_each_video_gets_a_new_caption(service, openai_server, monkeypatch):
+    pytest.importorskip('dotenv')
+    import generate_and_send_video
+
+    sent = []
+
+    async def send_to_telegram(video_path, caption):
+        sent.append(caption)
+
+    monkeypatch.setattr(generate_and_send_video, 'caption_service', service)
+    monkeypatch.setattr(generate_and_send_video, 'get_random_video', lambda: 'video.mp4')
+    monkeypatch.setattr(generate_and_send_video, 'send_to_telegram', send_to_telegram)
+
+    for _ in range(2):
+        asyncio.run(generate_and_send_video.main())
+
+    assert len(set(sent)) == 2
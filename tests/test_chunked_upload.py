@@ -0,0 +1,172 @@
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.publish.chunked_upload import ChunkedUploader, UploadError
+
+CHUNK = 1024
+
+class FlakyUploadServer:
+    """
+    Resumable upload endpoint that injects failures.
+
+    `faults` maps (chunk start, attempt number) to a status code to answer
+    with, 'drop' to close the connection without a response, or 'lose' to
+    acknowledge the chunk without storing it. Stored chunks are answered
+    with 308 and a Range header covering the contiguous bytes received from
+    the start (no header if there are none), or 200 once every byte has
+    arrived. `short_range` holds (chunk start, attempt number) pairs whose
+    last byte is not stored. A PUT with `Content-Range: bytes */total`
+    queries the committed range.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.data = bytearray(total)
+        self.received = set()
+        self.faults = {}
+        self.attempts = Counter()
+        self.short_range = set()
+        self.status_queries = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/upload"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def committed(self):
+        committed = 0
+        while committed in self.received:
+            committed += 1
+        return committed
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_PUT(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                content_range = self.headers['Content-Range'].split()[1].split('/')[0]
+
+                with server._lock:
+                    if content_range == '*':
+                        server.status_queries += 1
+                        fault = None
+                    else:
+                        start, end = map(int, content_range.split('-'))
+                        server.attempts[start] += 1
+                        fault = server.faults.get((start, server.attempts[start]))
+                        if fault is None:
+                            if (start, server.attempts[start]) in server.short_range:
+                                end -= 1
+                            server.data[start:end + 1] = body[:end + 1 - start]
+                            server.received.update(range(start, end + 1))
+                    committed = server.committed()
+
+                if fault == 'drop':
+                    self.close_connection = True
+                    return
+                if fault not in (None, 'lose'):
+                    self.send_response(fault)
+                elif committed == server.total:
+                    self.send_response(200)
+                else:
+                    self.send_response(308)
+                    if committed:
+                        self.send_header('Range', f"bytes=0-{committed - 1}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        return Handler
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+@pytest.fixture
+def payload(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(os.urandom(CHUNK * 4 + 100))
+    return path
+
+@pytest.fixture
+def server(payload):
+    server = FlakyUploadServer(payload.stat().st_size)
+    yield server
+    server.close()
+
+@pytest.fixture
+def uploader(tmp_path):
+    return ChunkedUploader(chunk_size=CHUNK, checkpoint_dir=str(tmp_path / 'checkpoints'), max_retries=2, backoff_base=0)
+
+def test_transient_failures_are_retried(uploader, server, payload):
+    server.faults = {(CHUNK, 1): 503, (2 * CHUNK, 1): 'drop', (2 * CHUNK, 2): 500}
+
+    result = uploader.upload(str(payload), server.url)
+
+    assert result['success'] and result['chunks'] == 5
+    assert bytes(server.data) == payload.read_bytes()
+    assert server.attempts[CHUNK] == 2
+    assert server.attempts[2 * CHUNK] == 3
+
+def test_interrupted_upload_resumes_from_checkpoint(uploader, server, payload):
+    server.faults = {(2 * CHUNK, attempt): 503 for attempt in (1, 2, 3)}
+
+    with pytest.raises(UploadError):
+        uploader.upload(str(payload), server.url)
+
+    server.faults.clear()
+    before = server.attempts.copy()
+    result = uploader.upload(str(payload), server.url)
+
+    assert result['resumed_chunks'] == 2
+    assert set(server.attempts - before) == {2 * CHUNK, 3 * CHUNK, 4 * CHUNK}
+    assert bytes(server.data) == payload.read_bytes()
+
+def test_resume_incomplete_on_the_last_chunk_is_not_success(uploader, server, payload):
+    # The server never stores the last chunk, so the upload cannot complete
+    server.faults = {(4 * CHUNK, attempt): 'lose' for attempt in (1, 2, 3)}
+
+    with pytest.raises(UploadError, match='Chunk 4'):
+        uploader.upload(str(payload), server.url)
+
+def test_resume_incomplete_without_range_is_retried(uploader, server, payload):
+    # A 308 with no Range header means the server persisted nothing
+    server.faults = {(0, 1): 308}
+
+    uploader.upload(str(payload), server.url)
+
+    assert server.attempts[0] == 2
+    assert bytes(server.data) == payload.read_bytes()
+
+def test_partially_stored_chunk_is_resent(uploader, server, payload):
+    server.short_range = {(CHUNK, 1)}
+
+    uploader.upload(str(payload), server.url)
+
+    assert server.attempts[CHUNK] == 2
+    assert bytes(server.data) == payload.read_bytes()
+    assert server.attempts[0] == 1
+
+def test_parallel_upload_confirms_the_committed_offset(uploader, server, payload):
+    result = uploader.upload(str(payload), server.url, max_workers=4)
+
+    assert result['success'] and result['chunks'] == 5
+    assert bytes(server.data) == payload.read_bytes()
+    assert server.status_queries == 1
+    assert all(server.attempts[i * CHUNK] == 1 for i in range(5))
+
+def test_parallel_upload_resends_what_the_server_lost(uploader, server, payload):
+    server.faults = {(2 * CHUNK, 1): 'lose'}
+
+    uploader.upload(str(payload), server.url, max_workers=4)
+
+    assert bytes(server.data) == payload.read_bytes()
+    assert server.status_queries == 2
+    # Everything from the first missing byte is resent in order
+    assert [server.attempts[i * CHUNK] for i in range(5)] == [1, 1, 2, 2, 2]
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from backend.growth.email_scheduler import EmailScheduler, EmailSender, LocalSender, create_sender
+
+class CrashingSender(EmailSender):
+    async def send_batch(self, sends):
+        raise RuntimeError("worker died")
+
+def make_scheduler(tmp_path, **kwargs):
+    scheduler = EmailScheduler(db_path=str(tmp_path / 'schedule.db'), **kwargs)
+    scheduler.schedule([
+        {'recipient': f"user{i}@example.com", 'segment': 'new', 'template': 'welcome', 'subject': 'Hi', 'due_at': 0}
+        for i in range(3)
+    ])
+    return scheduler
+
+def test_unsupported_sender_is_rejected_at_startup():
+    assert isinstance(create_sender('local'), LocalSender)
+    with pytest.raises(ValueError, match='mailchimp'):
+        create_sender('mailchimp')
+
+def test_send_errors_are_logged_and_retried(tmp_path, caplog):
+    scheduler = make_scheduler(tmp_path, sender=CrashingSender(), max_attempts=3)
+
+    assert asyncio.run(scheduler.dispatch_due(now=10)) == 0
+
+    assert 'Error sending email batch of 3: worker died' in caplog.text
+    assert scheduler.stats()['pending'] == 3
+    assert scheduler.next_due() == 10 + scheduler.retry_delay
+
+def test_expired_leases_count_as_attempts(tmp_path):
+    scheduler = make_scheduler(tmp_path, lease_seconds=5, max_attempts=3)
+
+    # A worker claims the batch and dies without reporting back
+    assert [send['attempts'] for send in scheduler.claim_due(now=10)] == [0, 0, 0]
+    assert scheduler.claim_due(now=14) == []
+
+    assert [send['attempts'] for send in scheduler.claim_due(now=15)] == [1, 1, 1]
+    assert [send['attempts'] for send in scheduler.claim_due(now=20)] == [2, 2, 2]
+
+    # The third lost lease exhausts the sends instead of handing them out forever
+    assert scheduler.claim_due(now=25) == []
+    assert scheduler.stats() == {'pending': 0, 'leased': 0, 'sent': 0, 'failed': 3}
+    assert scheduler.next_due() is None
+
+def test_lost_leases_and_send_errors_share_the_attempt_budget(tmp_path):
+    scheduler = make_scheduler(tmp_path, sender=CrashingSender(), lease_seconds=5, max_attempts=2, retry_delay=1)
+
+    scheduler.claim_due(now=10)
+    assert asyncio.run(scheduler.dispatch_due(now=15)) == 0
+
+    assert scheduler.stats()['failed'] == 3
@@ -0,0 +1,164 @@
+import time
+import asyncio
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+from http_client import HttpClient
+
+class LocalServer:
+    """
+    Keep-alive HTTP/1.1 server that counts connections and injects failures.
+
+    /flaky answers 503 with Retry-After: 0 to its first `failures`
+    requests, /busy always answers 503 and /slow holds each request briefly
+    while tracking how many are in flight.
+    """
+
+    def __init__(self):
+        self.hits = Counter()
+        self.connections = set()
+        self.failures = 2
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this,
+            # delayed ACKs add ~40 ms to every keep-alive request
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+
+                with server._lock:
+                    server.hits[self.path] += 1
+                    server.connections.add(self.client_address)
+                    hits = server.hits[self.path]
+
+                status = 200
+                if self.path == '/busy' or (self.path == '/flaky' and hits <= server.failures):
+                    status = 503
+                elif self.path == '/slow':
+                    with server._lock:
+                        server.in_flight += 1
+                        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    time.sleep(0.05)
+                    with server._lock:
+                        server.in_flight -= 1
+
+                body = b'{"ok": true}'
+                self.send_response(status)
+                if status == 503:
+                    self.send_header('Retry-After', '0')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _respond
+            do_POST = _respond
+
+        return Handler
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+@pytest.fixture
+def server():
+    server = LocalServer()
+    yield server
+    server.close()
+
+def run(client, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+def test_requests_reuse_pooled_connections(server):
+    client = HttpClient()
+    count = 50
+
+    async def fetch():
+        started = time.perf_counter()
+        for _ in range(count):
+            (await client.get(f"{server.url}/ok")).raise_for_status()
+        pooled = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(count):
+            async with httpx.AsyncClient() as fresh:
+                (await fresh.get(f"{server.url}/ok")).raise_for_status()
+        return pooled, time.perf_counter() - started
+
+    pooled, unpooled = run(client, fetch())
+
+    print(
+        f"\n{count} GETs: pooled {pooled / count * 1000:.2f} ms/req, "
+        f"new client per request {unpooled / count * 1000:.2f} ms/req"
+    )
+    # 1 pooled connection plus one per unpooled request
+    assert len(server.connections) == 1 + count
+    assert pooled < unpooled
+
+def test_idempotent_requests_retry_transient_errors(server):
+    client = HttpClient(max_retries=3)
+
+    response = run(client, client.get(f"{server.url}/flaky"))
+
+    assert response.status_code == 200
+    assert server.hits['/flaky'] == 3
+
+def test_retries_give_up_with_the_last_response(server):
+    client = HttpClient(max_retries=2)
+
+    response = run(client, client.get(f"{server.url}/busy"))
+
+    assert response.status_code == 503
+    assert server.hits['/busy'] == 3
+
+def test_posts_are_not_resent_after_the_server_saw_them(server):
+    client = HttpClient(max_retries=3)
+
+    response = run(client, client.post(f"{server.url}/busy", data={'chat_id': '1'}))
+
+    assert response.status_code == 503
+    assert server.hits['/busy'] == 1
+
+def test_connect_errors_are_retried_for_any_method(server, caplog):
+    client = HttpClient(max_retries=1, backoff_base=0)
+    port = server._httpd.server_port
+    server.close()
+
+    with pytest.raises(httpx.ConnectError):
+        run(client, client.post(f"http://127.0.0.1:{port}/gone"))
+    assert f"POST http://127.0.0.1:{port}/gone failed" in caplog.text
+
+def test_per_host_concurrency_is_capped(server):
+    client = HttpClient(max_connections_per_host=2)
+
+    async def fetch_all():
+        return await asyncio.gather(*(client.get(f"{server.url}/slow") for _ in range(8)))
+
+    run(client, fetch_all())
+
+    assert server.hits['/slow'] == 8
+    assert server.max_in_flight == 2
@@ -0,0 +1,32 @@
+import pytest
+
+from backend.ai.lazy_model import LazyModel, readiness, READY
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Register test models in a copy of the global registry, dropped after each test."""
+    monkeypatch.setattr(LazyModel, 'registry', dict(LazyModel.registry))
+    return LazyModel.registry
+
+def test_readiness_waits_only_for_required_models():
+    required = LazyModel('test_required', lambda: 'model')
+    LazyModel('test_on_demand', lambda: 'model')
+
+    assert readiness(['test_required'])['ready'] is False
+    assert readiness([])['ready'] is True
+
+    required.get()
+    status = readiness(['test_required'])
+    assert status['ready'] is True
+    assert status['models']['test_required']['state'] == READY
+
+def test_unregistered_model_is_not_reported(registry):
+    LazyModel('test_unregistered', lambda: 'model', register=False)
+    assert 'test_unregistered' not in readiness([])['models']
+    assert 'test_unregistered' not in registry
+
+def test_models_from_earlier_tests_are_gone(registry):
+    assert not any(name.startswith('test_') for name in registry)
+
+def test_unknown_required_model_is_not_ready():
+    assert readiness(['test_missing'])['ready'] is False
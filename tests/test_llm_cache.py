@@ -0,0 +1,37 @@
+from backend.growth.llm_cache import LLMResponseCache
+
+PROMPT = (
+    "Create a concise summary of the main points from this content: Saturn's rings are "
+    "mostly water ice and they are slowly raining down onto the planet over millions of years"
+)
+
+def test_exact_and_semantic_hits():
+    cache = LLMResponseCache(similarity_threshold=0.9)
+    cache.put('summary', PROMPT, 'cached summary')
+
+    assert cache.get('summary', PROMPT) == 'cached summary'
+    assert cache.get('summary', PROMPT + ' indeed') == 'cached summary'
+    assert cache.get('summary', 'Write a poem about the ocean at night') is None
+    # Namespaces never match each other
+    assert cache.get('tutorial', PROMPT) is None
+    assert cache.stats()['exact_hits'] == 1
+    assert cache.stats()['semantic_hits'] == 1
+
+def test_entries_store_only_non_zero_features():
+    cache = LLMResponseCache(dim=4096)
+    for i in range(100):
+        cache.put('summary', f"{PROMPT} variant {i}", 'response')
+
+    per_entry = cache.stats()['feature_bytes'] / 100
+    # A dense float32 vector would take 16 KB per entry
+    assert per_entry < 4096 * 4 / 20
+
+def test_lru_eviction_keeps_indexes_consistent():
+    cache = LLMResponseCache(max_entries=2)
+    for i in range(3):
+        cache.put('summary', f"prompt number {i} about topic {i}", f"response {i}")
+
+    assert cache.get('summary', 'prompt number 0 about topic 0') is None
+    assert cache.get('summary', 'prompt number 2 about topic 2') == 'response 2'
+    assert cache.stats()['evictions'] == 1
+    assert all(key in cache.entries for table in cache.indexes['summary'].tables for bucket in table.values() for key in bucket)
@@ -0,0 +1,48 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('openai')
+from openai import AsyncOpenAI
+
+from backend.growth.llm_client import AsyncLLMClient, RateLimiter
+
+def test_requests_stay_under_the_concurrency_limit(openai_server):
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'max_in_flight': 0}
+
+    def slow_reply(body):
+        with lock:
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        time.sleep(0.05)
+        with lock:
+            state['in_flight'] -= 1
+        return 'done'
+
+    openai_server.reply = slow_reply
+    client = AsyncLLMClient(
+        max_concurrency=2,
+        client=AsyncOpenAI(base_url=openai_server.base_url, api_key='test', max_retries=0)
+    )
+
+    async def main():
+        return await asyncio.gather(*(client.chat('system', f"prompt {i}") for i in range(6)))
+
+    assert asyncio.run(main()) == ['done'] * 6
+    assert state['max_in_flight'] == 2
+    assert client.usage['requests'] == 6
+
+def test_rate_limiter_waits_for_a_token():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.tokens = 0
+
+    async def main():
+        started = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - started
+
+    # 10 requests per second, so the next token arrives after ~0.1s
+    assert 0.08 <= asyncio.run(main()) < 0.5
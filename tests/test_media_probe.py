@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+
+from backend.video.media_probe import MediaProbe
+from backend.publish.uploader import VideoPublisher
+
+def box(box_type, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+def media_header(timescale, duration):
+    # version 0, flags, creation/modification time, timescale, duration
+    return b'\x00\x00\x00\x00' + struct.pack('>IIII', 0, 0, timescale, duration)
+
+def track_header(width, height):
+    return b'\x00\x00\x00\x00' + b'\x00' * 20 + b'\x00' * 8 + b'\x00' * 8 + b'\x00' * 36 + struct.pack('>II', width << 16, height << 16)
+
+def mp4(duration_seconds=12, handler=b'vide'):
+    stsd = b'\x00\x00\x00\x00' + struct.pack('>I', 1) + struct.pack('>I4s', 16, b'avc1') + b'\x00' * 8
+    trak = box(b'trak', box(b'tkhd', track_header(1080, 1920)) + box(b'mdia',
+        box(b'mdhd', media_header(1000, duration_seconds * 1000))
+        + box(b'hdlr', b'\x00' * 8 + handler + b'\x00' * 12)
+        + box(b'minf', box(b'stbl', box(b'stsd', stsd)))
+    ))
+    moov = box(b'moov', box(b'mvhd', media_header(1000, duration_seconds * 1000)) + trak)
+    return box(b'ftyp', b'isom\x00\x00\x02\x00') + moov + box(b'mdat', b'\x00' * 1024)
+
+@pytest.fixture
+def probe():
+    probe = MediaProbe()
+    probe.ffprobe_path = None
+    return probe
+
+@pytest.fixture
+def publisher(probe):
+    publisher = VideoPublisher()
+    publisher.probe = probe
+    return publisher
+
+def test_mp4_headers_are_parsed(tmp_path, probe):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(mp4(duration_seconds=12))
+
+    info = probe.probe(str(path))
+    assert info['duration'] == 12
+    assert (info['width'], info['height']) == (1080, 1920)
+    assert info['video_codec'] == 'avc1'
+
+def test_truncated_box_is_not_an_error(tmp_path, probe):
+    path = tmp_path / 'truncated.mp4'
+    path.write_bytes(box(b'ftyp', b'isom\x00\x00\x02\x00') + struct.pack('>I4s', 8, b'moov') + struct.pack('>I4s', 8, b'mvhd'))
+
+    assert probe.probe(str(path)) is None
+
+def test_unprobeable_containers_fall_back_to_extension_and_size(tmp_path, publisher):
+    avi = tmp_path / 'clip.avi'
+    avi.write_bytes(b'RIFF\x00\x00\x00\x00AVI LIST')
+    mov = tmp_path / 'clip.mov'
+    mov.write_bytes(b'\x00\x00\x00\x08wide' + b'\x00' * 64)
+
+    assert publisher._validate_video(str(avi))
+    assert publisher._validate_video(str(mov))
+    assert publisher._validate_tiktok_length(str(avi))
+    assert not publisher._validate_video(str(tmp_path / 'clip.mkv'))
+
+def test_probed_file_without_video_track_is_rejected(tmp_path, publisher):
+    path = tmp_path / 'audio_only.mp4'
+    path.write_bytes(mp4(handler=b'soun'))
+
+    assert not publisher._validate_video(str(path))
+
+def test_tiktok_length_uses_probed_duration(tmp_path, publisher):
+    short, long = tmp_path / 'short.mp4', tmp_path / 'long.mp4'
+    short.write_bytes(mp4(duration_seconds=30))
+    long.write_bytes(mp4(duration_seconds=600))
+
+    assert publisher._validate_tiktok_length(str(short))
+    assert not publisher._validate_tiktok_length(str(long))
@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.growth.metrics_store import MetricsStore
+
+def ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+@pytest.fixture
+def store(tmp_path):
+    return MetricsStore(db_path=str(tmp_path / 'performance.db'))
+
+def tables(store):
+    return sorted(
+        row[0] for row in store._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'samples_%'"
+        )
+    )
+
+def test_samples_are_routed_to_monthly_partitions(store):
+    store.write([
+        ('c1', ts(2024, 1, 31, 23, 59, 59), {'views': 1}, None),
+        ('c1', ts(2024, 2, 1, 0, 0, 0), {'views': 2}, '{"src": "api"}'),
+        ('c2', ts(2024, 2, 1, 0, 0, 1), {'views': 9}, None)
+    ])
+
+    assert tables(store) == ['samples_202401', 'samples_202402']
+    assert store._conn.execute("SELECT COUNT(*) FROM samples_202401").fetchone()[0] == 1
+    assert store._conn.execute("SELECT COUNT(*) FROM samples_202402").fetchone()[0] == 2
+
+    samples = store.samples('c1', ts(2024, 1, 31), ts(2024, 2, 2))
+    assert [s['views'] for s in samples] == [1, 2]
+    assert samples[1]['payload'] == '{"src": "api"}'
+    # A range inside one month reads only that partition
+    assert [s['views'] for s in store.samples('c1', ts(2024, 2, 1), ts(2024, 2, 2))] == [2]
+
+def test_late_samples_do_not_replace_closing_values(store):
+    store.write([('c1', ts(2024, 3, 5, 18), {'views': 300, 'revenue': 3.0}, None)])
+    store.write([('c1', ts(2024, 3, 5, 9), {'views': 100, 'revenue': 1.0}, None)])
+
+    [day] = store.daily('c1', since=ts(2024, 3, 1))
+    assert (day['date'], day['views'], day['revenue']) == ('2024-03-05', 300, 3.0)
+
+    store.write([('c1', ts(2024, 3, 5, 21), {'views': 400}, None)])
+
+    [day] = store.daily('c1', since=ts(2024, 3, 1))
+    assert day['views'] == 400
+    row = store._conn.execute("SELECT samples, last_ts FROM daily_rollup WHERE content_id = 'c1'").fetchone()
+    assert row == (3, ts(2024, 3, 5, 21))
+
+def test_rollback_forgets_partitions_created_in_the_transaction(store):
+    with pytest.raises(sqlite3.Error):
+        store.write([
+            ('c1', ts(2024, 3, 5), {'views': 1}, None),
+            # A dict payload can't be bound, failing after March's table was created
+            ('c1', ts(2024, 4, 5), {'views': 2}, {'not': 'json'})
+        ])
+
+    assert tables(store) == []
+    assert store._partitions == set()
+    assert store.daily('c1', since=0) == []
+
+    # The partition is created again rather than assumed to exist
+    store.write([('c1', ts(2024, 3, 5), {'views': 1}, None)])
+    assert tables(store) == ['samples_202403']
+
+def test_drop_before_keeps_rollups(store):
+    store.write([
+        ('c1', ts(2024, 1, 15), {'views': 10}, None),
+        ('c1', ts(2024, 2, 15), {'views': 20}, None),
+        ('c1', ts(2024, 3, 15), {'views': 30}, None)
+    ])
+
+    assert store.drop_before(ts(2024, 3, 1)) == ['samples_202401', 'samples_202402']
+
+    assert tables(store) == ['samples_202403']
+    assert store.samples('c1', ts(2024, 1, 1), ts(2024, 4, 1)) == [
+        {'timestamp': ts(2024, 3, 15), 'views': 30, 'engagement': None, 'retention': None, 'revenue': None, 'payload': None}
+    ]
+    assert [day['views'] for day in store.daily('c1', since=0)] == [30, 20, 10]
@@ -0,0 +1,54 @@
+import sys
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('transformers')
+pytest.importorskip('datasets')
+
+def make_trainer(monkeypatch, model_path, backend):
+    monkeypatch.setenv('INFERENCE_MODEL_PATH', model_path)
+    monkeypatch.setenv('INFERENCE_BACKEND', backend)
+    from backend.ai.model_trainer import ModelTrainer
+    return ModelTrainer()
+
+def linear_types(model):
+    return {type(module) for module in model.modules() if type(module).__name__ == 'Linear'}
+
+def test_fp32_backend_keeps_float_linear_layers(tiny_model_path, monkeypatch):
+    trainer = make_trainer(monkeypatch, tiny_model_path, 'fp32')
+
+    assert linear_types(trainer.model) == {torch.nn.Linear}
+    assert trainer.model.config.use_cache
+
+def test_int8_backend_quantizes_linear_layers(tiny_model_path, monkeypatch):
+    trainer = make_trainer(monkeypatch, tiny_model_path, 'int8')
+
+    assert linear_types(trainer.model) == {torch.ao.nn.quantized.dynamic.Linear}
+    assert trainer.inference_backend == 'int8'
+    [text] = trainer.generate_batch(['w5 w6'])
+    assert text.startswith('w5 w6')
+
+def test_onnx_backend_falls_back_to_fp32_without_optimum(tiny_model_path, monkeypatch, caplog):
+    # A None entry makes the import raise ImportError, as if it were not installed
+    for module in ('onnxruntime', 'optimum', 'optimum.onnxruntime'):
+        monkeypatch.setitem(sys.modules, module, None)
+    trainer = make_trainer(monkeypatch, tiny_model_path, 'onnx')
+
+    assert linear_types(trainer.model) == {torch.nn.Linear}
+    assert trainer.inference_backend == 'fp32'
+    assert 'falling back to fp32' in caplog.text
+
+def test_onnx_backend_loads_an_onnx_runtime_model(tiny_model_path, monkeypatch):
+    pytest.importorskip('onnxruntime')
+    onnx = pytest.importorskip('optimum.onnxruntime')
+    trainer = make_trainer(monkeypatch, tiny_model_path, 'onnx')
+
+    assert isinstance(trainer.model, onnx.ORTModelForCausalLM)
+    assert trainer.inference_backend == 'onnx'
+
+def test_unknown_backend_is_rejected(tiny_model_path, monkeypatch):
+    trainer = make_trainer(monkeypatch, tiny_model_path, 'fp16')
+
+    with pytest.raises(ValueError, match='Unknown inference backend'):
+        trainer.model
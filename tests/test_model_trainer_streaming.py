@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('transformers')
+pytest.importorskip('datasets')
+
+@pytest.fixture
+def trainer(tiny_model_path, monkeypatch):
+    monkeypatch.setenv('INFERENCE_MODEL_PATH', tiny_model_path)
+    from backend.ai.model_trainer import ModelTrainer
+    return ModelTrainer()
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+def test_stream_yields_text_and_records_ttft(trainer):
+    chunks = asyncio.run(collect(trainer.stream_content('w5 w6')))
+    assert ''.join(chunks).strip()
+    assert trainer.ttft_stats()['count'] == 1
+
+def test_stream_stops_before_stop_sequence(trainer):
+    torch.manual_seed(1)
+    text = ''.join(asyncio.run(collect(trainer.stream_content('w5 w6'))))
+    stop = ' ' + text.split()[3]
+
+    # Same seed, same sample: the stream must end right before the stop sequence
+    torch.manual_seed(1)
+    stopped = ''.join(asyncio.run(collect(trainer.stream_content('w5 w6', stop=[stop]))))
+    assert stopped == text[:text.index(stop)]
+
+def test_generate_errors_surface_immediately(trainer):
+    asyncio.run(trainer.ensure_loaded())
+
+    def fail(**kwargs):
+        raise RuntimeError('generation failed')
+
+    trainer.model.generate = fail
+
+    with pytest.raises(RuntimeError, match='generation failed'):
+        asyncio.run(collect(trainer.stream_content('w5')))
+
+def test_streams_and_batches_share_one_worker(trainer):
+    asyncio.run(trainer.ensure_loaded())
+    model = trainer.model
+    generate = model.generate
+    running = []
+    peak = []
+
+    def tracked(**kwargs):
+        running.append(1)
+        peak.append(len(running))
+        try:
+            return generate(**kwargs)
+        finally:
+            running.pop()
+
+    model.generate = tracked
+
+    async def main():
+        return await asyncio.gather(
+            collect(trainer.stream_content('w5')),
+            trainer.batcher.submit(('w7', '')),
+            collect(trainer.stream_content('w6'))
+        )
+
+    streamed, batched, _ = asyncio.run(main())
+    assert isinstance(batched, str)
+    assert max(peak) == 1
@@ -0,0 +1,123 @@
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip('openai')
+from openai import AsyncOpenAI
+
+from backend.growth.llm_client import AsyncLLMClient
+from backend.growth.multiplier import ContentMultiplier
+
+CONTENT = "Saturn's rings are mostly water ice, and they are slowly raining down onto the planet. " * 8
+
+def structured_reply(body):
+    response_format = body.get('response_format')
+    if response_format is None:
+        return "A tighter cut of the content for this platform."
+    schema = response_format['json_schema']['schema']
+    return json.dumps({
+        platform: {'adapted_content': "A tighter cut of the content for this platform."}
+        for platform in schema['required']
+    })
+
+def rejects_json_schema(body):
+    if 'response_format' in body:
+        return 400, "response_format json_schema is not supported with this model"
+    return "A tighter cut of the content for this platform."
+
+def make_multiplier(server, monkeypatch, model='gpt-4'):
+    monkeypatch.delenv('STRUCTURED_ADAPTATION_MODEL', raising=False)
+    multiplier = ContentMultiplier()
+    multiplier.llm = AsyncLLMClient(
+        model=model,
+        client=AsyncOpenAI(base_url=server.base_url, api_key='test', max_retries=0)
+    )
+    multiplier.structured_model = multiplier.llm.model
+    return multiplier
+
+def test_structured_model_defaults_to_client_model(monkeypatch):
+    monkeypatch.delenv('STRUCTURED_ADAPTATION_MODEL', raising=False)
+    multiplier = ContentMultiplier()
+    assert multiplier.structured_model == multiplier.llm.model
+
+    monkeypatch.setenv('STRUCTURED_ADAPTATION_MODEL', 'gpt-4o')
+    assert ContentMultiplier().structured_model == 'gpt-4o'
+
+def test_structured_adaptation_uses_fewer_requests_and_tokens(openai_server, monkeypatch):
+    openai_server.reply = structured_reply
+    openai_server.latency = 0.02
+    # The first request in a process pays for the client's lazy setup; keep it out of the comparison
+    warm_up = make_multiplier(openai_server, monkeypatch)
+    asyncio.run(warm_up.llm.complete([{'role': 'user', 'content': 'warm up'}]))
+
+    usage = {}
+    for mode in ('structured', 'per_platform'):
+        multiplier = make_multiplier(openai_server, monkeypatch, model='gpt-4o')
+        multiplier.adaptation_mode = mode
+        adaptations = asyncio.run(multiplier._create_platform_adaptations(CONTENT))
+
+        assert set(adaptations) == set(multiplier.platforms)
+        assert all(a['adapted_content'] for a in adaptations.values())
+        usage[mode] = dict(multiplier.llm.usage)
+
+    print(
+        "\nadaptation usage: " + ", ".join(
+            f"{mode} {u['requests']} requests {u['prompt_tokens']}+{u['completion_tokens']} tokens "
+            f"{u['latency'] * 1000:.0f} ms request time"
+            for mode, u in usage.items()
+        )
+    )
+    assert usage['structured']['requests'] == 1
+    assert usage['per_platform']['requests'] == 3
+    assert usage['structured']['prompt_tokens'] < usage['per_platform']['prompt_tokens']
+    assert usage['structured']['latency'] < usage['per_platform']['latency']
+
+def test_model_without_structured_outputs_falls_back_once(openai_server, monkeypatch):
+    openai_server.reply = rejects_json_schema
+    multiplier = make_multiplier(openai_server, monkeypatch)
+
+    first = asyncio.run(multiplier._create_platform_adaptations(CONTENT))
+    assert set(first) == set(multiplier.platforms)
+    assert multiplier.adaptation_stats == {'structured': 0, 'fallback': 1}
+    assert multiplier.structured_unsupported == {'gpt-4'}
+    assert len(openai_server.requests) == 1 + 3
+
+    # Later calls skip the request the model is known to reject
+    asyncio.run(multiplier._create_platform_adaptations(CONTENT))
+    assert len(openai_server.requests) == 1 + 3 + 3
+    assert not any('response_format' in body for body in openai_server.requests[4:])
+
+def test_other_bad_requests_fall_back_for_that_call_only(openai_server, monkeypatch):
+    calls = []
+
+    def context_too_long_once(body):
+        if 'response_format' in body:
+            calls.append(body)
+            if len(calls) == 1:
+                return 400, "This model's maximum context length is 8192 tokens"
+            return structured_reply(body)
+        return "A tighter cut of the content for this platform."
+
+    openai_server.reply = context_too_long_once
+    multiplier = make_multiplier(openai_server, monkeypatch, model='gpt-4o')
+
+    first = asyncio.run(multiplier._create_platform_adaptations(CONTENT))
+    assert set(first) == set(multiplier.platforms)
+    assert not multiplier.structured_unsupported
+
+    # The next call asks for structured output again
+    asyncio.run(multiplier._create_platform_adaptations(CONTENT))
+    assert len(calls) == 2
+    assert multiplier.adaptation_stats == {'structured': 1, 'fallback': 1}
+
+def test_malformed_structured_output_falls_back(openai_server, monkeypatch):
+    openai_server.reply = lambda body: '{"tiktok": {}}' if 'response_format' in body else "Adapted."
+    multiplier = make_multiplier(openai_server, monkeypatch, model='gpt-4o')
+
+    adaptations = asyncio.run(multiplier._create_platform_adaptations(CONTENT))
+
+    assert adaptations['youtube']['adapted_content'] == "Adapted."
+    assert multiplier.adaptation_stats['fallback'] == 1
+    # Bad output is not a reason to stop asking for structured responses
+    assert not multiplier.structured_unsupported
@@ -0,0 +1,58 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.growth.performance_database import PerformanceDatabase
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setenv('PERFORMANCE_DB_PATH', str(tmp_path / 'performance.db'))
+    return PerformanceDatabase()
+
+def random_metrics(size, seed=0):
+    rng = np.random.default_rng(seed)
+    views = rng.integers(1, 100_000, size)
+    return {
+        'views': views,
+        'likes': rng.integers(0, 5_000, size),
+        'comments': rng.integers(0, 500, size),
+        'shares': rng.integers(0, 2_000, size),
+        'growth_rate': rng.uniform(0, 20, size),
+        'average_watch_time': rng.uniform(0, 600, size),
+        'duration': rng.integers(1, 600, size),
+        'revenue': rng.uniform(0, 400, size)
+    }
+
+def scalar_scores(database, metrics):
+    names = list(metrics)
+    items = [dict(zip(names, (column[i].item() for column in metrics.values()))) for i in range(len(metrics[names[0]]))]
+    results = []
+    for item in items:
+        scores = database._calculate_performance_scores(item)
+        results.append((scores, asyncio.run(database._generate_recommendations(scores))))
+    return results
+
+def assert_batch_matches_scalar(database, metrics):
+    batch = database.score_batch(metrics)
+    mismatches = 0
+    for index, (scores, recommendations) in enumerate(scalar_scores(database, metrics)):
+        item = batch[index]
+        if item['scores'] != pytest.approx(scores, rel=1e-12) or item['recommendations'] != recommendations:
+            mismatches += 1
+    assert mismatches == 0
+
+def test_batch_scores_match_the_per_item_scorers(database):
+    metrics = random_metrics(1000)
+
+    assert_batch_matches_scalar(database, metrics)
+    # Every rule fires somewhere, so the flags are exercised both ways
+    counts = database.score_batch(metrics).counts()
+    assert all(0 < count < 1000 for count in counts.values())
+
+def test_missing_metrics_take_the_per_item_defaults(database):
+    metrics = random_metrics(200, seed=1)
+    for name in ('views', 'growth_rate', 'duration'):
+        del metrics[name]
+
+    assert_batch_matches_scalar(database, metrics)
@@ -0,0 +1,80 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.ai.phonemizer import PronunciationTable, Phonemizer, parse_cmudict
+
+CMUDICT = """\
+;;; sample
+hello HH AH0 L OW1
+hello(2) HH EH0 L OW1
+world W ER1 L D
+read R IY1 D
+"""
+
+def pronunciations(words=1000):
+    table = parse_cmudict(CMUDICT.splitlines())
+    table.update({f"word{i}": ['W', 'ER1', 'D'] for i in range(words)})
+    return table
+
+def build(table_dir):
+    PronunciationTable.build(pronunciations(), table_dir)
+    return True
+
+def load_and_lookup(dict_path, table_dir):
+    phonemizer = Phonemizer(dict_path=dict_path, table_dir=str(table_dir))
+    return phonemizer.phonemize('hello world')
+
+def test_lookup_and_fallback(tmp_path):
+    path = tmp_path / 'cmudict.dict'
+    path.write_text(CMUDICT)
+    phonemizer = Phonemizer(dict_path=str(path), table_dir=str(tmp_path / 'table'))
+
+    assert phonemizer.phonemize("Hello, world's 2") == [
+        'HH', 'AH0', 'L', 'OW1', 'W', 'ER1', 'L', 'D', 'Z', 'T', 'W', 'AA1'
+    ]
+    assert phonemizer.stats()['table_words'] == 3
+
+def test_concurrent_builds_do_not_clobber_each_other(tmp_path):
+    table_dir = tmp_path / 'table'
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+        assert all(pool.map(build, [table_dir] * 8))
+
+    table = PronunciationTable(table_dir)
+    assert table.size == 1003
+    assert table.get('hello') == ('HH', 'AH0', 'L', 'OW1')
+    assert table.get('word999') == ('W', 'ER1', 'D')
+    # No build or replaced directories are left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['table', 'table.lock']
+
+def test_concurrent_loads_share_one_build(tmp_path):
+    dict_path = tmp_path / 'cmudict.dict'
+    dict_path.write_text(CMUDICT)
+    table_dir = tmp_path / 'table'
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+        loads = [pool.submit(load_and_lookup, str(dict_path), table_dir) for _ in range(6)]
+        rebuilds = [pool.submit(build, table_dir) for _ in range(2)]
+        results = [future.result() for future in loads]
+        assert all(future.result() for future in rebuilds)
+
+    assert all(result == ['HH', 'AH0', 'L', 'OW1', 'W', 'ER1', 'L', 'D'] for result in results)
+
+def test_rebuild_replaces_an_existing_table(tmp_path):
+    table_dir = tmp_path / 'table'
+    PronunciationTable.build({'old': ['OW1', 'L', 'D']}, table_dir)
+    PronunciationTable.build(pronunciations(words=0), table_dir)
+
+    table = PronunciationTable(table_dir)
+    assert table.get('old') is None
+    assert table.get('read') == ('R', 'IY1', 'D')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['table', 'table.lock']
+
+def test_missing_table_is_built_only_once(tmp_path):
+    table_dir = tmp_path / 'table'
+    PronunciationTable.build({'old': ['OW1', 'L', 'D']}, table_dir, replace=False)
+    PronunciationTable.build(pronunciations(words=0), table_dir, replace=False)
+
+    assert PronunciationTable(table_dir).get('old') == ('OW1', 'L', 'D')
@@ -0,0 +1,88 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from backend.ai.prefix_cache import PrefixKVCache
+
+def fake_past(value, tokens=8):
+    """Legacy-format key/values for one layer: (key, value) of shape (1, 1, tokens, 4)."""
+    return ((torch.full((1, 1, tokens, 4), float(value)), torch.full((1, 1, tokens, 4), float(value))),)
+
+def ids(*tokens):
+    return torch.tensor([list(tokens)])
+
+def test_hit_returns_a_copy_of_the_cached_key_values():
+    cache = PrefixKVCache(min_prefix_tokens=4)
+    calls = []
+
+    def prefill():
+        calls.append(1)
+        return fake_past(1)
+
+    prefix = ids(5, 6, 7, 8)
+    first = cache.get(prefix, prefill)
+    second = cache.get(prefix.clone(), prefill)
+
+    assert len(calls) == 1
+    assert torch.equal(second[0][0], first[0][0])
+    # Generation extends key/values in place, so callers never share the cached tensors
+    second[0][0].add_(1)
+    assert torch.equal(cache.get(prefix, prefill)[0][0], first[0][0])
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+def test_short_prefixes_are_not_cached():
+    cache = PrefixKVCache(min_prefix_tokens=4)
+
+    assert cache.get(ids(5, 6, 7), lambda: fake_past(1)) is None
+    assert cache.stats()['entries'] == 0
+
+def test_least_recently_used_prefix_is_evicted():
+    cache = PrefixKVCache(max_entries=2, min_prefix_tokens=1)
+    for token in (1, 2):
+        cache.get(ids(token), lambda: fake_past(token))
+
+    # Touch the first prefix so the second becomes least recently used
+    cache.get(ids(1), lambda: pytest.fail('expected a hit'))
+    cache.get(ids(3), lambda: fake_past(3))
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.get(ids(1), lambda: pytest.fail('expected a hit'))
+    refilled = []
+    cache.get(ids(2), lambda: refilled.append(1) or fake_past(2))
+    assert refilled == [1]
+
+def test_eviction_keeps_the_cache_within_its_byte_budget():
+    entry_bytes = 2 * 8 * 4 * 4
+    cache = PrefixKVCache(max_bytes=2 * entry_bytes, min_prefix_tokens=1)
+    for token in range(4):
+        cache.get(ids(token), lambda: fake_past(token))
+
+    assert cache.stats()['entries'] == 2
+    assert cache.bytes == 2 * entry_bytes
+    # Key/values larger than the whole budget are returned but never cached
+    cache.get(ids(9), lambda: fake_past(9, tokens=64))
+    assert cache.stats()['entries'] == 2
+
+def test_generation_with_a_cached_prefix_matches_a_full_prefill(tiny_model_path, monkeypatch):
+    pytest.importorskip('transformers')
+    pytest.importorskip('datasets')
+    monkeypatch.setenv('INFERENCE_MODEL_PATH', tiny_model_path)
+    monkeypatch.setenv('PREFIX_CACHE_MIN_TOKENS', '4')
+    from backend.ai.model_trainer import ModelTrainer
+    trainer = ModelTrainer()
+
+    prefix = trainer._prompt_prefix(style='w5 w6 w7 w8 w9 w10')
+    text = trainer._build_prompt('w20 w21', style='w5 w6 w7 w8 w9 w10')
+
+    def generate(inputs):
+        with torch.no_grad():
+            return trainer.model.generate(**inputs, max_new_tokens=12, do_sample=False, pad_token_id=1)
+
+    expected = generate(dict(trainer.tokenizer(text, return_tensors='pt')))
+    miss = trainer._prompt_inputs(text, prefix)
+    hit = trainer._prompt_inputs(text, prefix)
+
+    assert 'past_key_values' in hit
+    assert trainer.prefix_cache.stats()['hits'] == 1
+    assert torch.equal(generate(miss), expected)
+    assert torch.equal(generate(hit), expected)
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+
+import pytest
+
+pytest.importorskip('mailchimp_api_v3')
+from backend.growth.audience_sync import AdPlatform, AudienceSyncEngine
+from backend.growth.remarketing_engine import RemarketingEngine
+
+class RecordingPlatform(AdPlatform):
+    name = 'recording'
+    max_batch_size = 3
+
+    def __init__(self):
+        self.created = []
+        self.added = {}
+
+    async def create_audience(self, segment_name):
+        self.created.append(segment_name)
+        return f"audience_{segment_name}"
+
+    async def add_members(self, audience_id, hashes):
+        self.added.setdefault(audience_id, []).extend(hashes)
+
+    async def remove_members(self, audience_id, hashes):
+        pass
+
+def viewers(count):
+    return [
+        {'id': f"v{i}", 'watch_time_percentage': (i % 10) / 10, 'likes': i % 4}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def engine(tmp_path):
+    platform = RecordingPlatform()
+    remarketing = RemarketingEngine()
+    remarketing.audience_sync = AudienceSyncEngine([platform], state_dir=str(tmp_path / 'sync'))
+    return remarketing, platform
+
+def test_streaming_creates_one_audience_per_segment(engine, tmp_path):
+    remarketing, platform = engine
+    data = viewers(50)
+
+    result = asyncio.run(remarketing.build_audience_streaming(
+        'content1', iter(data), output_dir=str(tmp_path / 'out'), chunk_size=7
+    ))
+
+    assert sorted(platform.created) == sorted(f"content1_{segment}" for segment in remarketing.audience_segments)
+    for segment, info in result['segments'].items():
+        audience_id = f"audience_content1_{segment}"
+        assert result['custom_audiences'][segment] == {'recording': audience_id}
+        # Every batch lands in the same audience, hashed
+        assert len(platform.added.get(audience_id, [])) == info['count']
+
+    expected = remarketing._segment_audience(data)
+    for segment, members in expected.items():
+        hashes = {hashlib.sha256(m['id'].encode()).hexdigest() for m in members}
+        assert set(platform.added.get(f"audience_content1_{segment}", [])) == hashes
+
+def test_streaming_resync_sends_nothing_unchanged(engine, tmp_path):
+    remarketing, platform = engine
+    data = viewers(20)
+
+    for _ in range(2):
+        asyncio.run(remarketing.build_audience_streaming('content1', iter(data), output_dir=str(tmp_path / 'out')))
+
+    assert len(platform.created) == len(remarketing.audience_segments)
+    assert sum(len(hashes) for hashes in platform.added.values()) == len(data)
+
+def test_segment_columns_match_determine_segment():
+    remarketing = RemarketingEngine()
+    # Each just under a threshold, where float32 would round up onto it
+    data = [
+        {'id': 'a', 'watch_time_percentage': 0.79999999999, 'likes': 5},
+        {'id': 'b', 'watch_time_percentage': 0.49999999999, 'likes': 1},
+        {'id': 'c', 'watch_time_percentage': 0.8, 'likes': 3},
+        {'id': 'd', 'watch_time_percentage': 0.19999999999}
+    ]
+
+    segments = remarketing._segment_audience(data)
+
+    assert [m['id'] for m in segments['high_engagement']] == ['c']
+    for segment, members in segments.items():
+        for member in members:
+            assert remarketing._determine_segment(member) == segment
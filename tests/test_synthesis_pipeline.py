@@ -0,0 +1,157 @@
+import time
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from backend.ai.synthesis_pipeline import SynthesisPipeline, split_sentences
+
+RATE = 1000
+LENGTH = 100
+
+def constant_audio(sentence):
+    """Every sample of a sentence's audio is its index, so the output shows where it came from."""
+    return np.full(LENGTH, float(sentence), dtype=np.float32)
+
+def collect(stream):
+    async def main():
+        return [chunk async for chunk in stream]
+    return asyncio.run(main())
+
+def test_split_sentences_breaks_long_sentences_at_commas():
+    text = "Short one. " + "a" * 30 + ", " + "b" * 30 + "! Last?"
+
+    assert split_sentences(text, max_chars=40) == ['Short one.', 'a' * 30 + ',', 'b' * 30 + '!', 'Last?']
+
+def test_chunks_come_out_in_sentence_order_under_concurrency():
+    pipeline = SynthesisPipeline(sample_rate=RATE, workers=4, max_ahead=4, crossfade_ms=10)
+    sentences = [str(i) for i in range(8)]
+
+    def encode(sentence):
+        # Later sentences finish first
+        time.sleep(0.002 * (8 - int(sentence)))
+        return sentence
+
+    chunks = collect(pipeline.stream(sentences, encode, constant_audio))
+    audio = np.concatenate(chunks)
+
+    crossfade = pipeline.crossfade
+    assert len(audio) == len(sentences) * LENGTH - (len(sentences) - 1) * crossfade
+    # Outside the crossfades each stretch holds one sentence, in order
+    assert np.all(np.diff(audio) >= 0)
+    for i in range(len(sentences)):
+        start = i * (LENGTH - crossfade) + (crossfade if i else 0)
+        assert np.all(audio[start:(i + 1) * (LENGTH - crossfade)] == i)
+    assert pipeline.stats()['sentences'] == len(sentences)
+
+def test_sentence_boundaries_are_crossfaded():
+    pipeline = SynthesisPipeline(sample_rate=RATE, crossfade_ms=20)
+    audio = np.concatenate(collect(pipeline.stream(['1', '0'], lambda s: s, constant_audio)))
+
+    crossfade = pipeline.crossfade
+    assert crossfade == 20
+    assert len(audio) == 2 * LENGTH - crossfade
+    # A linear ramp from the first sentence's level to the second's, with no jump
+    blend = audio[LENGTH - crossfade:LENGTH]
+    np.testing.assert_allclose(blend, np.linspace(1.0, 0.0, crossfade), atol=1e-6)
+    assert np.max(np.abs(np.diff(audio))) <= 1.0 / (crossfade - 1) + 1e-6
+
+def test_short_sentences_are_not_lost_in_the_crossfade():
+    pipeline = SynthesisPipeline(sample_rate=RATE, crossfade_ms=50)
+    short = lambda sentence: np.full(10, float(sentence), dtype=np.float32)
+
+    audio = np.concatenate(collect(pipeline.stream(['1', '2', '3'], lambda s: s, short)))
+
+    assert len(audio) == 10
+    assert audio[-1] == 3
+
+def test_first_chunk_is_sent_before_later_sentences_finish():
+    pipeline = SynthesisPipeline(sample_rate=RATE, workers=2, max_ahead=2)
+    release = threading.Event()
+
+    def encode(sentence):
+        if sentence != '0':
+            assert release.wait(timeout=5)
+        return sentence
+
+    async def main():
+        stream = pipeline.stream(['0', '1', '2'], encode, constant_audio)
+        first = await asyncio.wait_for(stream.__anext__(), timeout=2)
+        received_before_release = not release.is_set()
+        release.set()
+        rest = [chunk async for chunk in stream]
+        return first, received_before_release, rest
+
+    first, received_before_release, rest = asyncio.run(main())
+
+    assert received_before_release
+    assert np.all(first == 0) and len(first) == LENGTH - pipeline.crossfade
+    assert np.concatenate(rest)[-1] == 2
+    assert pipeline.ttfa_stats()['count'] == 1
+
+def test_abandoned_streams_cancel_queued_sentences():
+    pipeline = SynthesisPipeline(sample_rate=RATE, workers=1, max_ahead=2)
+    encoded = []
+
+    def encode(sentence):
+        encoded.append(sentence)
+        time.sleep(0.01)
+        return sentence
+
+    async def main():
+        stream = pipeline.stream([str(i) for i in range(10)], encode, constant_audio)
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+
+    assert len(encoded) < 10
+
+def test_voice_engine_streams_each_sentence_through_the_pipeline(monkeypatch):
+    pytest.importorskip('torchaudio')
+    from backend.ai.voice_engine import VoiceEngine
+    engine = VoiceEngine()
+
+    async def loaded():
+        pass
+
+    encoded = []
+    monkeypatch.setattr(engine, 'ensure_loaded', loaded)
+    monkeypatch.setattr(engine, '_encode', lambda characteristics, text: encoded.append(text) or text)
+    # Each sentence's samples hold its length in characters
+    monkeypatch.setattr(engine, '_vocode', lambda mel: np.full(LENGTH * 10, float(len(mel)), dtype=np.float32))
+
+    audio = np.concatenate(collect(engine.clone_voice_stream({}, "First sentence. Second one! Third?")))
+
+    assert sorted(encoded) == ['First sentence.', 'Second one!', 'Third?']
+    assert len(audio) == 3 * LENGTH * 10 - 2 * engine.pipeline.crossfade
+    assert audio[0] == len('First sentence.') and audio[-1] == len('Third?')
+
+def test_stream_errors_after_headers_are_logged(monkeypatch, caplog):
+    pytest.importorskip('torchaudio')
+    from fastapi.testclient import TestClient
+    from backend.ai import inference_api
+
+    async def loaded():
+        pass
+
+    async def failing_stream(characteristics, text):
+        yield np.zeros(LENGTH, dtype=np.float32)
+        raise RuntimeError('vocoder crashed')
+
+    monkeypatch.setattr(inference_api.voice_store, 'get', lambda voice_id: {})
+    monkeypatch.setattr(inference_api.voice_engine, 'ensure_loaded', loaded)
+    monkeypatch.setattr(inference_api.voice_engine, 'clone_voice_stream', failing_stream)
+
+    response = TestClient(inference_api.app).post(
+        '/synthesize/stream',
+        json={'voice_id': 'narrator', 'text': 'Hello.'},
+        headers={'Accept': 'audio/L16'}
+    )
+
+    # The stream ends early after the audio that was already produced
+    assert response.status_code == 200
+    assert len(response.content) == LENGTH * 2
+    assert 'Error streaming synthesis: vocoder crashed' in caplog.text
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from backend.growth.task_graph import TaskGraph
+
+def test_nodes_run_after_their_dependencies_and_receive_their_results():
+    graph = TaskGraph()
+    events = []
+
+    def node(name, delay):
+        async def func(*deps):
+            events.append(('start', name))
+            await asyncio.sleep(delay)
+            events.append(('end', name))
+            return f"{name}({', '.join(deps)})"
+        return func
+
+    graph.add('summary', node('summary', 0.02))
+    graph.add('thread', node('thread', 0.01))
+    graph.add('tweets', node('tweets', 0), deps=['thread', 'summary'])
+    graph.add('email', node('email', 0), deps=['summary'])
+
+    results = asyncio.run(graph.run())
+
+    assert results['tweets'] == 'tweets(thread(), summary())'
+    assert results['email'] == 'email(summary())'
+    for name, deps in (('tweets', ['thread', 'summary']), ('email', ['summary'])):
+        assert all(events.index(('end', dep)) < events.index(('start', name)) for dep in deps)
+    # Independent nodes overlap instead of running one after another
+    assert events[:2] == [('start', 'summary'), ('start', 'thread')]
+
+def test_unknown_and_duplicate_nodes_are_rejected():
+    graph = TaskGraph()
+
+    async def func(*deps):
+        return None
+
+    graph.add('summary', func)
+    with pytest.raises(ValueError, match='Duplicate'):
+        graph.add('summary', func)
+    with pytest.raises(ValueError, match='Unknown dependency'):
+        graph.add('tweets', func, deps=['thread'])
+
+def test_failure_cancels_dependents_and_pending_nodes():
+    graph = TaskGraph()
+    called = []
+    finished = []
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('summary failed')
+
+    async def dependent(summary):
+        called.append('tweets')
+
+    async def slow():
+        await asyncio.sleep(1)
+        finished.append('video')
+
+    graph.add('summary', fail)
+    graph.add('video', slow)
+    graph.add('tweets', dependent, deps=['summary'])
+
+    async def main():
+        started = asyncio.get_running_loop().time()
+        with pytest.raises(RuntimeError, match='summary failed'):
+            await graph.run()
+        return asyncio.get_running_loop().time() - started
+
+    elapsed = asyncio.run(main())
+
+    assert called == []
+    assert finished == []
+    assert elapsed < 0.5
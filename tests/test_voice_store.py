@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from backend.ai.voice_store import VoiceStore
+
+CHARACTERISTICS = {
+    'pitch': {'mean': 180.0, 'std': 12.5},
+    'energy': 0.7,
+    'embedding': np.arange(16, dtype=np.float32)
+}
+
+def assert_characteristics(loaded, expected=CHARACTERISTICS):
+    assert loaded['pitch'] == expected['pitch']
+    assert loaded['energy'] == pytest.approx(expected['energy'])
+    np.testing.assert_array_equal(np.asarray(loaded['embedding']), expected['embedding'])
+
+@pytest.fixture
+def store(tmp_path):
+    return VoiceStore(voices_dir=str(tmp_path / 'voices'))
+
+@pytest.mark.parametrize('format', ['.safetensors', '.npz'])
+def test_compact_formats_round_trip(store, format):
+    if format == '.safetensors':
+        pytest.importorskip('safetensors')
+    path = store.save('narrator', CHARACTERISTICS, format=format)
+
+    assert path.suffix == format
+    loaded = store.get('narrator')
+    assert_characteristics(loaded)
+    # Scalars come back as floats, not 0-d or 1-element arrays
+    assert isinstance(loaded['energy'], float)
+
+def test_pth_voices_still_load(store):
+    store.voices_dir.mkdir(parents=True)
+    torch.save(
+        {**CHARACTERISTICS, 'embedding': torch.from_numpy(CHARACTERISTICS['embedding'])},
+        store.voices_dir / 'legacy.pth'
+    )
+
+    assert_characteristics(store.get('legacy'))
+
+def test_compact_formats_take_precedence_over_pth(store):
+    store.voices_dir.mkdir(parents=True)
+    torch.save({'energy': 0.1}, store.voices_dir / 'narrator.pth')
+    store.save('narrator', CHARACTERISTICS, format='.npz')
+
+    assert store.get('narrator')['energy'] == pytest.approx(0.7)
+
+def test_changed_files_are_reloaded(store):
+    path = store.save('narrator', CHARACTERISTICS, format='.npz')
+    assert store.get('narrator')['energy'] == pytest.approx(0.7)
+    assert store.get('narrator')['energy'] == pytest.approx(0.7)
+
+    # Same size, new contents and a later mtime
+    store.save('narrator', {**CHARACTERISTICS, 'energy': 0.9}, format='.npz')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert store.get('narrator')['energy'] == pytest.approx(0.9)
+    assert store.stats()['hits'] == 1
+    assert store.stats()['misses'] == 1
+    assert store.stats()['reloads'] == 1
+    assert store.stats()['entries'] == 1
+
+@pytest.mark.parametrize('voice_id', ['../secret', 'voices/narrator', '..\\narrator', '..', '.', 'narrator\0', ''])
+def test_ids_that_could_leave_the_voices_dir_are_rejected(store, tmp_path, voice_id):
+    store.save('narrator', CHARACTERISTICS, format='.npz')
+    np.savez(tmp_path / 'secret.npz', energy=np.float32(1.0))
+
+    assert store.get(voice_id) is None
+    assert store.stats()['entries'] == 0
@@ -0,0 +1,35 @@
+import asyncio
+
+import numpy as np
+
+from backend.growth.winner_detection import WinnerDetector
+
+def batch(ids, views, verticals=None):
+    return {'ids': ids, 'metrics': {'views': np.asarray(views, dtype=np.float64)}, 'verticals': verticals}
+
+def collect(detector, batches):
+    async def run():
+        return [winner['id'] async for winner in detector.stream_winners(batches)]
+    return asyncio.run(run())
+
+def test_empty_batches_have_no_winners():
+    detector = WinnerDetector({'views': 0}, percentile_thresholds={'views': 90})
+
+    assert detector.detect({'views': np.array([])}).tolist() == []
+    assert detector.detect({'views': np.array([])}, np.array([], dtype=object)).tolist() == []
+    assert collect(detector, [batch([], []), batch(['a', 'b'], [1, 100]), batch([], [])]) == ['b']
+
+def test_percentiles_are_per_vertical():
+    detector = WinnerDetector({'views': 0}, percentile_thresholds={'views': 50})
+    verticals = np.array(['finance', 'finance', 'gaming', 'gaming'])
+
+    mask = detector.detect({'views': np.array([10, 20, 1000, 2000])}, verticals)
+
+    assert mask.tolist() == [False, True, False, True]
+
+def test_percentiles_are_relative_to_the_batch():
+    detector = WinnerDetector({'views': 0}, percentile_thresholds={'views': 50})
+
+    # The same item wins or loses depending on the rest of its batch
+    assert collect(detector, [batch(['a', 'b'], [10, 20]), batch(['c', 'd'], [20, 30])]) == ['b', 'd']
+    assert collect(detector, [batch(['a', 'b', 'c', 'd'], [10, 20, 20, 30])]) == ['b', 'c', 'd']